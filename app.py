@@ -7,16 +7,27 @@ routes, and runs the app locally (or on Raspberry Pi).
 """
 
 from flask import Flask
+from simulator.data_loader import DB_PATH
 from web.routes import main  # Import our main Blueprint (routes and logic)
+from web.utils import init_db
 
-def create_app():
+def create_app(config=None):
     """
     Application factory pattern: Creates and configures the Flask app.
 
+    Args:
+        config (dict): Optional overrides for the settings in config.py,
+            e.g. DATABASE (path to the SQLite catalog).
+
     Returns:
         Flask: The configured Flask application instance.
     """
     app = Flask(__name__)         # Create a Flask app instance
+    app.config.from_object("config")
+    if config:
+        app.config.update(config)
+    app.config["DATABASE"] = str(app.config.get("DATABASE") or DB_PATH)
+    init_db(app)                  # Per-request connections from shared pools
     app.register_blueprint(main)  # Register routes from the 'web/routes.py' blueprint
     return app
 
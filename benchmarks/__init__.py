@@ -0,0 +1,7 @@
+"""
+benchmarks
+----------
+Reproducible timing suite for the simulator and web hot paths.
+
+Run `python -m benchmarks.bench --help` for usage.
+"""
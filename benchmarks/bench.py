@@ -0,0 +1,296 @@
+"""
+bench.py
+--------
+Benchmark suite for the simulator and web hot paths.
+
+Every case runs against a synthetic roster built from a fixed seed, at each
+requested roster size (10 to 10,000 units by default), and records the best
+of `repeat` runs as seconds per operation. Results are compared against a
+JSON baseline; a case that got slower than the baseline by more than the
+threshold counts as a regression and makes the run exit with status 1.
+
+Usage:
+    python -m benchmarks.bench                     # compare with benchmarks/baseline.json
+    python -m benchmarks.bench --update            # record a new baseline
+    python -m benchmarks.bench --sizes 10 100 --only simulate_battle
+
+Baselines are machine specific: record one on the machine you compare on.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from simulator.battle import resolve_follow_ups, simulate_battle
+from simulator.calculations import calculate_damage
+from simulator.data_loader import FEHDatabase
+from simulator.units import Unit
+from simulator.weapon import Weapon
+
+BASELINE_PATH = Path(__file__).parent / "baseline.json"
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25  # fail when 25% slower than the baseline
+SEED = 20240101
+
+WEAPON_TYPES = [
+    ("Sword", "red"), ("Lance", "blue"), ("Axe", "green"), ("RedTome", "red"),
+    ("BlueTome", "blue"), ("GreenTome", "green"), ("Staff", "colorless"), ("ColorlessBow", "colorless"),
+]
+UNIT_TYPES = ["infantry", "armor", "flier", "cavalry"]
+
+
+# --- Synthetic data ---
+def synthetic_roster(size, seed=SEED):
+    """`size` armed Units with reproducible stats, weapons and combat flags."""
+    rng = random.Random(seed)
+    roster = []
+    for i in range(size):
+        weapon_type, color = rng.choice(WEAPON_TYPES)
+        unit = Unit(
+            name=f"Unit {i:05d}",
+            hp=rng.randint(30, 60), atk=rng.randint(25, 65), spd=rng.randint(15, 55),
+            defense=rng.randint(10, 50), res=rng.randint(10, 50),
+            unit_type=rng.choice(UNIT_TYPES), weapon_type=weapon_type,
+            equipped_weapon=Weapon(name=f"Weapon {i:05d}", might=rng.randint(6, 16), color=color,
+                                   weapon_type=weapon_type),
+        )
+        unit.special = "Moonbow" if rng.random() < 0.3 else None
+        unit.on_defensive_tile = rng.random() < 0.2
+        unit.has_brave_attack = rng.random() < 0.1
+        unit.has_potent_follow_up = rng.random() < 0.1
+        roster.append(unit)
+    return roster
+
+
+def synthetic_database(path, roster):
+    """Write `roster` (units, their weapons and the links) into a new database at `path`."""
+    db = FEHDatabase(db_path=path)
+    db.conn.executemany(
+        "INSERT INTO units (id, name, hp, atk, spd, defense, res, unit_type, weapon_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(i, u.name, u.hp, u.atk, u.spd, u.defense, u.res, u.unit_type, u.weapon_type)
+         for i, u in enumerate(roster, 1)],
+    )
+    db.conn.executemany(
+        "INSERT INTO weapons (id, name, might, color, range, weapon_type) VALUES (?, ?, ?, ?, ?, ?)",
+        [(i, u.equipped_weapon.name, u.equipped_weapon.might, u.equipped_weapon.color, 1, u.weapon_type)
+         for i, u in enumerate(roster, 1)],
+    )
+    db.conn.executemany("INSERT INTO unit_weapons (unit_id, weapon_id) VALUES (?, ?)",
+                        [(i, i) for i in range(1, len(roster) + 1)])
+    db.conn.executemany(
+        "INSERT INTO skills (name, skill_type) VALUES (?, ?)",
+        [(f"Skill {i:05d}", "a") for i in range(len(roster))],
+    )
+    db.conn.commit()
+    db.close()
+
+
+def _pairs(roster):
+    """Each unit against its neighbour, so every unit attacks and defends once."""
+    return list(zip(roster, roster[1:] + roster[:1]))
+
+
+# --- Cases ---
+# Each case takes (roster, workdir) and returns (run, ops): `run()` performs
+# `ops` operations and is timed as a whole.
+def case_calculate_damage(roster, workdir):
+    pairs = _pairs(roster)
+
+    def run():
+        for attacker, defender in pairs:
+            calculate_damage(attacker, defender, weapon_type=attacker.equipped_weapon.weapon_type)
+    return run, len(pairs)
+
+
+def _battle_case(options):
+    def case(roster, workdir):
+        pairs = _pairs(roster)
+
+        def run():
+            for attacker, defender in pairs:
+                simulate_battle(attacker, defender, options)
+        return run, len(pairs)
+    return case
+
+
+def case_resolve_follow_ups(roster, workdir):
+    pairs = _pairs(roster)
+
+    def run():
+        for attacker, defender in pairs:
+            resolve_follow_ups(attacker, defender)
+    return run, len(pairs)
+
+
+def _database(roster, workdir):
+    path = os.path.join(workdir, f"bench_{len(roster)}.db")
+    if not os.path.exists(path):
+        synthetic_database(path, roster)
+    return path
+
+
+def case_database_reads(roster, workdir):
+    """One full catalog read: units, weapons, skills and their links."""
+    path = _database(roster, workdir)
+
+    def run():
+        db = FEHDatabase(db_path=path)
+        db.get_units()
+        db.get_weapons()
+        db.get_skills()
+        db.get_unit_weapons()
+        db.get_unit_skills()
+        db.close()
+    return run, 1
+
+
+def case_index_post(roster, workdir):
+    """One simulator form submission through the Flask test client."""
+    from app import create_app
+
+    path = _database(roster, workdir)
+    client = create_app({"DATABASE": path, "TESTING": True}).test_client()
+    attacker, defender = roster[0], roster[-1]
+    form = {
+        "attacker": attacker.name,
+        "defender": defender.name,
+        "attacker_weapon": attacker.equipped_weapon.name,
+        "defender_weapon": defender.equipped_weapon.name,
+    }
+
+    def run():
+        response = client.post("/", data=form)
+        if response.status_code != 200:
+            raise RuntimeError(f"POST / returned {response.status_code}")
+    return run, 1
+
+
+CASES = {
+    "calculate_damage": case_calculate_damage,
+    "simulate_battle": _battle_case({"pure": True}),
+    "simulate_battle_detailed": _battle_case({"pure": True, "detailed": True}),
+    "resolve_follow_ups": case_resolve_follow_ups,
+    "database_reads": case_database_reads,
+    "index_post": case_index_post,
+}
+
+
+# --- Runner ---
+def time_case(run, ops, repeat):
+    """Best of `repeat` timings, in seconds per operation."""
+    run()  # warm up imports, template and statement caches
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best / ops
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, only=None, log=None):
+    """
+    Time every case at every roster size.
+
+    Args:
+        sizes (list[int]): Roster sizes.
+        repeat (int): Timed runs per case; the fastest is kept.
+        only (str): Run only cases whose name contains this string.
+        log (callable): Called with one progress line per result.
+
+    Returns:
+        dict: {"case[size]": seconds per operation}
+    """
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="feh_bench_")
+    try:
+        for size in sizes:
+            roster = synthetic_roster(size)
+            for name, case in CASES.items():
+                if only and only not in name:
+                    continue
+                run, ops = case(roster, workdir)
+                key = f"{name}[{size}]"
+                results[key] = time_case(run, ops, repeat)
+                if log:
+                    log(f"{key:<36} {results[key] * 1e6:12.2f} us/op")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Cases that are more than `threshold` (a fraction) slower than the baseline.
+    Cases missing from either side are skipped.
+
+    Returns:
+        list[tuple[str, float, float]]: (case, baseline, current) per regression.
+    """
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base and current > base * (1 + threshold):
+            regressions.append((key, base, current))
+    return regressions
+
+
+def load_baseline(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def save_baseline(path, results, sizes, repeat):
+    data = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": list(sizes),
+            "repeat": repeat,
+            "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="roster sizes")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed runs per case")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--baseline", default=str(BASELINE_PATH), help="baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (0.25 = 25%%)")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.only, log=print)
+
+    if args.update:
+        save_baseline(args.baseline, results, args.sizes, args.repeat)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update to record one.")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    for key, base, current in regressions:
+        print(f"REGRESSION {key}: {base * 1e6:.2f} -> {current * 1e6:.2f} us/op ({current / base - 1:+.0%})")
+    if regressions:
+        return 1
+    print(f"No regressions over {args.threshold:.0%}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
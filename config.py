@@ -0,0 +1,39 @@
+"""
+config.py
+---------
+Default settings for the FEH simulator web app. create_app() loads every
+UPPERCASE name here into app.config; a dict passed to create_app() overrides
+them.
+"""
+
+# --- Database ---
+# SQLite catalog file; None means data/feh.db.
+DATABASE = None
+# Idle connections kept per pool.
+DATABASE_POOL_SIZE = 4
+# WAL lets readers keep going while an admin write commits, and with
+# synchronous=NORMAL a commit no longer fsyncs a full rollback journal.
+DATABASE_JOURNAL_MODE = "WAL"
+DATABASE_SYNCHRONOUS = "NORMAL"
+# Milliseconds a connection waits on a locked database before failing.
+DATABASE_BUSY_TIMEOUT = 5000
+# Bytes of the file read through mmap (0 disables it).
+DATABASE_MMAP_SIZE = 64 * 1024 * 1024
+# Page cache per connection; negative values are KiB.
+DATABASE_CACHE_SIZE = -8000
+# Serve public (non-admin) pages from read-only connections.
+DATABASE_READONLY_PUBLIC = True
+
+# --- Lists ---
+# Rows per page on /units, /weapons, /skills and the admin lists.
+PAGE_SIZE = 50
+
+# --- API ---
+# Most matchups one /api/simulate request may carry.
+SIMULATE_BATCH_LIMIT = 1000
+
+# --- Response cache ---
+# Rendered public pages kept per process (see web.utils.cached_page); the
+# least recently used go once either bound is exceeded.
+RESPONSE_CACHE_ENTRIES = 256
+RESPONSE_CACHE_BYTES = 16 * 1024 * 1024
@@ -1,4 +1,6 @@
 -- SQLite schema for FEH simulator
+-- Base tables (migration 1). Later schema changes, including indexes, are
+-- migrations in simulator/migrations.py; don't edit this file for them.
 
 CREATE TABLE IF NOT EXISTS units (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
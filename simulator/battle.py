@@ -3,11 +3,13 @@ Core battle simulation orchestration.
 
 Provides simulate_battle which executes a single round of combat between two Units
 and returns both a concise result and (optionally) a detailed step breakdown
-aligned with the FEH damage calculation structure.
+aligned with the FEH damage calculation structure. iter_battle streams the
+same steps as a generator while the round runs.
 """
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional, Callable, Tuple
+from typing import List, Dict, Any, Optional, Callable, Tuple, NamedTuple, Generator, Iterator
 from enum import Enum
+from time import perf_counter
 class Phase(Enum):
     INIT = 'init'
     COUNTER = 'counter'
@@ -25,9 +27,9 @@ class CombatContext:
     attacker: Any = None
     defender: Any = None
     phase: Phase = Phase.INIT
-    trace: List['DamageStep'] = field(default_factory=list)
 
 from .calculations import calculate_damage
+from .profiling import active_profiler
 from .units import Unit
 
 @dataclass
@@ -52,6 +54,16 @@ class AttackResult:
 class BattleResult:
     round_summary: List[AttackResult]
     winner: Optional[str]
+    attacker_hp: Optional[int] = None  # final HP after the round
+    defender_hp: Optional[int] = None
+
+class LeanBattleResult(NamedTuple):
+    """Outcome-only result of simulate_battle(..., options={"lean": True})."""
+    attacker_hp: int
+    defender_hp: int
+    attacker_ko: bool
+    defender_ko: bool
+    winner: Optional[str]
 
 
 def _as_bool_or_call(obj, *args):
@@ -96,102 +108,266 @@ def resolve_follow_ups(attacker: Unit, defender: Unit) -> Tuple[bool, bool]:
     return attacker_follow_up, defender_follow_up
 
 def _potent_extra(unit: Unit) -> bool:
-    return getattr(unit, 'has_potent_follow_up', lambda: False)()
+    return _as_bool_or_call(getattr(unit, 'has_potent_follow_up', False))
+
+
+def _strike(hp: int, damage: int, brave: bool) -> int:
+    """Apply one attack (two hits if brave and the target survives the first)."""
+    hp = hp - damage if hp > damage else 0
+    if brave and hp > 0:
+        hp = hp - damage if hp > damage else 0
+    return hp
+
+
+def simulate_battle_lean(attacker: Unit, defender: Unit, options: Optional[Dict[str, Any]] = None) -> LeanBattleResult:
+    """Outcome-only combat round for large sweeps.
+
+    Same ordering as simulate_battle (init, counter, follow-up, potent) but
+    nothing is recorded per hit: each direction's damage is calculated once
+    and reused for every hit, hooks are resolved once per battle, and only the
+    final HP, KO flags and winner are returned. Honors options["terrain"],
+    options["pure"] and options["damage_cache"].
+    """
+    terrain = options.get("terrain") if options else None
+    damage_cache = options.get("damage_cache") if options else None
+    calculate = damage_cache.calculate if damage_cache is not None else calculate_damage
+    att_weapon = attacker.equipped_weapon
+    def_weapon = defender.equipped_weapon
+    att_hp = attacker.hp
+    def_hp = defender.hp
+
+    att_damage, _ = calculate(attacker, defender, weapon_type=att_weapon.weapon_type if att_weapon else None,
+                              terrain=terrain, adaptive_damage=getattr(attacker, 'adaptive_damage', False))
+    att_brave = _as_bool_or_call(getattr(attacker, 'has_brave_attack', False))
+    def_damage = None
+    def_brave = False
+
+    # Initial attack
+    def_hp = _strike(def_hp, att_damage, att_brave)
+
+    # Defender counter
+    if def_hp > 0 and def_weapon:
+        def_damage, _ = calculate(defender, attacker, weapon_type=def_weapon.weapon_type,
+                                  terrain=terrain, adaptive_damage=getattr(defender, 'adaptive_damage', False))
+        def_brave = _as_bool_or_call(getattr(defender, 'has_brave_attack', False))
+        att_hp = _strike(att_hp, def_damage, def_brave)
+
+    att_follow_up, def_follow_up = resolve_follow_ups(attacker, defender)
+
+    # Attacker follow-up (+ potent)
+    if att_hp > 0 and def_hp > 0 and att_follow_up:
+        def_hp = _strike(def_hp, att_damage, att_brave)
+        if def_hp > 0 and _potent_extra(attacker):
+            def_hp = _strike(def_hp, att_damage, att_brave)
+
+    # Defender follow-up (+ potent)
+    if att_hp > 0 and def_hp > 0 and def_follow_up:
+        if def_damage is None:
+            def_damage, _ = calculate(defender, attacker, weapon_type=def_weapon.weapon_type if def_weapon else None,
+                                      terrain=terrain, adaptive_damage=getattr(defender, 'adaptive_damage', False))
+            def_brave = _as_bool_or_call(getattr(defender, 'has_brave_attack', False))
+        att_hp = _strike(att_hp, def_damage, def_brave)
+        if att_hp > 0 and _potent_extra(defender):
+            att_hp = _strike(att_hp, def_damage, def_brave)
+
+    winner = None
+    if att_hp > 0 and def_hp <= 0:
+        winner = attacker.name
+    elif def_hp > 0 and att_hp <= 0:
+        winner = defender.name
+
+    if not (options and options.get("pure", False)):
+        attacker.hp = att_hp
+        defender.hp = def_hp
+
+    return LeanBattleResult(att_hp, def_hp, att_hp == 0, def_hp == 0, winner)
 
 
 def simulate_battle(attacker: Unit, defender: Unit, options: Optional[Dict[str, Any]] = None) -> BattleResult:
-    """Simulate a full combat round with all attack logic inside. Handles brave, follow-ups, potent, and context/trace."""
+    """Simulate a full combat round with all attack logic inside. Handles brave, follow-ups and potent.
+
+    HP is tracked locally during the round. By default the final HP is written
+    back to attacker.hp / defender.hp; with options["pure"] the inputs are only
+    read, so they may be shared Units or CombatantSnapshots, and the final HP
+    is available as result.attacker_hp / result.defender_hp either way.
+
+    options["lean"] switches to simulate_battle_lean and returns a
+    LeanBattleResult instead. options["detailed"] keeps each hit's DamageStep
+    on its AttackResult.steps (iter_battle streams them instead).
+    options["damage_cache"] (a DamageCache) memoizes the damage
+    calculations. options["profiler"] (a profiling.Profiler) records battle,
+    phase and effect timings; profiling.enable() turns that on for every
+    call.
+    """
     if options is None:
         options = {}
+    profiler = options.get("profiler")
+    if profiler is None:
+        profiler = active_profiler()
+        if profiler is None:
+            if options.get("lean", False):
+                return simulate_battle_lean(attacker, defender, options)
+            return _drain(_battle_steps(attacker, defender, options))
+
+    with profiler.activate():
+        start = perf_counter()
+        if options.get("lean", False):
+            result = simulate_battle_lean(attacker, defender, options)
+            profiler.record("battle", "lean", perf_counter() - start)
+        else:
+            result = _drain(_battle_steps(attacker, defender, options, profiler))
+            profiler.record("battle", "round", perf_counter() - start)
+    return result
+
+
+def iter_battle(attacker: Unit, defender: Unit, options: Optional[Dict[str, Any]] = None) -> Generator[DamageStep, None, BattleResult]:
+    """Streaming simulate_battle: yields each DamageStep as soon as it is computed.
+
+    Nothing is accumulated unless options["detailed"] asks for per-attack
+    steps, so callers can filter, forward or count steps of any number of
+    battles in constant memory. The generator's return value is the
+    BattleResult (``result = yield from iter_battle(...)``). Stopping early
+    ends the battle where it is and skips the HP write-back. options["lean"]
+    is ignored since the lean path records no steps. Phase timings go to
+    options["profiler"] or the active profiler, and include whatever the
+    caller does between steps; effect timings only reach a profiler that is
+    active (profiling.enable()).
+    """
+    options = options or {}
+    profiler = options.get("profiler") or active_profiler()
+    return _battle_steps(attacker, defender, options, profiler)
 
+
+def iter_battles(pairs, options: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[int, DamageStep]]:
+    """Stream the steps of many battles as (index into pairs, DamageStep)."""
+    for index, (attacker, defender) in enumerate(pairs):
+        for step in iter_battle(attacker, defender, options):
+            yield index, step
+
+
+def _drain(steps):
+    """Run a step generator to the end and return its return value."""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+def _battle_steps(attacker, defender, options, profiler=None):
     round_events: List[AttackResult] = []
     context = CombatContext(attacker=attacker, defender=defender)
+    units = (attacker, defender)
+    hp = [attacker.hp, defender.hp]
+    damage_cache = options.get("damage_cache")
+    calculate = damage_cache.calculate if damage_cache is not None else calculate_damage
 
-    def do_attack(attacker, defender, phase):
+    def do_attack(source, target, phase):
+        attacker, defender = units[source], units[target]
         detailed = options.get("detailed", False)
         terrain = options.get("terrain")
-        weapon_type = attacker.equipped_weapon.type if attacker.equipped_weapon else None
+        weapon_type = attacker.equipped_weapon.weapon_type if attacker.equipped_weapon else None
         adaptive = getattr(attacker, 'adaptive_damage', False)
         brave = _as_bool_or_call(getattr(attacker, 'has_brave_attack', False))
         steps: List[DamageStep] = []
         hit_damages: List[int] = []
-        hp_before = defender.hp
+        hp_before = hp[target]
         # First hit
         context.hit_index = 0
-        dmg1 = calculate_damage(attacker, defender, weapon_type=weapon_type, terrain=terrain, adaptive_damage=adaptive)
-        defender.hp = max(0, defender.hp - dmg1)
+        dmg1, _ = calculate(attacker, defender, weapon_type=weapon_type, terrain=terrain, adaptive_damage=adaptive)
+        hp[target] = max(0, hp[target] - dmg1)
         hit_damages.append(dmg1)
+        step = DamageStep(f"{phase.value}_Hit1", dmg1, "First hit damage")
         if detailed:
-            steps.append(DamageStep(f"{phase.value}_Hit1", dmg1, "First hit damage"))
-        context.trace.append(DamageStep(f"{phase.value}_Hit1", dmg1, "First hit damage"))
+            steps.append(step)
+        yield step
         # Brave second hit if defender survived
-        if brave and defender.hp > 0:
+        if brave and hp[target] > 0:
             context.hit_index = 1
-            dmg2 = calculate_damage(attacker, defender, weapon_type=weapon_type, terrain=terrain, adaptive_damage=adaptive)
-            defender.hp = max(0, defender.hp - dmg2)
+            dmg2, _ = calculate(attacker, defender, weapon_type=weapon_type, terrain=terrain, adaptive_damage=adaptive)
+            hp[target] = max(0, hp[target] - dmg2)
             hit_damages.append(dmg2)
+            step = DamageStep(f"{phase.value}_Hit2", dmg2, "Second brave hit damage")
             if detailed:
-                steps.append(DamageStep(f"{phase.value}_Hit2", dmg2, "Second brave hit damage"))
-            context.trace.append(DamageStep(f"{phase.value}_Hit2", dmg2, "Second brave hit damage"))
+                steps.append(step)
+            yield step
         total_damage = sum(hit_damages)
+        step = DamageStep(f"{phase.value}_TotalDamage", total_damage, "Sum of all hits in sequence")
         if detailed:
-            steps.append(DamageStep(f"{phase.value}_TotalDamage", total_damage, "Sum of all hits in sequence"))
-        context.trace.append(DamageStep(f"{phase.value}_TotalDamage", total_damage, "Sum of all hits in sequence"))
+            steps.append(step)
+        yield step
         return AttackResult(
             attacker=attacker.name,
             defender=defender.name,
             damage=total_damage,
-            ko=defender.hp == 0,
+            ko=hp[target] == 0,
             hp_before=hp_before,
-            hp_after=defender.hp,
+            hp_after=hp[target],
             hit_damages=hit_damages,
             steps=steps,
             phase=phase.value,
         )
 
+    if profiler is not None:
+        untimed_attack = do_attack
+
+        def do_attack(source, target, phase):
+            start = perf_counter()
+            result = yield from untimed_attack(source, target, phase)
+            profiler.record("phase", phase.name, perf_counter() - start)
+            return result
+
     # Initial attack
-    first = do_attack(attacker, defender, Phase.INIT)
+    first = yield from do_attack(0, 1, Phase.INIT)
     round_events.append(first)
 
     # Defender counter if alive and (placeholder) can retaliate
     if not first.ko and defender.equipped_weapon:
-        counter = do_attack(defender, attacker, Phase.COUNTER)
+        counter = yield from do_attack(1, 0, Phase.COUNTER)
         round_events.append(counter)
 
     # Unified follow-up resolution
     att_follow_up, def_follow_up = resolve_follow_ups(attacker, defender)
 
     # Attacker follow-up
-    if attacker.hp > 0 and defender.hp > 0 and att_follow_up:
-        follow_up = do_attack(attacker, defender, Phase.FOLLOW_UP)
+    if hp[0] > 0 and hp[1] > 0 and att_follow_up:
+        follow_up = yield from do_attack(0, 1, Phase.FOLLOW_UP)
         round_events.append(follow_up)
         # Potent extra (attacker)
-        if not follow_up.ko and defender.hp > 0 and _potent_extra(attacker):
-            potent = do_attack(attacker, defender, Phase.POTENT)
+        if not follow_up.ko and hp[1] > 0 and _potent_extra(attacker):
+            potent = yield from do_attack(0, 1, Phase.POTENT)
             round_events.append(potent)
 
     # Defender follow-up
-    if attacker.hp > 0 and defender.hp > 0 and def_follow_up:
-        follow_up_counter = do_attack(defender, attacker, Phase.FOLLOW_UP_COUNTER)
+    if hp[0] > 0 and hp[1] > 0 and def_follow_up:
+        follow_up_counter = yield from do_attack(1, 0, Phase.FOLLOW_UP_COUNTER)
         round_events.append(follow_up_counter)
         # Potent extra (defender)
-        if not follow_up_counter.ko and attacker.hp > 0 and _potent_extra(defender):
-            potent_def = do_attack(defender, attacker, Phase.POTENT)
+        if not follow_up_counter.ko and hp[0] > 0 and _potent_extra(defender):
+            potent_def = yield from do_attack(1, 0, Phase.POTENT)
             round_events.append(potent_def)
 
     # Determine winner (simple: whoever still has HP)
     winner = None
-    if attacker.hp > 0 and defender.hp <= 0:
+    if hp[0] > 0 and hp[1] <= 0:
         winner = attacker.name
-    elif defender.hp > 0 and attacker.hp <= 0:
+    elif hp[1] > 0 and hp[0] <= 0:
         winner = defender.name
 
-    return BattleResult(round_summary=round_events, winner=winner)
+    if not options.get("pure", False):
+        attacker.hp, defender.hp = hp
+
+    return BattleResult(round_summary=round_events, winner=winner, attacker_hp=hp[0], defender_hp=hp[1])
 
 __all__ = [
     'simulate_battle',
+    'simulate_battle_lean',
+    'iter_battle',
+    'iter_battles',
     'simulate_attack',
     'BattleResult',
+    'LeanBattleResult',
     'AttackResult',
-    'DamageStep'
+    'DamageStep',
+    'Phase',
 ]
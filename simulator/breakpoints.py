@@ -0,0 +1,175 @@
+"""
+breakpoints.py
+--------------
+Solvers for stat thresholds ("how much Atk to ORKO", "how much Spd to avoid
+being doubled", ...) without brute-forcing simulate_battle over a stat range.
+
+Follow-up thresholds are closed form on FOLLOW_UP_SPEED_THRESHOLD, with the
+guarantee/deny hooks checked through resolve_follow_ups. Damage thresholds
+binary search the stat, relying on damage being non-decreasing in Atk and
+non-increasing in Def/Res, which takes at most log2(MAX_STAT) probes. All functions accept Units or CombatantSnapshots
+and never modify them.
+"""
+
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+from .battle import (
+    FOLLOW_UP_SPEED_THRESHOLD,
+    _as_bool_or_call,
+    _potent_extra,
+    resolve_follow_ups,
+    simulate_battle_lean,
+)
+from .calculations import calculate_damage
+from .units import Unit
+
+# Search ceiling for stat values; well above anything reachable in game.
+MAX_STAT = 255
+
+
+def _snapshot(unit):
+    return unit.snapshot() if isinstance(unit, Unit) else unit
+
+
+def _probe(unit):
+    """
+    Mutable scratch copy of a snapshot. A search overwrites one stat on it
+    per step, which is far cheaper than dataclasses.replace per step.
+    """
+    probe = SimpleNamespace(**vars(unit))
+    probe.equipped_skills = unit.equipped_skills
+    return probe
+
+
+def _damage(attacker, defender, terrain):
+    weapon = attacker.equipped_weapon
+    damage, _ = calculate_damage(attacker, defender, weapon_type=weapon.weapon_type if weapon else None,
+                                 terrain=terrain, adaptive_damage=attacker.adaptive_damage)
+    return damage
+
+
+def _lowest(predicate, lo=0, hi=MAX_STAT):
+    """Smallest value in [lo, hi] where a monotone predicate holds, else None."""
+    if not predicate(hi):
+        return None
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if predicate(mid):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def min_atk_to_orko(attacker, defender, options: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    Lowest attacker Atk that KOs the defender in one round of combat
+    initiated by the attacker.
+
+    The attacker's hits are counted in closed form: the initial attack, plus
+    the follow-up (and potent) attack if the attacker gets one and survives
+    the counter. The required per-hit damage is then found by binary search
+    over calculate_damage.
+
+    Returns:
+        int or None: None if no Atk up to MAX_STAT is enough.
+    """
+    terrain = options.get("terrain") if options else None
+    attacker, defender = _snapshot(attacker), _snapshot(defender)
+    per_attack = 2 if _as_bool_or_call(attacker.has_brave_attack) else 1
+    hits = per_attack
+
+    att_follow_up, _ = resolve_follow_ups(attacker, defender)
+    if att_follow_up:
+        survives_counter = True
+        if defender.equipped_weapon:
+            counter_hits = 2 if _as_bool_or_call(defender.has_brave_attack) else 1
+            survives_counter = _damage(defender, attacker, terrain) * counter_hits < attacker.hp
+        if survives_counter:
+            hits += per_attack * (2 if _potent_extra(attacker) else 1)
+
+    needed = -(-defender.hp // hits)  # ceil
+    probe = _probe(attacker)
+
+    def enough(atk):
+        probe.atk = atk
+        return _damage(probe, defender, terrain) >= needed
+
+    return _lowest(enough)
+
+
+def min_spd_to_double(unit, foe) -> Optional[int]:
+    """
+    Lowest Spd at which `unit` makes a follow-up attack against `foe`.
+
+    Returns:
+        int or None: 0 if the follow-up is guaranteed, None if it is denied.
+    """
+    probe, foe = _probe(_snapshot(unit)), _snapshot(foe)
+    probe.spd = -MAX_STAT
+    if resolve_follow_ups(probe, foe)[0]:
+        return 0
+    probe.spd = MAX_STAT
+    if not resolve_follow_ups(probe, foe)[0]:
+        return None
+    return max(0, foe.spd + FOLLOW_UP_SPEED_THRESHOLD)
+
+
+def min_spd_to_avoid_double(unit, foe) -> Optional[int]:
+    """
+    Lowest Spd at which `foe` makes no follow-up attack against `unit`.
+
+    Returns:
+        int or None: 0 if the foe is denied anyway, None if its follow-up
+        is guaranteed.
+    """
+    probe, foe = _probe(_snapshot(unit)), _snapshot(foe)
+    probe.spd = -MAX_STAT
+    if not resolve_follow_ups(probe, foe)[1]:
+        return 0
+    probe.spd = MAX_STAT
+    if resolve_follow_ups(probe, foe)[1]:
+        return None
+    return max(0, foe.spd - FOLLOW_UP_SPEED_THRESHOLD + 1)
+
+
+def min_stat_to_survive(unit, foe, stat=None, unit_attacks=False, options: Optional[Dict[str, Any]] = None) -> Optional[int]:
+    """
+    Lowest Def or Res at which `unit` survives one round against `foe`.
+
+    Args:
+        unit: The unit that has to survive.
+        foe: The opposing unit.
+        stat (str): 'defense' or 'res'; defaults to the stat the foe's
+            weapon targets.
+        unit_attacks (bool): True if `unit` initiates combat, False if it
+            is the one being attacked.
+        options (dict): simulate_battle options (terrain).
+
+    Returns:
+        int or None: None if no value up to MAX_STAT is enough.
+    """
+    unit, foe = _snapshot(unit), _snapshot(foe)
+    if stat is None:
+        weapon = foe.equipped_weapon
+        wtype = weapon.weapon_type if weapon else None
+        stat = 'res' if wtype and wtype.lower() in ['tome', 'dragon', 'staff'] else 'defense'
+    options = dict(options or {}, pure=True)
+    probe = _probe(unit)
+
+    def survives(value):
+        setattr(probe, stat, value)
+        if unit_attacks:
+            return not simulate_battle_lean(probe, foe, options).attacker_ko
+        return not simulate_battle_lean(foe, probe, options).defender_ko
+
+    return _lowest(survives)
+
+
+__all__ = [
+    'min_atk_to_orko',
+    'min_spd_to_double',
+    'min_spd_to_avoid_double',
+    'min_stat_to_survive',
+]
@@ -6,8 +6,17 @@ This is where FEH rules are implemented step-by-step.
 
 For now, this is a simple damage calculation:
     Damage = max(0, Attacker's Effective ATK - Defender's DEF or RES)
+
+DamageCache adds an opt-in, size-bounded LRU memo in front of
+calculate_damage for sweeps that see the same matchups over and over.
+Weapon and skill effect calls are timed when a profiling.Profiler is active.
 """
 
+import threading
+from collections import OrderedDict
+
+from .profiling import active_profiler
+
 class SimulationContext:
     def __init__(self, attacker, defender):
         self.attacker = attacker
@@ -19,29 +28,30 @@ class SimulationContext:
     def add_log(self, message):
         self.log.append(message)
 
+def _apply_effects(attacker, defender, context, profiler=None):
+    """Attacker weapon and skills, then defender weapon and skills, timed when profiling."""
+    for unit in (attacker, defender):
+        weapon = getattr(unit, 'equipped_weapon', None)
+        if weapon:
+            if profiler is None:
+                weapon.apply_effects(context)
+            else:
+                profiler.time_effects("weapon", weapon, context)
+        if hasattr(unit, 'equipped_skills'):
+            for skill in unit.equipped_skills.values():
+                if skill:
+                    if profiler is None:
+                        skill.apply_effects(context)
+                    else:
+                        profiler.time_effects("skill", skill, context)
+
 def calculate_damage(attacker, defender, weapon_type=None, terrain=None, adaptive_damage=False):
     """
     Calculate FEH battle damage following official structure.
     """
     context = SimulationContext(attacker, defender)
 
-    # Apply weapon effects (attacker)
-    if hasattr(attacker, 'equipped_weapon') and attacker.equipped_weapon:
-        attacker.equipped_weapon.apply_effects(context)
-    # Apply skill effects (attacker)
-    if hasattr(attacker, 'equipped_skills'):
-        for skill in attacker.equipped_skills.values():
-            if skill:
-                skill.apply_effects(context)
-    # Apply weapon effects (defender)
-    if hasattr(defender, 'equipped_weapon') and defender.equipped_weapon:
-        defender.equipped_weapon.apply_effects(context)
-    # Apply skill effects (defender)
-    if hasattr(defender, 'equipped_skills'):
-        for skill in defender.equipped_skills.values():
-            if skill:
-                skill.apply_effects(context)
-
+    _apply_effects(attacker, defender, context, active_profiler())
 
     # 1. Visible stats
     atk = attacker.atk
@@ -114,6 +124,95 @@ def calculate_damage(attacker, defender, weapon_type=None, terrain=None, adaptiv
     # For demonstration, just return context.damage and context.log
     return context.damage, context.log
 
+# --- Memoization ---
+def _effects_key(obj):
+    return tuple(getattr(obj, 'effects', None) or ())
+
+def _weapon_key(unit):
+    weapon = getattr(unit, 'equipped_weapon', None)
+    if not weapon:
+        return None
+    return (weapon.might, getattr(weapon, 'color', None), weapon.weapon_type, _effects_key(weapon))
+
+def _skills_key(unit):
+    skills = getattr(unit, 'equipped_skills', None)
+    if not skills:
+        return ()
+    return tuple(sorted(
+        (slot, getattr(skill, 'name', None), _effects_key(skill))
+        for slot, skill in skills.items() if skill
+    ))
+
+def damage_cache_key(attacker, defender, weapon_type=None, terrain=None, adaptive_damage=False):
+    """
+    Canonical hashable key for one calculate_damage call.
+
+    Holds every input calculate_damage reads: the attacker's Atk, weapon
+    (might, color, type), special and skills, the defender's Def/Res, weapon
+    color, skills and tile, plus the call arguments. Weapon and skill
+    `effects` are part of the key (by identity), so units with different
+    effect callbacks never share an entry.
+    """
+    return (
+        attacker.atk, _weapon_key(attacker), _skills_key(attacker), getattr(attacker, 'special', None),
+        defender.defense, defender.res, _weapon_key(defender), _skills_key(defender),
+        bool(getattr(defender, 'on_defensive_tile', False)),
+        weapon_type, terrain, bool(adaptive_damage),
+    )
+
+class DamageCache:
+    """
+    Bounded LRU memo for calculate_damage.
+
+    Pass one to simulate_battle as options["damage_cache"], or call
+    cache.calculate(...) with calculate_damage's signature. Call clear()
+    when catalog data changes to release stale entries.
+    """
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def calculate(self, attacker, defender, weapon_type=None, terrain=None, adaptive_damage=False):
+        key = damage_cache_key(attacker, defender, weapon_type, terrain, adaptive_damage)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], list(entry[1])
+        damage, log = calculate_damage(attacker, defender, weapon_type=weapon_type, terrain=terrain, adaptive_damage=adaptive_damage)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (damage, tuple(log))
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return damage, log
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __getstate__(self):
+        # Locks can't be pickled; process-pool workers each get their own.
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
 # Helper functions (to be implemented)
 def apply_advantage_mod(atk, mod):
     if mod > 0:
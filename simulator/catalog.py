@@ -0,0 +1,172 @@
+"""
+catalog.py
+----------
+In-memory copy of the catalog tables (units, weapons, skills) with lookup
+indexes by name and by type.
+
+A Catalog is loaded once from FEHDatabase and then treated as read-only.
+It remembers the catalog_version counters it was loaded at; reload()
+compares them with the database's current ones and re-reads only the
+tables that changed, whichever process wrote them. Rows are the same dicts
+FEHDatabase returns. Name lookups ignore case, matching the UNIQUE NOCASE
+name indexes.
+"""
+
+from collections import defaultdict
+
+from .skills import Skill
+from .units import Unit
+from .weapon import Weapon
+
+
+def weapon_from_row(row):
+    """Weapon object for a weapons table row."""
+    return Weapon(
+        name=row['name'],
+        might=row['might'],
+        color=row.get('color'),
+        range=row.get('range', 1),
+        weapon_type=row.get('weapon_type')
+    )
+
+
+def skill_from_row(row):
+    """Skill object for a skills table row."""
+    return Skill(
+        name=row['name'],
+        skill_type=row.get('skill_type'),
+        description=row.get('description') or "",
+        effect_json=row.get('effect_json')
+    )
+
+
+def unit_from_row(row, weapon_rows=None, skill_rows=None):
+    """
+    Fresh Unit for a units table row, holding `weapon_rows` (the first one
+    equipped) and `skill_rows` if given.
+    """
+    unit = Unit(
+        name=row['name'],
+        hp=row['hp'],
+        atk=row['atk'],
+        spd=row['spd'],
+        defense=row['defense'],
+        res=row['res'],
+        superboons=row.get('superboons', []),
+        superbanes=row.get('superbanes', []),
+        exclusive_skills=row.get('exclusive_skills', []),
+        image_url=row.get('image_url', ''),
+        unit_type=row.get('unit_type', ''),
+        weapon_type=row.get('weapon_type', ''),
+        weapons=[weapon_from_row(w) for w in weapon_rows or ()],
+        learned_skills=[skill_from_row(s) for s in skill_rows or ()]
+    )
+    if unit.weapons:
+        unit.equipped_weapon = unit.weapons[0]
+    return unit
+
+
+def _by_name(rows):
+    return {row['name'].lower(): row for row in rows}
+
+
+def _by_key(rows, key):
+    groups = defaultdict(list)
+    for row in rows:
+        groups[row.get(key)].append(row)
+    return dict(groups)
+
+
+class Catalog:
+    """
+    Attributes:
+        units, weapons, skills (list[dict]): Table rows, sorted by name.
+        unit_weapons, unit_skills (dict[int, list[dict]]): Unit id -> linked
+            weapon / skill rows, in link order.
+        equipped (dict[int, dict]): Unit id -> equipped (first linked) weapon row.
+        units_by_weapon_type, units_by_unit_type (dict[str, list[dict]])
+        weapons_by_type (dict[str, list[dict]]): Keyed by weapon_type.
+        skills_by_type (dict[str, list[dict]]): Keyed by skill_type.
+        versions (dict[str, int]): catalog_version counters at load time.
+    """
+    def __init__(self, units, weapons, skills, unit_weapons=None, unit_skills=None, versions=None):
+        self.versions = versions or {}
+        self.units = units
+        self.weapons = weapons
+        self.skills = skills
+        self.unit_weapons = unit_weapons or {}
+        self.unit_skills = unit_skills or {}
+        self.equipped = {unit_id: rows[0] for unit_id, rows in self.unit_weapons.items() if rows}
+        self._units = _by_name(units)
+        self._weapons = _by_name(weapons)
+        self._skills = _by_name(skills)
+        self.units_by_weapon_type = _by_key(units, 'weapon_type')
+        self.units_by_unit_type = _by_key(units, 'unit_type')
+        self.weapons_by_type = _by_key(weapons, 'weapon_type')
+        self.skills_by_type = _by_key(skills, 'skill_type')
+        self._values = {}
+
+    @classmethod
+    def load(cls, db, versions=None):
+        """Read every catalog table from an open FEHDatabase."""
+        # Versions first: a write racing the reads makes the next check reload.
+        versions = versions if versions is not None else db.catalog_versions()
+        return cls(db.get_units(), db.get_weapons(), db.get_skills(), db.get_unit_weapons(), db.get_unit_skills(),
+                   versions)
+
+    def changed_tables(self, versions):
+        return {table for table, version in versions.items() if self.versions.get(table) != version}
+
+    def reload(self, db, versions=None):
+        """
+        Catalog matching the database's current `versions`, reusing the rows
+        of every table that hasn't changed. Returns self if nothing changed.
+        """
+        versions = versions if versions is not None else db.catalog_versions()
+        changed = self.changed_tables(versions)
+        if not changed:
+            return self
+        return Catalog(
+            db.get_units() if 'units' in changed else self.units,
+            db.get_weapons() if 'weapons' in changed else self.weapons,
+            db.get_skills() if 'skills' in changed else self.skills,
+            db.get_unit_weapons() if changed & {'units', 'weapons', 'unit_weapons'} else self.unit_weapons,
+            db.get_unit_skills() if changed & {'units', 'skills', 'unit_skills'} else self.unit_skills,
+            versions,
+        )
+
+    def values(self, table, column):
+        """Sorted distinct non-empty values of one column, e.g. values('weapons', 'color')."""
+        key = (table, column)
+        if key not in self._values:
+            self._values[key] = sorted({row[column] for row in getattr(self, table) if row.get(column)}, key=str.lower)
+        return self._values[key]
+
+    def unit(self, name):
+        return self._units.get(name.lower()) if name else None
+
+    def weapon(self, name):
+        return self._weapons.get(name.lower()) if name else None
+
+    def skill(self, name):
+        return self._skills.get(name.lower()) if name else None
+
+    def _build(self, row):
+        return unit_from_row(row, self.unit_weapons.get(row['id']), self.unit_skills.get(row['id']))
+
+    def build_unit(self, name):
+        """Fresh Unit (safe to modify) for a unit name, or None."""
+        row = self.unit(name)
+        return self._build(row) if row else None
+
+    def build_units(self):
+        """Fresh Units for the whole roster, in name order."""
+        return [self._build(row) for row in self.units]
+
+
+__all__ = [
+    'Catalog',
+    'skill_from_row',
+    'unit_from_row',
+    'weapon_from_row',
+]
@@ -1,32 +1,85 @@
+import re
 import sqlite3
+import threading
 from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+from .migrations import FILTER_COLUMNS, migrate
 
 DB_PATH = Path(__file__).parent.parent / "data" / "feh.db"
-SCHEMA_PATH = Path(__file__).parent.parent / "data" / "schema.sql"
+
+# PRAGMAs that take a keyword and ones that take a number; anything else is rejected.
+_KEYWORD_PRAGMAS = {"journal_mode", "synchronous", "temp_store", "locking_mode"}
+_NUMERIC_PRAGMAS = {"mmap_size", "cache_size", "busy_timeout", "wal_autocheckpoint"}
+# journal_mode changes the database file, which a read-only connection can't do.
+_WRITE_PRAGMAS = {"journal_mode"}
+
+def apply_pragmas(conn, pragmas, readonly=False):
+    """Set each PRAGMA in `pragmas` (None values are skipped) on `conn`."""
+    for name, value in (pragmas or {}).items():
+        if value is None or (readonly and name in _WRITE_PRAGMAS):
+            continue
+        if name in _NUMERIC_PRAGMAS:
+            value = int(value)
+        elif name not in _KEYWORD_PRAGMAS or not str(value).isalpha():
+            raise ValueError(f"Unsupported pragma {name}={value!r}")
+        conn.execute(f"PRAGMA {name} = {value}").fetchall()
+
+class Page(NamedTuple):
+    """
+    One page of a keyset-paginated list, in name order.
+
+    Attributes:
+        rows (list[dict]): Rows on this page.
+        after (str): Cursor for the next page (last name here), None on the last page.
+        before (str): Cursor for the previous page (first name here), None on the first page.
+    """
+    rows: List[dict]
+    after: Optional[str] = None
+    before: Optional[str] = None
+
+def _fts_query(text):
+    """FTS5 query matching every word of `text` as a prefix, or None if it has no words."""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{word}"*' for word in words) or None
 
 class FEHDatabase:
     def delete_unit(self, name):
-        self.conn.execute("DELETE FROM units WHERE name = ?", (name,))
+        self.conn.execute("DELETE FROM units WHERE name = ? COLLATE NOCASE", (name,))
         self.conn.commit()
 
     def delete_weapon(self, name):
-        self.conn.execute("DELETE FROM weapons WHERE name = ?", (name,))
+        self.conn.execute("DELETE FROM weapons WHERE name = ? COLLATE NOCASE", (name,))
         self.conn.commit()
 
     def delete_skill(self, name):
-        self.conn.execute("DELETE FROM skills WHERE name = ?", (name,))
+        self.conn.execute("DELETE FROM skills WHERE name = ? COLLATE NOCASE", (name,))
         self.conn.commit()
-    def __init__(self, db_path=DB_PATH):
+    def __init__(self, db_path=DB_PATH, check_same_thread=True, pragmas=None, readonly=False):
+        """
+        Args:
+            db_path (str): SQLite database file.
+            check_same_thread (bool): Passed to sqlite3.connect; pooled
+                connections turn it off because they move between threads
+                (one thread at a time).
+            pragmas (dict): PRAGMA name -> value to set on the connection,
+                e.g. {"journal_mode": "WAL", "busy_timeout": 5000}.
+            readonly (bool): Open with mode=ro. Read-only connections never
+                migrate; open the database read-write once first.
+        """
         self.db_path = str(db_path)
-        self.conn = sqlite3.connect(self.db_path)
+        self.readonly = readonly
+        if readonly:
+            uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=check_same_thread)
+        else:
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread)
         self.conn.row_factory = sqlite3.Row
-        self._init_schema()
-
-    def _init_schema(self):
-        with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-            schema = f.read()
-        self.conn.executescript(schema)
-        self.conn.commit()
+        self._pool = None
+        self._search_tables = {}
+        apply_pragmas(self.conn, pragmas, readonly)
+        if not readonly:
+            migrate(self.conn)
 
     def get_units(self):
         cur = self.conn.execute("SELECT * FROM units ORDER BY name COLLATE NOCASE ASC")
@@ -86,7 +139,7 @@ class FEHDatabase:
                 unit_type = ?,
                 weapon_type = ?,
                 image_url = ?
-            WHERE name = ?
+            WHERE name = ? COLLATE NOCASE
             """,
             (
                 unit["name"],
@@ -108,8 +161,9 @@ class FEHDatabase:
         return [dict(row) for row in cur.fetchall()]
 
     def get_weapon_by_name(self, name):
-        cur = self.conn.execute('SELECT * FROM weapons WHERE name = ?', (name,))
-        return dict(cur.fetchone()) if cur.fetchone() else None
+        cur = self.conn.execute('SELECT * FROM weapons WHERE name = ? COLLATE NOCASE', (name,))
+        row = cur.fetchone()
+        return dict(row) if row else None
 
     def update_weapon(self, old_name, weapon):
         self.conn.execute(
@@ -121,7 +175,7 @@ class FEHDatabase:
                 range = ?,
                 weapon_type = ?,
                 effective_against = ?
-            WHERE name = ?
+            WHERE name = ? COLLATE NOCASE
             """,
             (
                 weapon["name"],
@@ -135,6 +189,113 @@ class FEHDatabase:
         )
         self.conn.commit()
 
+    def _linked_rows(self, link_table, table, column):
+        # Scans the covering idx_<link_table>_unit index and looks each row up
+        # by primary key: one query, linear in the number of links.
+        cur = self.conn.execute(
+            f"""
+            SELECT l.unit_id, t.* FROM {link_table} l
+            JOIN {table} t ON t.id = l.{column}
+            ORDER BY l.unit_id, l.rowid
+            """
+        )
+        links = {}
+        for row in cur.fetchall():
+            row = dict(row)
+            links.setdefault(row.pop("unit_id"), []).append(row)
+        return links
+
+    def get_unit_weapons(self):
+        """Map unit id -> its linked weapon rows, in link order."""
+        return self._linked_rows("unit_weapons", "weapons", "weapon_id")
+
+    def get_unit_skills(self):
+        """Map unit id -> its linked skill rows, in link order."""
+        return self._linked_rows("unit_skills", "skills", "skill_id")
+
+    def load_units(self):
+        """
+        Every unit as a Unit holding its linked weapons (the first one
+        equipped) and skills, in name order.
+        """
+        from .catalog import unit_from_row
+
+        weapons = self.get_unit_weapons()
+        skills = self.get_unit_skills()
+        return [unit_from_row(row, weapons.get(row["id"]), skills.get(row["id"])) for row in self.get_units()]
+
+    def catalog_versions(self):
+        """
+        {table: version} for every catalog table. A table's version moves
+        whenever any connection, in any process, writes one of its rows.
+        """
+        return dict(self.conn.execute("SELECT table_name, version FROM catalog_version").fetchall())
+
+    def _has_search_index(self, table):
+        if table not in self._search_tables:
+            self._search_tables[table] = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (f"{table}_fts",)
+            ).fetchone() is not None
+        return self._search_tables[table]
+
+    def page(self, table, limit, search=None, after=None, before=None, **filters):
+        """
+        One page of units, weapons or skills in name order.
+
+        Pages are found by keyset (name > `after` or name < `before`) on
+        the NOCASE name index rather than by OFFSET, so every page costs
+        the same however deep it is.
+
+        Args:
+            table (str): "units", "weapons" or "skills".
+            limit (int): Rows per page (the app's PAGE_SIZE setting).
+            search (str): Words matched by prefix against name, description
+                and types through <table>_fts (or names only, with LIKE,
+                when SQLite has no FTS5).
+            after, before (str): Page cursors from a previous Page.
+            **filters: Exact matches on the table's FILTER_COLUMNS
+                (unit_type / weapon_type / color / skill_type); empty values
+                are ignored.
+
+        Raises:
+            ValueError: For an unknown table or filter.
+        """
+        if table not in FILTER_COLUMNS:
+            raise ValueError(f"Unknown catalog table {table!r}")
+        unknown = set(filters) - set(FILTER_COLUMNS[table])
+        if unknown:
+            raise ValueError(f"Can't filter {table} by {', '.join(sorted(unknown))}")
+        where, params = [], []
+        for column in FILTER_COLUMNS[table]:
+            if filters.get(column):
+                where.append(f"{column} = ?")
+                params.append(filters[column])
+        query = _fts_query(search)
+        if query and self._has_search_index(table):
+            where.append(f"id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)")
+            params.append(query)
+        elif query:
+            where.append("name LIKE ? ESCAPE '\\'")
+            params.append("%" + re.sub(r"([%_\\])", r"\\\1", search.strip()) + "%")
+        backward = before is not None
+        if backward:
+            where.append("name < ? COLLATE NOCASE")
+            params.append(before)
+        elif after is not None:
+            where.append("name > ? COLLATE NOCASE")
+            params.append(after)
+        sql = f"SELECT * FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY name COLLATE NOCASE {'DESC' if backward else 'ASC'} LIMIT ?"
+        rows = [dict(row) for row in self.conn.execute(sql, (*params, limit + 1))]
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+            return Page(rows, rows[-1]["name"] if rows else None, rows[0]["name"] if more and rows else None)
+        return Page(rows, rows[-1]["name"] if more else None, rows[0]["name"] if after is not None and rows else None)
+
     def get_weapon_types(self):
         # List of all weapon types for dropdown
         return [
@@ -146,22 +307,84 @@ class FEHDatabase:
         ]
 
     def close(self):
-        self.conn.close()
-
-def get_all_weapons():
-    db = FEHDatabase()
-    weapons = db.get_all_weapons()
-    db.close()
-    return weapons
-
-def get_weapon_by_name(name):
-    db = FEHDatabase()
-    weapon = db.get_weapon_by_name(name)
-    db.close()
-    return weapon
-
-def update_weapon(old_name, new_name, might, color, range_, weapon_type, effective_against):
-    db = FEHDatabase()
+        """Close the connection, or hand it back if it came from a ConnectionPool."""
+        if self._pool is not None:
+            self._pool.release(self)
+        else:
+            self.conn.close()
+
+
+class ConnectionPool:
+    """
+    Small pool of FEHDatabase connections to one database file, all opened
+    with the same pragmas and read-only flag.
+
+    acquire() hands out an idle connection or opens a new one; release()
+    (or db.close()) rolls back anything left uncommitted and keeps up to
+    `size` idle connections for reuse, closing the rest. Connections are
+    shared across threads, but each is used by one thread at a time.
+    """
+    def __init__(self, db_path=DB_PATH, size=4, pragmas=None, readonly=False):
+        self.db_path = str(db_path)
+        self.size = size
+        self.pragmas = pragmas
+        self.readonly = readonly
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            db = self._idle.pop() if self._idle else None
+        if db is None:
+            db = FEHDatabase(self.db_path, check_same_thread=False, pragmas=self.pragmas, readonly=self.readonly)
+            db._pool = self
+        return db
+
+    def release(self, db):
+        if db.conn.in_transaction:
+            db.conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(db)
+                return
+        db.conn.close()
+
+    def close(self):
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for db in idle:
+            db.conn.close()
+
+
+# One connection per thread and database file for the module-level helpers.
+_thread_local = threading.local()
+
+def shared_database(db_path=DB_PATH):
+    """This thread's reusable FEHDatabase for `db_path`; don't close it."""
+    databases = getattr(_thread_local, "databases", None)
+    if databases is None:
+        databases = _thread_local.databases = {}
+    key = str(db_path)
+    db = databases.get(key)
+    if db is None:
+        db = databases[key] = FEHDatabase(key)
+    return db
+
+def close_shared_databases():
+    """Close the connections shared_database() opened in this thread."""
+    for db in getattr(_thread_local, "databases", {}).values():
+        db.close()
+    _thread_local.databases = {}
+
+# Helpers below run on `db` if given, else on this thread's shared connection.
+def get_all_weapons(db=None):
+    return (db or shared_database()).get_all_weapons()
+
+def get_weapon_by_name(name, db=None):
+    return (db or shared_database()).get_weapon_by_name(name)
+
+def update_weapon(old_name, new_name, might, color, range_, weapon_type, effective_against, db=None):
     weapon = {
         "name": new_name,
         "might": might,
@@ -170,16 +393,10 @@ def update_weapon(old_name, new_name, might, color, range_, weapon_type, effecti
         "weapon_type": weapon_type,
         "effective_against": effective_against
     }
-    db.update_weapon(old_name, weapon)
-    db.close()
-
-def get_weapon_types():
-    db = FEHDatabase()
-    types = db.get_weapon_types()
-    db.close()
-    return types
-
-def delete_weapon(name):
-    db = FEHDatabase()
-    db.delete_weapon(name)
-    db.close()
+    (db or shared_database()).update_weapon(old_name, weapon)
+
+def get_weapon_types(db=None):
+    return (db or shared_database()).get_weapon_types()
+
+def delete_weapon(name, db=None):
+    (db or shared_database()).delete_weapon(name)
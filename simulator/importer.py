@@ -0,0 +1,322 @@
+"""
+importer.py
+-----------
+Bulk catalog import from JSON, JSON Lines or CSV files.
+
+Records are streamed from the file and upserted by name (case-insensitive,
+like the UNIQUE NOCASE name indexes) with executemany, one transaction per
+chunk, instead of one INSERT and one commit per row. Weapons and skills
+load before units so the units' "weapons" and "skills" name lists can be
+resolved into the unit_weapons / unit_skills link tables.
+
+Accepted inputs:
+    *.json   an array of records (parsed incrementally), or an object
+             {"units": [...], "weapons": [...], "skills": [...]}
+    *.jsonl  one record per line; each needs a "kind" unless --kind is given
+    *.csv    one record per row; list columns (weapons, skills, superboons,
+             ...) separate names with ";"
+
+Kind is taken from --kind, a record's "kind" key, or the file name
+(units.csv, weapons.json, ...).
+
+Usage:
+    python -m simulator.importer data/weapons.csv data/skills.jsonl data/units.json
+    python -m simulator.importer --db path/to/feh.db --kind units heroes.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .data_loader import DB_PATH, FEHDatabase
+
+KINDS = ("weapons", "skills", "units")  # import order: links need weapons and skills first
+DEFAULT_CHUNK_SIZE = 1000
+
+UNIT_COLUMNS = ("name", "hp", "atk", "spd", "defense", "res", "unit_type", "weapon_type", "image_url")
+WEAPON_COLUMNS = ("name", "might", "color", "range", "weapon_type", "effective_against", "image_url")
+SKILL_COLUMNS = ("name", "description", "skill_type", "effect_json")
+COLUMNS = {"units": UNIT_COLUMNS, "weapons": WEAPON_COLUMNS, "skills": SKILL_COLUMNS}
+REQUIRED = {"units": ("hp", "atk", "spd", "defense", "res"), "weapons": ("might",), "skills": ()}
+INTEGER_COLUMNS = {"hp", "atk", "spd", "defense", "res", "might", "range"}
+LIST_SEPARATOR = ";"
+
+
+@dataclass
+class ImportReport:
+    """
+    Attributes:
+        units, weapons, skills (int): Rows inserted or updated.
+        unit_weapons, unit_skills (int): Links written.
+        unresolved (list[tuple[str, str]]): (unit, weapon or skill name)
+            links that named something not in the catalog.
+    """
+    units: int = 0
+    weapons: int = 0
+    skills: int = 0
+    unit_weapons: int = 0
+    unit_skills: int = 0
+    unresolved: List[Tuple[str, str]] = field(default_factory=list)
+
+    def summary(self):
+        text = (f"{self.units} units, {self.weapons} weapons, {self.skills} skills, "
+                f"{self.unit_weapons} weapon links, {self.unit_skills} skill links")
+        if self.unresolved:
+            text += f", {len(self.unresolved)} unresolved links"
+        return text
+
+
+# --- Reading ---
+def _iter_json_array(f, chunk_size=1 << 16) -> Iterator[dict]:
+    """Yield the objects of a top-level JSON array without loading the whole file."""
+    decoder = json.JSONDecoder()
+    buf = f.read(chunk_size).lstrip()
+    if not buf.startswith("["):
+        raise ValueError("Expected a JSON array")
+    buf = buf[1:]
+    while True:
+        buf = buf.lstrip()
+        if buf.startswith(","):
+            buf = buf[1:].lstrip()
+        if buf.startswith("]"):
+            return
+        try:
+            record, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            more = f.read(chunk_size)
+            if not more:
+                raise
+            buf += more
+            continue
+        yield record
+        buf = buf[end:]
+
+
+def _split_list(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+    return list(value)
+
+
+def read_records(path, kind=None) -> Iterator[Tuple[str, dict]]:
+    """
+    Stream (kind, record) pairs from a JSON, JSON Lines or CSV file.
+
+    Raises:
+        ValueError: If a record's kind can't be determined.
+    """
+    path = Path(path)
+    default_kind = kind or (path.stem.lower() if path.stem.lower() in KINDS else None)
+
+    def tagged(records):
+        for number, record in enumerate(records, 1):
+            record_kind = kind or record.get("kind") or default_kind
+            if record_kind not in KINDS:
+                raise ValueError(f"{path}: record {number} has no kind (one of {', '.join(KINDS)})")
+            yield record_kind, record
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        suffix = path.suffix.lower()
+        if suffix == ".csv":
+            yield from tagged(csv.DictReader(f))
+        elif suffix in (".jsonl", ".ndjson"):
+            yield from tagged(json.loads(line) for line in f if line.strip())
+        else:
+            start = f.read(1)
+            while start.isspace():
+                start = f.read(1)
+            f.seek(0)
+            if start == "[":
+                yield from tagged(_iter_json_array(f))
+            else:
+                data = json.load(f)
+                for record_kind in KINDS:
+                    for record in data.get(record_kind, []):
+                        yield record_kind, record
+
+
+def _row(kind, record, number):
+    name = (record.get("name") or "").strip()
+    if not name:
+        raise ValueError(f"{kind} record {number} has no name")
+    row = []
+    for column in COLUMNS[kind]:
+        value = name if column == "name" else record.get(column)
+        if value == "":
+            value = None
+        if column in REQUIRED[kind] and value is None:
+            raise ValueError(f"{kind} record '{name}' is missing {column}")
+        if column in INTEGER_COLUMNS and value is not None:
+            value = int(value)
+        elif column == "effective_against" and isinstance(value, list):
+            value = ",".join(value)
+        elif column == "effect_json" and isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        row.append(value)
+    return tuple(row)
+
+
+# --- Writing ---
+def _upsert_sql(table, columns):
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT(name COLLATE NOCASE) DO UPDATE SET {updates}")
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _ids(conn, table):
+    return {name.lower(): id_ for id_, name in conn.execute(f"SELECT id, name FROM {table}")}
+
+
+class _Importer:
+    def __init__(self, db, chunk_size):
+        self.conn = db.conn
+        self.chunk_size = chunk_size
+        self.report = ImportReport()
+        # lower-cased unit name -> (name, weapon names or None, skill names or None)
+        self.links = {}
+
+    def write(self, kind, records):
+        sql = _upsert_sql(kind, COLUMNS[kind])
+        numbered = enumerate(records, 1)
+        for chunk in _chunks(numbered, self.chunk_size):
+            rows = []
+            for number, record in chunk:
+                row = _row(kind, record, number)
+                rows.append(row)
+                if kind == "units":
+                    weapons = _split_list(record.get("weapons", [record["weapon"]] if record.get("weapon") else None))
+                    self.links[row[0].lower()] = (row[0], weapons, _split_list(record.get("skills")))
+            with self.conn:
+                self.conn.executemany(sql, rows)
+            setattr(self.report, kind, getattr(self.report, kind) + len(rows))
+
+    def write_links(self):
+        if not self.links:
+            return
+        unit_ids = _ids(self.conn, "units")
+        weapon_ids = _ids(self.conn, "weapons")
+        skill_ids = _ids(self.conn, "skills")
+        for chunk in _chunks(self.links.values(), self.chunk_size):
+            replace = {"unit_weapons": [], "unit_skills": []}
+            rows = {"unit_weapons": [], "unit_skills": []}
+            for unit_name, weapons, skills in chunk:
+                unit_id = unit_ids[unit_name.lower()]
+                for table, names, ids in (("unit_weapons", weapons, weapon_ids), ("unit_skills", skills, skill_ids)):
+                    if names is None:
+                        continue  # record didn't mention this link list; keep existing links
+                    replace[table].append((unit_id,))
+                    seen = set()
+                    for link_name in names:
+                        if link_name.lower() in seen:
+                            continue  # names match case-insensitively; link each once
+                        seen.add(link_name.lower())
+                        link_id = ids.get(link_name.lower())
+                        if link_id is None:
+                            self.report.unresolved.append((unit_name, link_name))
+                        else:
+                            rows[table].append((unit_id, link_id))
+            with self.conn:
+                self.conn.executemany("DELETE FROM unit_weapons WHERE unit_id = ?", replace["unit_weapons"])
+                self.conn.executemany("DELETE FROM unit_skills WHERE unit_id = ?", replace["unit_skills"])
+                self.conn.executemany("INSERT INTO unit_weapons (unit_id, weapon_id) VALUES (?, ?)", rows["unit_weapons"])
+                self.conn.executemany("INSERT INTO unit_skills (unit_id, skill_id) VALUES (?, ?)", rows["unit_skills"])
+            self.report.unit_weapons += len(rows["unit_weapons"])
+            self.report.unit_skills += len(rows["unit_skills"])
+
+
+def import_records(db, records: Dict[str, Iterable[dict]], chunk_size=DEFAULT_CHUNK_SIZE) -> ImportReport:
+    """
+    Upsert records into an open FEHDatabase.
+
+    Args:
+        db (FEHDatabase): Target database.
+        records (dict): {"weapons"|"skills"|"units": iterable of dicts}.
+            Unit records may name their weapons ("weapons" list or
+            "weapon") and skills ("skills" list); those replace the unit's
+            existing links.
+        chunk_size (int): Rows per executemany / transaction.
+
+    Returns:
+        ImportReport
+    """
+    importer = _Importer(db, chunk_size)
+    for kind in KINDS:
+        if kind in records:
+            importer.write(kind, records[kind])
+    importer.write_links()
+    return importer.report
+
+
+def import_files(db, paths, kind=None, chunk_size=DEFAULT_CHUNK_SIZE) -> ImportReport:
+    """
+    Import catalog files into an open FEHDatabase, weapons and skills first.
+
+    Files whose kind is known up front (--kind or a units/weapons/skills
+    file name) stream straight into the database; any other file is read
+    once per kind and filtered by each record's "kind".
+    """
+    paths = [Path(p) for p in paths]
+
+    def file_kind(path):
+        return kind or (path.stem.lower() if path.stem.lower() in KINDS else None)
+
+    def stream(record_kind):
+        for path in paths:
+            if file_kind(path) not in (record_kind, None):
+                continue
+            for k, record in read_records(path, kind):
+                if k == record_kind:
+                    yield record
+
+    return import_records(db, {k: stream(k) for k in KINDS}, chunk_size)
+
+
+__all__ = [
+    'ImportReport',
+    'read_records',
+    'import_records',
+    'import_files',
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import units, weapons and skills into the catalog.")
+    parser.add_argument("files", nargs="+", help="JSON, JSON Lines or CSV files")
+    parser.add_argument("--db", default=str(DB_PATH), help="database file (default: data/feh.db)")
+    parser.add_argument("--kind", choices=KINDS, help="kind of every record, if files don't say")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="rows per transaction")
+    args = parser.parse_args(argv)
+
+    db = FEHDatabase(args.db)
+    try:
+        report = import_files(db, args.files, kind=args.kind, chunk_size=args.chunk_size)
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    print(f"Imported {report.summary()}.")
+    for unit, name in report.unresolved:
+        print(f"  unresolved: {unit} -> {name}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+loadout.py
+----------
+Loadout optimizer: searches weapon and skill choices for one unit to win the
+most matchups against a target roster.
+
+Trying every combination of weapon x special x A x B x C x seal x X x assist
+is out of reach even for a small catalog, so the search fills one slot at a
+time with a beam: every build in the beam is extended with each option for
+the next slot, all candidates are evaluated against the roster in one
+run_sweep batch (optionally over a process pool shared by every slot),
+builds whose per-foe outcomes are dominated by another candidate are
+dropped, and the best `beam_width` builds go on to the next slot.
+"""
+
+import dataclasses
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+from .skills import Skill
+from .sweep import SweepCatalog, product_matchups, run_sweep
+from .units import Unit
+
+# Slots in the order the beam fills them, after the weapon. Unlike the
+# simulator form (web.routes.SKILL_SLOTS), assist comes last.
+SKILL_SLOTS = ('special', 'a', 'b', 'c', 'seal', 'x', 'assist')
+# Skill.skill_type -> slot
+SLOT_FOR_TYPE = {'special': 'special', 'a': 'a', 'b': 'b', 'c': 'c', 'seal': 'seal', 'x': 'x', 'assist': 'assist'}
+
+
+@dataclass(frozen=True)
+class Build:
+    """One loadout: a weapon (None keeps the unit's own) plus (slot, Skill) pairs."""
+    weapon: Any = None
+    skills: Tuple[Tuple[str, Skill], ...] = ()
+
+    def with_slot(self, slot, choice):
+        if slot == 'weapon':
+            return dataclasses.replace(self, weapon=choice)
+        skills = tuple((s, k) for s, k in self.skills if s != slot)
+        if choice is not None:
+            skills += ((slot, choice),)
+        return dataclasses.replace(self, skills=skills)
+
+    def describe(self):
+        parts = {'weapon': self.weapon.name if self.weapon else None}
+        parts.update((slot, skill.name) for slot, skill in self.skills)
+        return parts
+
+
+@dataclass
+class ScoredBuild:
+    build: Build
+    outcome: np.ndarray  # per foe: 1 win, 0 draw, -1 loss
+    margin: int  # unit HP left minus foe HP left, summed over foes
+
+    @property
+    def wins(self):
+        return int((self.outcome == 1).sum())
+
+    @property
+    def losses(self):
+        return int((self.outcome == -1).sum())
+
+    def score(self):
+        return (self.wins, -self.losses, self.margin)
+
+
+@dataclass
+class LoadoutResult:
+    """
+    Attributes:
+        best (ScoredBuild): Highest scoring build.
+        ranking (list[ScoredBuild]): Final beam, best first.
+        evaluated (int): Candidate builds simulated.
+    """
+    best: ScoredBuild
+    ranking: List[ScoredBuild]
+    evaluated: int
+
+
+def equip_build(unit, build):
+    """Snapshot of `unit` fighting with `build`."""
+    snapshot = unit.snapshot() if isinstance(unit, Unit) else unit
+    skills = dict(build.skills)
+    special = skills.pop('special', None)
+    return dataclasses.replace(
+        snapshot,
+        equipped_weapon=build.weapon if build.weapon is not None else snapshot.equipped_weapon,
+        special=special.name if special else snapshot.special,
+        skills=tuple(skills.items()),
+    )
+
+
+def slot_options(unit, weapons=(), skills=()):
+    """
+    Choices per slot for `unit`: weapons matching its weapon type and
+    skills it can use (Skill.is_usable_by), grouped by slot.
+    """
+    weapon_type = getattr(unit, 'weapon_type', '')
+    options = {'weapon': [w for w in weapons if not weapon_type or w.weapon_type == weapon_type]}
+    movement = getattr(unit, 'unit_type', '')
+    for skill in skills:
+        slot = SLOT_FOR_TYPE.get((skill.skill_type or '').lower())
+        if slot and skill.is_usable_by(movement, weapon_type):
+            options.setdefault(slot, []).append(skill)
+    return options
+
+
+def _drop_dominated(scored):
+    """Remove builds whose outcome is <= another build's against every foe and < against one."""
+    if not scored:
+        return scored
+    outcomes = np.stack([s.outcome for s in scored])
+    keep = []
+    for candidate in scored:
+        at_least = (outcomes >= candidate.outcome).all(axis=1)
+        better = (outcomes > candidate.outcome).any(axis=1)
+        if not (at_least & better).any():
+            keep.append(candidate)
+    return keep
+
+
+def _evaluate(unit, builds, roster, initiating, options, processes, executor=None):
+    units = [equip_build(unit, b) for b in builds]
+    catalog = SweepCatalog(units + list(roster))
+    foes = range(len(units), len(units) + len(roster))
+    if initiating:
+        matchups = product_matchups(range(len(units)), foes)
+    else:
+        matchups = product_matchups(foes, range(len(units)))
+    results = run_sweep(catalog, matchups, options=dict(options or {}, lean=True), processes=processes,
+                        executor=executor)
+
+    scored = []
+    m = len(roster)
+    for i, build in enumerate(builds):
+        if initiating:
+            chunk = results[i * m:(i + 1) * m]
+            unit_hp = np.array([r.attacker_hp for r in chunk])
+            foe_hp = np.array([r.defender_hp for r in chunk])
+        else:
+            chunk = results[i::len(builds)]
+            unit_hp = np.array([r.defender_hp for r in chunk])
+            foe_hp = np.array([r.attacker_hp for r in chunk])
+        outcome = ((foe_hp == 0) & (unit_hp > 0)).astype(np.int8) - ((unit_hp == 0) & (foe_hp > 0)).astype(np.int8)
+        scored.append(ScoredBuild(build, outcome, int(unit_hp.sum() - foe_hp.sum())))
+    return scored
+
+
+def optimize_loadout(unit, roster, weapons=(), skills=(), beam_width=8, initiating=True,
+                     options=None, processes=1) -> Optional[LoadoutResult]:
+    """
+    Beam search over weapon and skill slots for the build that beats the
+    most units in `roster`.
+
+    Args:
+        unit (Unit): Unit to build. Keeping its current weapon is always an option.
+        roster (list[Unit]): Foes to win against.
+        weapons (list[Weapon]): Weapon options.
+        skills (list[Skill]): Skill options, any slot.
+        beam_width (int): Builds kept after each slot.
+        initiating (bool): True if the unit attacks, False if it is attacked.
+        options (dict): simulate_battle options (terrain, damage_cache).
+        processes (int): Worker processes, started once and shared by
+            every slot's run_sweep; None means os.cpu_count().
+
+    Returns:
+        LoadoutResult, or None if the roster is empty.
+    """
+    if not roster:
+        return None
+    choices = slot_options(unit, weapons, skills)
+    processes = processes or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    beam = [Build()]
+    evaluated = 0
+    scored = []
+    try:
+        for slot in ('weapon',) + SKILL_SLOTS:
+            slot_choices = choices.get(slot)
+            if not slot_choices and scored:
+                continue
+            candidates = list(dict.fromkeys(
+                build.with_slot(slot, choice)
+                for build in beam
+                for choice in [None] + list(slot_choices or [])
+            ))
+            scored = _evaluate(unit, candidates, roster, initiating, options, processes, executor)
+            evaluated += len(candidates)
+            scored = sorted(_drop_dominated(scored), key=ScoredBuild.score, reverse=True)[:beam_width]
+            beam = [s.build for s in scored]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return LoadoutResult(best=scored[0], ranking=scored, evaluated=evaluated)
+
+
+__all__ = [
+    'Build',
+    'ScoredBuild',
+    'LoadoutResult',
+    'equip_build',
+    'slot_options',
+    'optimize_loadout',
+]
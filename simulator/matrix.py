@@ -0,0 +1,43 @@
+"""
+matrix.py
+---------
+Everyone-vs-everyone matchup grid built on simulate_battle.
+"""
+
+from .battle import simulate_battle
+
+
+def build_matchup_matrix(units, options=None):
+    """
+    Run simulate_battle for every (attacker, defender) pair of units.
+
+    Battles run in pure lean mode, so the units passed in are shared across
+    every matchup and left untouched.
+
+    Args:
+        units (list[Unit]): Roster; each unit fights with its equipped weapon.
+        options (dict): Passed through to simulate_battle.
+
+    Returns:
+        dict: {"units": [names], "results": rows} where rows[i][j] describes
+        unit i attacking unit j with keys winner ("attacker", "defender"
+        or None), attacker_hp and defender_hp.
+    """
+    options = dict(options or {}, pure=True, lean=True)
+    rows = []
+    for attacker in units:
+        row = []
+        for defender in units:
+            result = simulate_battle(attacker, defender, options)
+            winner = None
+            if result.attacker_hp > 0 and result.defender_hp <= 0:
+                winner = "attacker"
+            elif result.defender_hp > 0 and result.attacker_hp <= 0:
+                winner = "defender"
+            row.append({
+                "winner": winner,
+                "attacker_hp": result.attacker_hp,
+                "defender_hp": result.defender_hp,
+            })
+        rows.append(row)
+    return {"units": [u.name for u in units], "results": rows}
@@ -0,0 +1,174 @@
+"""
+migrations.py
+-------------
+Versioned schema migrations for the catalog database.
+
+`PRAGMA user_version` stores how many entries of MIGRATIONS have been
+applied. migrate() reads it once per connection and only does more work
+(inside one BEGIN IMMEDIATE transaction, so concurrent processes don't
+migrate twice) when the database is behind. Add a migration by appending a
+function to MIGRATIONS; never edit one that has shipped.
+"""
+
+import sqlite3
+from pathlib import Path
+
+SCHEMA_PATH = Path(__file__).parent.parent / "data" / "schema.sql"
+
+
+def _statements(script):
+    """Split an SQL script into complete statements."""
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    return statements
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def create_base_schema(conn):
+    """1: tables from data/schema.sql."""
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        for statement in _statements(f.read()):
+            conn.execute(statement)
+
+
+def add_unit_weapon_type(conn):
+    """2: units.weapon_type (skipped where an older schema.sql already created it)."""
+    if "weapon_type" not in _columns(conn, "units"):
+        conn.execute("ALTER TABLE units ADD COLUMN weapon_type TEXT")
+
+
+def add_name_and_link_indexes(conn):
+    """3: case-insensitive unique names and link table lookups."""
+    for table in ("units", "weapons", "skills"):
+        duplicate = conn.execute(
+            f"SELECT name FROM {table} GROUP BY name COLLATE NOCASE HAVING COUNT(*) > 1"
+        ).fetchone()
+        if duplicate:
+            raise sqlite3.IntegrityError(
+                f"Cannot add unique index: {table} has more than one '{duplicate[0]}' (ignoring case)"
+            )
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_name ON {table}(name COLLATE NOCASE)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_unit_weapons_unit ON unit_weapons(unit_id, weapon_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_unit_weapons_weapon ON unit_weapons(weapon_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_unit_skills_unit ON unit_skills(unit_id, skill_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_unit_skills_skill ON unit_skills(skill_id)")
+
+
+CATALOG_TABLES = ("units", "weapons", "skills", "unit_weapons", "unit_skills")
+
+
+def add_catalog_version_table(conn):
+    """
+    4: catalog_version, one counter per catalog table, bumped by triggers on
+    every row written by any connection or process.
+    """
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS catalog_version (table_name TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)"
+    )
+    for table in CATALOG_TABLES:
+        conn.execute("INSERT OR IGNORE INTO catalog_version (table_name, version) VALUES (?, 0)", (table,))
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_version AFTER {event} ON {table} "
+                f"BEGIN UPDATE catalog_version SET version = version + 1 WHERE table_name = '{table}'; END"
+            )
+
+
+# Text each <table>_fts row indexes: (description, types) expressions over
+# the catalog row, written with {r} for the row ("new" or a table alias).
+SEARCH_COLUMNS = {
+    "units": ("NULL", "coalesce({r}.unit_type, '') || ' ' || coalesce({r}.weapon_type, '')"),
+    "weapons": ("{r}.effective_against", "coalesce({r}.color, '') || ' ' || coalesce({r}.weapon_type, '')"),
+    "skills": ("{r}.description", "{r}.skill_type"),
+}
+FILTER_COLUMNS = {"units": ("unit_type", "weapon_type"), "weapons": ("weapon_type", "color"), "skills": ("skill_type",)}
+
+
+def fts5_available(conn):
+    return bool(conn.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def add_catalog_search_index(conn):
+    """
+    5: (filter column, name) indexes for the list filters, and a <table>_fts
+    FTS5 index per catalog table (rowid = row id) over name, description
+    and types, kept in step by triggers. SQLite builds without FTS5 skip the
+    search tables; FEHDatabase.page() then falls back to LIKE on names.
+    """
+    for table, columns in FILTER_COLUMNS.items():
+        for column in columns:
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{table}_{column}_name ON {table}({column}, name COLLATE NOCASE)"
+            )
+    if not fts5_available(conn):
+        return
+    for table, (description, types) in SEARCH_COLUMNS.items():
+        fts = f"{table}_fts"
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(name, description, types)")
+        conn.execute(
+            f"INSERT INTO {fts} (rowid, name, description, types) "
+            f"SELECT t.id, t.name, {description.format(r='t')}, {types.format(r='t')} FROM {table} t"
+        )
+        insert = (f"INSERT INTO {fts} (rowid, name, description, types) "
+                  f"VALUES (new.id, new.name, {description.format(r='new')}, {types.format(r='new')});")
+        delete = f"DELETE FROM {fts} WHERE rowid = old.id;"
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_insert AFTER INSERT ON {table} BEGIN {insert} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_update AFTER UPDATE ON {table} BEGIN {delete} {insert} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts}_delete AFTER DELETE ON {table} BEGIN {delete} END")
+
+
+MIGRATIONS = [
+    create_base_schema,
+    add_unit_weapon_type,
+    add_name_and_link_indexes,
+    add_catalog_version_table,
+    add_catalog_search_index,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Bring the database on `conn` up to SCHEMA_VERSION.
+
+    Returns:
+        int: Number of migrations applied (0 when already current).
+    """
+    if schema_version(conn) >= SCHEMA_VERSION:
+        return 0
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock: another connection may have migrated meanwhile.
+        start = schema_version(conn)
+        for number in range(start, SCHEMA_VERSION):
+            MIGRATIONS[number](conn)
+            conn.execute(f"PRAGMA user_version = {number + 1}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return max(0, SCHEMA_VERSION - start)
+
+
+__all__ = [
+    'CATALOG_TABLES',
+    'FILTER_COLUMNS',
+    'MIGRATIONS',
+    'SCHEMA_VERSION',
+    'fts5_available',
+    'migrate',
+    'schema_version',
+]
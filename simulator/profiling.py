@@ -0,0 +1,162 @@
+"""
+profiling.py
+------------
+Opt-in timing instrumentation for simulate_battle and calculate_damage.
+
+A Profiler aggregates timings into log2 histograms keyed by (kind, name):
+
+    ("battle", "round" | "lean")  one simulate_battle call
+    ("phase", <Phase name>)       one attack sequence (INIT, COUNTER, ...)
+    ("weapon", <weapon name>)     one Weapon.apply_effects call
+    ("skill", <skill name>)       one Skill.apply_effects call
+
+Turn it on for a single call with options={"profiler": profiler}, or for
+everything in the process with enable(). When neither is set the engine only
+does one None check per battle and per damage calculation.
+
+    profiler = Profiler()
+    simulate_battle(a, b, {"profiler": profiler})
+    print(profiler.report())
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+# Profiler installed by enable(); used when no per-call profiler is active.
+_global_profiler = None
+# Profiler of the simulate_battle call currently running in this context.
+_scoped_profiler: ContextVar = ContextVar("feh_profiler", default=None)
+
+
+class Histogram:
+    """
+    Timing samples in power-of-two microsecond buckets.
+
+    Bucket 0 holds samples under 1 us, bucket k samples in [2**(k-1), 2**k) us.
+    """
+    __slots__ = ("count", "total", "min", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self.buckets: Dict[int, int] = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):
+        """Upper bound (seconds) of the bucket holding the p-th percentile (0-100)."""
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min((1 << bucket) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.mean,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "buckets_us": {f"<{1 << k}": n for k, n in sorted(self.buckets.items())},
+        }
+
+
+class Profiler:
+    """Collects Histograms per (kind, name). Not locked; use one per thread."""
+
+    def __init__(self):
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+
+    def record(self, kind, name, seconds):
+        key = (kind, name)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.add(seconds)
+
+    def time_effects(self, kind, owner, context):
+        """Run owner.apply_effects(context) and record how long it took."""
+        start = time.perf_counter()
+        owner.apply_effects(context)
+        self.record(kind, getattr(owner, "name", repr(owner)), time.perf_counter() - start)
+
+    @contextmanager
+    def activate(self):
+        """Make this the active profiler for calls made inside the block."""
+        token = _scoped_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _scoped_profiler.reset(token)
+
+    def get(self, kind, name) -> Optional[Histogram]:
+        return self.histograms.get((kind, name))
+
+    def kinds(self, kind):
+        """{name: Histogram} for one kind, e.g. profiler.kinds("phase")."""
+        return {name: h for (k, name), h in self.histograms.items() if k == kind}
+
+    def clear(self):
+        self.histograms.clear()
+
+    def as_dict(self):
+        """{"kind:name": histogram dict}, suitable for json.dump."""
+        return {f"{kind}:{name}": h.as_dict() for (kind, name), h in sorted(self.histograms.items())}
+
+    def report(self):
+        """Plain-text table sorted by total time, slowest first."""
+        lines = [f"{'kind:name':<40} {'count':>8} {'total ms':>10} {'mean us':>10} {'p99 us':>10}"]
+        for (kind, name), h in sorted(self.histograms.items(), key=lambda item: -item[1].total):
+            lines.append(f"{kind + ':' + name:<40} {h.count:>8} {h.total * 1e3:>10.3f} "
+                         f"{h.mean * 1e6:>10.2f} {h.percentile(99) * 1e6:>10.2f}")
+        return "\n".join(lines)
+
+
+def enable(profiler=None) -> Profiler:
+    """Profile every battle in this process until disable(). Returns the profiler."""
+    global _global_profiler
+    _global_profiler = profiler if profiler is not None else Profiler()
+    return _global_profiler
+
+
+def disable():
+    global _global_profiler
+    _global_profiler = None
+
+
+def active_profiler() -> Optional[Profiler]:
+    """The per-call profiler if one is active, else the global one, else None."""
+    profiler = _scoped_profiler.get()
+    return profiler if profiler is not None else _global_profiler
+
+
+__all__ = [
+    'Histogram',
+    'Profiler',
+    'enable',
+    'disable',
+    'active_profiler',
+]
@@ -0,0 +1,461 @@
+"""
+snapshot.py
+-----------
+Compact columnar binary snapshot of the catalog, memory-mapped read-only.
+
+export_snapshot() writes the units, weapons and skills tables to one file:
+every column is a fixed-width little-endian array, and every text value is
+an index into a single interned string table, so repeated types, colors
+and image URLs are stored once. open_snapshot() maps the file with mmap and
+wraps the columns in read-only NumPy views without parsing or copying
+them. Processes that open the same file share its pages through the OS page
+cache, so a pool of N sweep workers holds one copy of the roster instead of
+N pickled ones; Python objects are only built for the rows a worker reads.
+
+Layout (all offsets 8-byte aligned):
+
+    header    magic, format version, row and link counts, string table
+              sizes, catalog_version counters of the source database
+    columns   units, then weapons, then skills, in *_COLUMNS order
+    links     per LINK_TABLES entry: int32 start offsets (one per unit,
+              plus one), then the int32 rows each unit links to, in link
+              order
+    strings   uint32 end offsets, then the UTF-8 bytes of every string
+
+A snapshot is a copy: re-export after catalog changes. is_current(db)
+compares its catalog_version counters with the database's.
+
+Usage:
+    python -m simulator.snapshot                       # data/feh.db -> data/catalog.snap
+    python -m simulator.snapshot --db other.db --out other.snap
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+
+from .catalog import Catalog, unit_from_row, weapon_from_row
+from .data_loader import DB_PATH, FEHDatabase
+from .migrations import CATALOG_TABLES
+from .vectorized import COLOR_CODES, COLORLESS, MAGICAL, MAGICAL_WEAPON_TYPES, PHYSICAL, StatColumns
+
+SNAPSHOT_PATH = DB_PATH.with_name("catalog.snap")
+MAGIC = b"FEHSNAP\x00"
+FORMAT_VERSION = 2
+
+# magic, format version, units, weapons, skills, unit_weapons, unit_skills,
+# strings, string bytes, then one catalog_version counter per CATALOG_TABLES
+# entry.
+_HEADER = struct.Struct(f"<8s8I{len(CATALOG_TABLES)}q")
+_ALIGN = 8
+
+STR = "str"  # column holding a string table index; 0 is NULL
+UNIT_COLUMNS = (
+    ("id", "<i4"), ("name", STR), ("hp", "<i2"), ("atk", "<i2"), ("spd", "<i2"), ("defense", "<i2"),
+    ("res", "<i2"), ("unit_type", STR), ("weapon_type", STR), ("image_url", STR),
+    ("weapon", "<i4"),  # row of the equipped weapon in the weapons columns, -1 if unarmed
+)
+WEAPON_COLUMNS = (
+    ("id", "<i4"), ("name", STR), ("might", "<i2"), ("color", STR), ("range", "<i2"), ("weapon_type", STR),
+    ("effective_against", STR), ("image_url", STR),
+    ("color_code", "<i1"), ("weapon_class", "<i1"),  # vectorized.COLOR_CODES / PHYSICAL or MAGICAL
+)
+SKILL_COLUMNS = (("id", "<i4"), ("name", STR), ("description", STR), ("skill_type", STR), ("effect_json", STR))
+TABLES = (("units", UNIT_COLUMNS), ("weapons", WEAPON_COLUMNS), ("skills", SKILL_COLUMNS))
+# Columns computed at export time rather than copied from the database.
+DERIVED_COLUMNS = {"units": ("weapon",), "weapons": ("color_code", "weapon_class")}
+# Unit link tables and the table their rows point into.
+LINK_TABLES = (("unit_weapons", "weapons"), ("unit_skills", "skills"))
+_LINK_DTYPE = np.dtype("<i4")
+
+
+def _dtype(spec):
+    return np.dtype("<u4" if spec == STR else spec)
+
+
+def _aligned(offset):
+    return -(-offset // _ALIGN) * _ALIGN
+
+
+def _null(dtype):
+    """Sentinel stored for NULL in a nullable integer column."""
+    return np.iinfo(dtype).min
+
+
+def _layout(counts, n_strings, string_bytes):
+    """
+    Byte offset of every section for the given sizes.
+
+    Returns:
+        tuple: ({(table, column): (offset, dtype, length)}, strings offset,
+        string bytes offset, total file size). Link tables have a "start"
+        and a "row" column.
+    """
+    offset = _aligned(_HEADER.size)
+    columns = {}
+    arrays = [(table, name, _dtype(spec), counts[table]) for table, specs in TABLES for name, spec in specs]
+    for link, _ in LINK_TABLES:
+        arrays.append((link, "start", _LINK_DTYPE, counts["units"] + 1))
+        arrays.append((link, "row", _LINK_DTYPE, counts[link]))
+    for table, name, dtype, length in arrays:
+        columns[(table, name)] = (offset, dtype, length)
+        offset = _aligned(offset + length * dtype.itemsize)
+    strings_offset = offset
+    blob_offset = _aligned(strings_offset + n_strings * 4)
+    return columns, strings_offset, blob_offset, blob_offset + string_bytes
+
+
+# --- Export ---
+class _Strings:
+    """Interns strings; index 0 stands for None."""
+
+    def __init__(self):
+        self.ids = {}
+        self.encoded = []
+
+    def __call__(self, value):
+        if value is None:
+            return 0
+        value = str(value)
+        id_ = self.ids.get(value)
+        if id_ is None:
+            self.encoded.append(value.encode("utf-8"))
+            id_ = self.ids[value] = len(self.encoded)
+        return id_
+
+
+def _weapon_codes(row):
+    weapon_type = (row.get('weapon_type') or '').lower()
+    return (COLOR_CODES.get(row.get('color'), COLORLESS),
+            MAGICAL if weapon_type in MAGICAL_WEAPON_TYPES else PHYSICAL)
+
+
+def _column_values(catalog, strings):
+    """{(table, column): list of stored values} for every column."""
+    weapon_rows = {row['id']: i for i, row in enumerate(catalog.weapons)}
+    values = {}
+    for table, specs in TABLES:
+        rows = getattr(catalog, table)
+        for name, spec in specs:
+            if name in DERIVED_COLUMNS.get(table, ()):
+                continue
+            if spec == STR:
+                values[(table, name)] = [strings(row.get(name)) for row in rows]
+            else:
+                null = _null(_dtype(spec))
+                values[(table, name)] = [null if row.get(name) is None else row[name] for row in rows]
+    values[("units", "weapon")] = [
+        weapon_rows.get(catalog.equipped[row['id']]['id'], -1) if row['id'] in catalog.equipped else -1
+        for row in catalog.units
+    ]
+    codes = [_weapon_codes(row) for row in catalog.weapons]
+    values[("weapons", "color_code")] = [c for c, _ in codes]
+    values[("weapons", "weapon_class")] = [w for _, w in codes]
+    for link, target in LINK_TABLES:
+        target_rows = {row['id']: i for i, row in enumerate(getattr(catalog, target))}
+        links = getattr(catalog, link)
+        starts, rows = [0], []
+        for unit in catalog.units:
+            rows.extend(target_rows[linked['id']] for linked in links.get(unit['id'], ()))
+            starts.append(len(rows))
+        values[(link, "start")] = starts
+        values[(link, "row")] = rows
+    return values
+
+
+def write_snapshot(catalog, path):
+    """
+    Write a Catalog to `path` as a snapshot.
+
+    The file is written next to `path` and renamed over it, so processes
+    that already mapped the old snapshot keep reading it undisturbed.
+    """
+    path = Path(path)
+    strings = _Strings()
+    values = _column_values(catalog, strings)
+    counts = {table: len(getattr(catalog, table)) for table, _ in TABLES}
+    counts.update((link, len(values[(link, "row")])) for link, _ in LINK_TABLES)
+    ends = np.cumsum([len(s) for s in strings.encoded], dtype=np.uint64)
+    string_bytes = int(ends[-1]) if len(ends) else 0
+    if string_bytes > np.iinfo(np.uint32).max:
+        raise ValueError("Catalog strings exceed the 4 GiB snapshot limit")
+    columns, strings_offset, blob_offset, size = _layout(counts, len(strings.encoded), string_bytes)
+
+    buffer = bytearray(size)
+    _HEADER.pack_into(
+        buffer, 0, MAGIC, FORMAT_VERSION, counts["units"], counts["weapons"], counts["skills"],
+        counts["unit_weapons"], counts["unit_skills"], len(strings.encoded), string_bytes,
+        *(catalog.versions.get(t, 0) for t in CATALOG_TABLES),
+    )
+    for (table, name), (offset, dtype, length) in columns.items():
+        array = np.asarray(values[(table, name)], dtype=np.int64)
+        info = np.iinfo(dtype)
+        if len(array) and (array.min() < info.min or array.max() > info.max):
+            raise ValueError(f"{table}.{name} has values outside {dtype}")
+        np.frombuffer(buffer, dtype, length, offset)[:] = array
+    np.frombuffer(buffer, "<u4", len(ends), strings_offset)[:] = ends
+    buffer[blob_offset:] = b"".join(strings.encoded)
+
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp, "wb") as f:
+            f.write(buffer)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return path
+
+
+def export_snapshot(db, path=SNAPSHOT_PATH):
+    """Snapshot the catalog in an open FEHDatabase. Returns the path written."""
+    return write_snapshot(Catalog.load(db), path)
+
+
+# --- Reading ---
+class SnapshotTable:
+    """
+    One table of a snapshot: read-only column arrays plus row access.
+
+    Attributes:
+        name (str): "units", "weapons" or "skills".
+        columns (dict[str, np.ndarray]): Arrays backed by the mapped file.
+    """
+
+    def __init__(self, snapshot, name, columns):
+        self.snapshot = snapshot
+        self.name = name
+        self.columns = columns
+        self._fields = [
+            (column, spec == STR, _null(_dtype(spec)) if spec != STR else None)
+            for column, spec in dict(TABLES)[name] if column not in DERIVED_COLUMNS.get(name, ())
+        ]
+        self._by_name = None
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def row(self, index):
+        """Row `index` as the dict FEHDatabase would return for it."""
+        string = self.snapshot.string
+        row = {}
+        for column, is_string, null in self._fields:
+            value = int(self.columns[column][index])
+            row[column] = string(value) if is_string else (None if value == null else value)
+        return row
+
+    def rows(self):
+        return [self.row(i) for i in range(len(self))]
+
+    def index(self, name):
+        """Row index of a name (ignoring case), or None."""
+        if self._by_name is None:
+            string = self.snapshot.string
+            self._by_name = {string(int(id_)).lower(): i for i, id_ in enumerate(self.columns["name"])}
+        return self._by_name.get(name.lower()) if name else None
+
+
+class CatalogSnapshot:
+    """
+    A snapshot file mapped read-only.
+
+    Offers the lookups of Catalog (unit/weapon/skill by name, build_unit,
+    build_units, with every linked weapon and skill) plus stat_columns()
+    for the vectorized kernels, reading straight from the mapped columns.
+
+    Attributes:
+        path (Path): Snapshot file.
+        units, weapons, skills (SnapshotTable)
+        versions (dict[str, int]): catalog_version counters at export time.
+
+    Raises:
+        ValueError: If the file isn't a snapshot of this format.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) < _HEADER.size:
+            raise ValueError(f"{self.path}: not a catalog snapshot")
+        (magic, version, n_units, n_weapons, n_skills, n_unit_weapons, n_unit_skills, n_strings, string_bytes,
+         *versions) = _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a catalog snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{self.path}: snapshot format {version}, expected {FORMAT_VERSION}")
+        counts = {"units": n_units, "weapons": n_weapons, "skills": n_skills,
+                  "unit_weapons": n_unit_weapons, "unit_skills": n_unit_skills}
+        columns, strings_offset, blob_offset, size = _layout(counts, n_strings, string_bytes)
+        if len(self._map) != size:
+            raise ValueError(f"{self.path}: snapshot is {len(self._map)} bytes, expected {size}")
+
+        self.versions = dict(zip(CATALOG_TABLES, versions))
+        tables = {table: {} for table, _ in TABLES + LINK_TABLES}
+        for (table, name), (offset, dtype, length) in columns.items():
+            tables[table][name] = np.frombuffer(self._map, dtype, length, offset)
+        self._links = {link: tables[link] for link, _ in LINK_TABLES}
+        self.units = SnapshotTable(self, "units", tables["units"])
+        self.weapons = SnapshotTable(self, "weapons", tables["weapons"])
+        self.skills = SnapshotTable(self, "skills", tables["skills"])
+        self._string_ends = np.frombuffer(self._map, "<u4", n_strings, strings_offset)
+        self._blob_offset = blob_offset
+        self._strings = {}
+
+    def string(self, id_):
+        """Text for a string table index (None for 0)."""
+        if not id_:
+            return None
+        value = self._strings.get(id_)
+        if value is None:
+            start = int(self._string_ends[id_ - 2]) if id_ > 1 else 0
+            end = int(self._string_ends[id_ - 1])
+            value = self._map[self._blob_offset + start:self._blob_offset + end].decode("utf-8")
+            self._strings[id_] = value
+        return value
+
+    def is_current(self, db):
+        """True if no catalog table of `db` changed since this snapshot was exported."""
+        return db.catalog_versions() == self.versions
+
+    def unit(self, name):
+        index = self.units.index(name)
+        return None if index is None else self.units.row(index)
+
+    def weapon(self, name):
+        index = self.weapons.index(name)
+        return None if index is None else self.weapons.row(index)
+
+    def skill(self, name):
+        index = self.skills.index(name)
+        return None if index is None else self.skills.row(index)
+
+    def _linked(self, link, table, index):
+        """Rows of `table` that unit row `index` links to through `link`."""
+        start, rows = self._links[link]["start"], self._links[link]["row"]
+        return [table.row(int(row)) for row in rows[start[index]:start[index + 1]]]
+
+    def _build(self, index):
+        return unit_from_row(self.units.row(index), self._linked("unit_weapons", self.weapons, index),
+                             self._linked("unit_skills", self.skills, index))
+
+    def build_unit(self, name):
+        """Fresh Unit (safe to modify) for a unit name, or None."""
+        index = self.units.index(name)
+        return None if index is None else self._build(index)
+
+    def build_units(self):
+        """Fresh Units for the whole roster, in name order."""
+        return [self._build(i) for i in range(len(self.units))]
+
+    def stat_columns(self):
+        """
+        StatColumns for the whole roster, gathered from the mapped arrays
+        without building any Unit. Matches StatColumns.from_units(build_units()).
+        """
+        units = self.units
+        weapon = units["weapon"]
+        armed = weapon >= 0
+        safe = np.where(armed, weapon, 0)
+
+        def equipped(column):
+            if not len(self.weapons):
+                return np.zeros(len(units), dtype=np.int64)
+            return np.where(armed, self.weapons[column][safe], 0)
+
+        return StatColumns.from_arrays(
+            units["hp"], units["atk"], units["spd"], units["defense"], units["res"],
+            might=equipped("might"), color=equipped("color_code"), weapon_class=equipped("weapon_class"),
+            armed=armed,
+        )
+
+    def sweep_catalog(self):
+        """
+        Sweep catalog over this snapshot: units and weapons in snapshot row
+        order, built on first use and kept per process.
+        """
+        return SnapshotSweepCatalog(self)
+
+
+class _Rows(Sequence):
+    """Lazily built, memoized objects for the rows of a table."""
+
+    def __init__(self, size, build):
+        self._size = size
+        self._build = build
+        self._built = {}
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        item = self._built.get(index)
+        if item is None:
+            item = self._built[index] = self._build(index)
+        return item
+
+
+class SnapshotSweepCatalog:
+    """
+    Stands in for sweep.SweepCatalog: `units` holds CombatantSnapshots and
+    `weapons` Weapons, indexed like the snapshot's rows.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.units = _Rows(len(snapshot.units), lambda i: snapshot._build(i).snapshot())
+        self.weapons = _Rows(len(snapshot.weapons), lambda i: weapon_from_row(snapshot.weapons.row(i)))
+
+
+def open_snapshot(path=SNAPSHOT_PATH):
+    return CatalogSnapshot(path)
+
+
+__all__ = [
+    'CatalogSnapshot',
+    'SnapshotSweepCatalog',
+    'SnapshotTable',
+    'SNAPSHOT_PATH',
+    'export_snapshot',
+    'open_snapshot',
+    'write_snapshot',
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the catalog to a memory-mappable snapshot.")
+    parser.add_argument("--db", default=str(DB_PATH), help="database file (default: data/feh.db)")
+    parser.add_argument("--out", default=str(SNAPSHOT_PATH), help="snapshot file (default: data/catalog.snap)")
+    args = parser.parse_args(argv)
+
+    db = FEHDatabase(args.db)
+    try:
+        path = export_snapshot(db, args.out)
+    except (OSError, ValueError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        db.close()
+    snapshot = open_snapshot(path)
+    print(f"Wrote {path}: {len(snapshot.units)} units, {len(snapshot.weapons)} weapons, "
+          f"{len(snapshot.skills)} skills, {path.stat().st_size} bytes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""
+sweep.py
+--------
+Batch runner that spreads simulate_battle over a process pool.
+
+A sweep is a catalog (units and weapons) plus a list of Matchups that point
+into it by index. The catalog is handed to each worker once, when the worker
+starts; tasks only carry chunks of small index tuples. Results come back in
+the same order as the matchups, whatever the number of processes.
+
+The catalog can also be the path of a catalog snapshot (see snapshot.py).
+Workers then memory-map the file instead of receiving a pickled copy, share
+its pages, and only build the units and weapons their matchups use.
+"""
+
+import dataclasses
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+from .battle import simulate_battle
+from .snapshot import open_snapshot
+from .units import Unit
+
+
+class Matchup(NamedTuple):
+    """
+    One battle in a sweep. Units and weapons are indexes into the catalog;
+    a weapon of None keeps the unit's own equipped weapon.
+    """
+    attacker: int
+    defender: int
+    attacker_weapon: Optional[int] = None
+    defender_weapon: Optional[int] = None
+    terrain: Optional[str] = None
+
+
+@dataclasses.dataclass
+class SweepCatalog:
+    """
+    Units and weapons a sweep draws from.
+
+    Attributes:
+        units (list[Unit or CombatantSnapshot]): Converted to snapshots.
+        weapons (list[Weapon]): Weapons Matchups may equip by index.
+    """
+    units: Sequence[Any]
+    weapons: Sequence[Any] = ()
+
+    def __post_init__(self):
+        self.units = tuple(u.snapshot() if isinstance(u, Unit) else u for u in self.units)
+        self.weapons = tuple(self.weapons)
+
+
+def product_matchups(attackers, defenders, attacker_weapons=(None,), defender_weapons=(None,), terrains=(None,)):
+    """
+    Cartesian product of unit indexes x weapon indexes x terrains.
+
+    Returns:
+        list[Matchup]: Row-major over attackers, attacker_weapons,
+        defenders, defender_weapons, terrains: attackers vary slowest and
+        terrains fastest.
+    """
+    return [
+        Matchup(a, d, aw, dw, t)
+        for a, aw, d, dw, t in itertools.product(attackers, attacker_weapons, defenders, defender_weapons, terrains)
+    ]
+
+
+# --- Worker side ---
+_worker_catalog: Optional[SweepCatalog] = None
+_worker_options: Dict[str, Any] = {}
+
+
+def _init_worker(catalog, options):
+    global _worker_catalog, _worker_options
+    if isinstance(catalog, (str, os.PathLike)):
+        catalog = open_snapshot(catalog).sweep_catalog()
+    _worker_catalog = catalog
+    _worker_options = options
+
+
+def _combatant(index, weapon_index):
+    unit = _worker_catalog.units[index]
+    if weapon_index is not None:
+        unit = dataclasses.replace(unit, equipped_weapon=_worker_catalog.weapons[weapon_index])
+    return unit
+
+
+def _run_chunk(chunk):
+    options_by_terrain = {}
+    results = []
+    for matchup in chunk:
+        options = options_by_terrain.get(matchup.terrain)
+        if options is None:
+            options = dict(_worker_options, terrain=matchup.terrain, pure=True)
+            options_by_terrain[matchup.terrain] = options
+        attacker = _combatant(matchup.attacker, matchup.attacker_weapon)
+        defender = _combatant(matchup.defender, matchup.defender_weapon)
+        results.append(simulate_battle(attacker, defender, options))
+    return results
+
+
+def _run_catalog_chunk(catalog, options, chunk):
+    _init_worker(catalog, options)
+    try:
+        return _run_chunk(chunk)
+    finally:
+        _init_worker(None, {})
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_sweep(catalog: Union[SweepCatalog, str, os.PathLike], matchups: Sequence[Matchup], options: Optional[Dict[str, Any]] = None,
+              processes: Optional[int] = None, chunksize: Optional[int] = None,
+              executor: Optional[ProcessPoolExecutor] = None) -> List[Any]:
+    """
+    Simulate every matchup, in parallel when processes > 1.
+
+    Args:
+        catalog (SweepCatalog or path): Units and weapons the matchups index
+            into, or a catalog snapshot file whose rows they index into.
+        matchups (list[Matchup]): Battles to run.
+        options (dict): simulate_battle options; defaults to {"lean": True}.
+            Battles always run in pure mode.
+        processes (int): Worker count; defaults to os.cpu_count(). 1 runs
+            in the calling process.
+        chunksize (int): Matchups per task; defaults to about four tasks
+            per worker (one with `executor`).
+        executor (ProcessPoolExecutor): Existing pool to run on instead of
+            starting one, for callers that run many sweeps. Its workers may
+            have served other catalogs, so the catalog is sent with every
+            task rather than once per worker; `processes` should match the
+            pool's size.
+
+    Returns:
+        list: One simulate_battle result per matchup, in matchup order.
+    """
+    if options is None:
+        options = {"lean": True}
+    matchups = list(matchups)
+    processes = processes or os.cpu_count() or 1
+    processes = min(processes, max(1, len(matchups)))
+    if processes == 1:
+        _init_worker(catalog, options)
+        try:
+            return _run_chunk(matchups)
+        finally:
+            _init_worker(None, {})
+    if executor is not None:
+        chunksize = chunksize or max(1, -(-len(matchups) // processes))
+        chunks = list(_chunks(matchups, chunksize))
+        results = []
+        for chunk_results in executor.map(_run_catalog_chunk, itertools.repeat(catalog, len(chunks)),
+                                          itertools.repeat(options, len(chunks)), chunks):
+            results.extend(chunk_results)
+        return results
+    if chunksize is None:
+        chunksize = max(1, -(-len(matchups) // (processes * 4)))
+    results = []
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_worker, initargs=(catalog, options)) as pool:
+        for chunk_results in pool.map(_run_chunk, _chunks(matchups, chunksize)):
+            results.extend(chunk_results)
+    return results
+
+
+__all__ = [
+    'Matchup',
+    'SweepCatalog',
+    'product_matchups',
+    'run_sweep',
+]
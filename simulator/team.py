@@ -0,0 +1,184 @@
+"""
+team.py
+-------
+Team-vs-team attack order search (Aether Raids style player phase).
+
+Each unit on the player team acts at most once, attacking one living enemy;
+HP carries over from one combat to the next. The search finds the order of
+(attacker, target) combats that KOs the most enemies and, among those, loses
+the fewest units.
+
+Every combat is a pure lean simulate_battle, so the result of one combat
+depends only on (attacker, target, attacker HP, target HP) and is memoized.
+The depth-first search skips HP states it has already expanded, prunes
+branches whose optimistic KO bound can't beat the best order found so far,
+and stops early when it runs out of its node or time budget.
+"""
+
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Optional, Tuple
+
+from .battle import _as_bool_or_call, _potent_extra, resolve_follow_ups, simulate_battle_lean
+from .calculations import calculate_damage
+from .units import Unit
+
+MAX_TEAM_SIZE = 4
+
+
+@dataclass
+class TeamSearchResult:
+    """
+    Attributes:
+        order (list[tuple[str, str]]): (attacker name, target name) per combat.
+        enemies_ko (int): Enemies KO'd by the order.
+        units_lost (int): Player units KO'd along the way.
+        player_hp, enemy_hp (list[int]): HP after the last combat.
+        nodes (int): Search states expanded.
+        complete (bool): False if the budget ran out before the search
+            finished; the order is then the best one found so far.
+    """
+    order: List[Tuple[str, str]]
+    enemies_ko: int
+    units_lost: int
+    player_hp: List[int]
+    enemy_hp: List[int]
+    nodes: int = 0
+    complete: bool = True
+
+
+@dataclass
+class _Search:
+    team: list
+    enemies: list
+    options: dict
+    max_nodes: Optional[int]
+    deadline: Optional[float]
+    damage_bound: list = field(default_factory=list)
+    fights: dict = field(default_factory=dict)
+    visited: set = field(default_factory=set)
+    nodes: int = 0
+    complete: bool = True
+    best_score: Tuple[int, int] = (-1, 0)
+    best: Optional[tuple] = None
+
+    def fight(self, i, j, attacker_hp, enemy_hp):
+        key = (i, j, attacker_hp, enemy_hp)
+        outcome = self.fights.get(key)
+        if outcome is None:
+            result = simulate_battle_lean(replace(self.team[i], hp=attacker_hp),
+                                          replace(self.enemies[j], hp=enemy_hp), self.options)
+            outcome = (result.attacker_hp, result.defender_hp)
+            self.fights[key] = outcome
+        return outcome
+
+    def out_of_budget(self):
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    def run(self, player_hp, enemy_hp, acted, order):
+        if not self.complete:
+            return
+        kos = enemy_hp.count(0)
+        losses = player_hp.count(0)
+        score = (kos, -losses)
+        if score > self.best_score:
+            self.best_score = score
+            self.best = (list(order), player_hp, enemy_hp)
+
+        if self.out_of_budget():
+            self.complete = False
+            return
+        self.nodes += 1
+
+        state = (player_hp, enemy_hp, acted)
+        if state in self.visited:
+            return
+        self.visited.add(state)
+
+        actors = [i for i, hp in enumerate(player_hp) if hp > 0 and not acted & (1 << i)]
+        targets = [j for j, hp in enumerate(enemy_hp) if hp > 0]
+        if not actors or not targets:
+            return
+
+        # Optimistic bound: an enemy can only fall if the damage upper bounds
+        # of all remaining actors together cover its HP; each actor finishes
+        # at most one enemy, and nobody else on the team falls.
+        killable = sum(1 for j in targets if sum(self.damage_bound[i][j] for i in actors) >= enemy_hp[j])
+        if (kos + min(len(actors), killable), -losses) <= self.best_score:
+            return
+
+        children = []
+        for i in actors:
+            for j in targets:
+                new_attacker_hp, new_enemy_hp = self.fight(i, j, player_hp[i], enemy_hp[j])
+                children.append((new_enemy_hp > 0, new_attacker_hp == 0, i, j, new_attacker_hp, new_enemy_hp))
+        # Try KOs that keep the attacker alive first to tighten the bound early.
+        children.sort(key=lambda c: (c[0], c[1]))
+        for _, _, i, j, new_attacker_hp, new_enemy_hp in children:
+            next_player = player_hp[:i] + (new_attacker_hp,) + player_hp[i + 1:]
+            next_enemy = enemy_hp[:j] + (new_enemy_hp,) + enemy_hp[j + 1:]
+            order.append((i, j))
+            self.run(next_player, next_enemy, acted | (1 << i), order)
+            order.pop()
+
+
+def _round_damage_bound(attacker, defender, options):
+    """Most damage `attacker` can deal `defender` in one round it initiates."""
+    weapon = attacker.equipped_weapon
+    damage, _ = calculate_damage(attacker, defender, weapon_type=weapon.weapon_type if weapon else None,
+                                 terrain=options.get("terrain"), adaptive_damage=attacker.adaptive_damage)
+    per_attack = 2 if _as_bool_or_call(attacker.has_brave_attack) else 1
+    attacks = 1
+    if resolve_follow_ups(attacker, defender)[0]:
+        attacks += 2 if _potent_extra(attacker) else 1
+    return damage * per_attack * attacks
+
+
+def search_attack_order(team, enemies, options=None, max_nodes=200_000, time_limit=None) -> TeamSearchResult:
+    """
+    Find the attack order that KOs the most enemies while losing the fewest units.
+
+    Args:
+        team (list[Unit or CombatantSnapshot]): Up to 4 player units.
+        enemies (list[Unit or CombatantSnapshot]): Up to 4 enemy units.
+        options (dict): simulate_battle options (terrain, damage_cache).
+        max_nodes (int): Stop after expanding this many states (None: no limit).
+        time_limit (float): Stop after this many seconds (None: no limit).
+
+    Returns:
+        TeamSearchResult
+    """
+    if len(team) > MAX_TEAM_SIZE or len(enemies) > MAX_TEAM_SIZE:
+        raise ValueError(f"Teams are limited to {MAX_TEAM_SIZE} units")
+    team = [u.snapshot() if isinstance(u, Unit) else u for u in team]
+    enemies = [u.snapshot() if isinstance(u, Unit) else u for u in enemies]
+    options = dict(options or {}, pure=True)
+    search = _Search(
+        team=team,
+        enemies=enemies,
+        options=options,
+        max_nodes=max_nodes,
+        deadline=time.perf_counter() + time_limit if time_limit is not None else None,
+        damage_bound=[[_round_damage_bound(a, e, options) for e in enemies] for a in team],
+    )
+    search.run(tuple(u.hp for u in team), tuple(e.hp for e in enemies), 0, [])
+
+    order, player_hp, enemy_hp = search.best
+    return TeamSearchResult(
+        order=[(team[i].name, enemies[j].name) for i, j in order],
+        enemies_ko=enemy_hp.count(0),
+        units_lost=player_hp.count(0),
+        player_hp=list(player_hp),
+        enemy_hp=list(enemy_hp),
+        nodes=search.nodes,
+        complete=search.complete,
+    )
+
+
+__all__ = [
+    'search_attack_order',
+    'TeamSearchResult',
+    'MAX_TEAM_SIZE',
+]
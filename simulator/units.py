@@ -5,8 +5,43 @@ units.py
 Contains the Unit class representing heroes/units in Fire Emblem Heroes.
 """
 
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+
 from .weapon import Weapon  # Importing the Weapon class from the weapon module
 
+
+@dataclass(frozen=True)
+class CombatantSnapshot:
+    """
+    Immutable view of a Unit with everything the combat engine reads.
+
+    simulate_battle(..., options={"pure": True}) accepts snapshots and never
+    writes to them, so one snapshot can be shared by any number of
+    concurrent or memoized battles. Use dataclasses.replace(snap, hp=...)
+    to start a battle from different HP.
+    """
+    name: str
+    hp: int
+    atk: int
+    spd: int
+    defense: int
+    res: int
+    equipped_weapon: Optional[Weapon] = None
+    special: Optional[str] = None
+    on_defensive_tile: bool = False
+    adaptive_damage: bool = False
+    has_brave_attack: Any = False
+    has_guaranteed_follow_up: Any = False
+    denies_foe_follow_up: Any = False
+    has_potent_follow_up: Any = False
+    skills: Tuple[Tuple[str, Any], ...] = ()
+
+    @property
+    def equipped_skills(self):
+        return dict(self.skills)
+
+
 class Unit:
     """
     Represents a hero/unit in Fire Emblem Heroes.
@@ -24,6 +59,9 @@ class Unit:
         image_url (str): Link to unit image.
         unit_type (str): Movement type (infantry, armor, flier, cavalry).
         weapon_type (str): Weapon type for filtering (sword, lance, axe, etc.).
+        weapons (list[Weapon]): Weapons available to the unit.
+        equipped_weapon (Weapon): Weapon used in combat (None if unarmed).
+        learned_skills (list[Skill]): Skills the unit has learned.
     """
     def __init__(
         self,
@@ -38,7 +76,10 @@ class Unit:
         exclusive_skills=None,
         image_url="",
         unit_type="",
-        weapon_type=""
+        weapon_type="",
+        weapons=None,
+        equipped_weapon=None,
+        learned_skills=None
     ):
         self.name = name
         self.hp = hp
@@ -52,7 +93,46 @@ class Unit:
         self.image_url = image_url
         self.unit_type = unit_type
         self.weapon_type = weapon_type  # Added for filtering purposes
+        self.weapons = weapons if weapons else []
+        self.equipped_weapon = equipped_weapon
+        self.learned_skills = learned_skills if learned_skills else []
+
+    def equip_weapon(self, weapon_name):
+        """
+        Equip one of the unit's weapons by name.
+
+        Returns:
+            Weapon: The equipped weapon.
+        """
+        for weapon in self.weapons:
+            if weapon.name == weapon_name:
+                self.equipped_weapon = weapon
+                return weapon
+        raise ValueError(f"{self.name} has no weapon named '{weapon_name}'")
+
 
+    def snapshot(self):
+        """
+        Capture the unit's current combat state as a CombatantSnapshot.
+        Optional combat attributes (special, skill hooks, ...) default to off.
+        """
+        return CombatantSnapshot(
+            name=self.name,
+            hp=self.hp,
+            atk=self.atk,
+            spd=self.spd,
+            defense=self.defense,
+            res=self.res,
+            equipped_weapon=self.equipped_weapon,
+            special=getattr(self, 'special', None),
+            on_defensive_tile=getattr(self, 'on_defensive_tile', False),
+            adaptive_damage=getattr(self, 'adaptive_damage', False),
+            has_brave_attack=getattr(self, 'has_brave_attack', False),
+            has_guaranteed_follow_up=getattr(self, 'has_guaranteed_follow_up', False),
+            denies_foe_follow_up=getattr(self, 'denies_foe_follow_up', False),
+            has_potent_follow_up=getattr(self, 'has_potent_follow_up', False),
+            skills=tuple(getattr(self, 'equipped_skills', {}).items()),
+        )
 
     def __repr__(self):
         return f"<Unit {self.name}>"
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""
+variants.py
+-----------
+Boon/bane IV spreads of a unit, simulated against foes in one vectorized pass.
+
+A unit's stored stats are its neutral spread. Each of the 20 boon/bane
+combinations raises one stat and lowers another; stats listed in the unit's
+superboons/superbanes move one point further. All 21 variants are packed
+into StatColumns and run through vectorized.simulate_lean_matrix together;
+pairings the columns can't describe (vectorized.needs_scalar) go through
+battle.simulate_battle_lean instead.
+"""
+
+import copy
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .battle import simulate_battle_lean
+from .vectorized import StatColumns, needs_scalar, outcome_codes, simulate_lean_matrix, unit_to_row
+
+IV_STATS = ('hp', 'atk', 'spd', 'defense', 'res')
+STAT_LABELS = {'hp': 'HP', 'atk': 'Atk', 'spd': 'Spd', 'defense': 'Def', 'res': 'Res'}
+BOON = 3
+BANE = 3
+SUPER_BONUS = 1  # extra point for a superboon / superbane
+
+# Names accepted in Unit.superboons / Unit.superbanes
+_STAT_ALIASES = {'hp': 'hp', 'atk': 'atk', 'spd': 'spd', 'def': 'defense', 'defense': 'defense', 'res': 'res'}
+
+
+def _normalize_stats(names):
+    return {_STAT_ALIASES[n.strip().lower()] for n in names if n.strip().lower() in _STAT_ALIASES}
+
+
+def iv_spreads() -> List[Tuple[Optional[str], Optional[str]]]:
+    """All 21 (boon, bane) pairs, neutral (None, None) first."""
+    return [(None, None)] + [(boon, bane) for boon in IV_STATS for bane in IV_STATS if boon != bane]
+
+
+def iv_label(boon, bane):
+    if boon is None:
+        return "Neutral"
+    return f"+{STAT_LABELS[boon]} -{STAT_LABELS[bane]}"
+
+
+def iv_stats(unit, boon, bane):
+    """The unit's five stats under one boon/bane spread."""
+    stats = {stat: getattr(unit, stat) for stat in IV_STATS}
+    if boon is None:
+        return stats
+    superboons = _normalize_stats(unit.superboons)
+    superbanes = _normalize_stats(unit.superbanes)
+    stats[boon] += BOON + (SUPER_BONUS if boon in superboons else 0)
+    stats[bane] -= BANE + (SUPER_BONUS if bane in superbanes else 0)
+    return stats
+
+
+def expand_variants(unit):
+    """
+    Columns for all 21 IV spreads of a unit.
+
+    Returns:
+        tuple[list[str], StatColumns]: Variant labels and their columns,
+        in iv_spreads() order.
+    """
+    base = list(unit_to_row(unit))
+    rows, labels = [], []
+    for boon, bane in iv_spreads():
+        stats = iv_stats(unit, boon, bane)
+        row = base.copy()
+        row[:5] = [stats[stat] for stat in IV_STATS]
+        rows.append(row)
+        labels.append(iv_label(boon, bane))
+    return labels, StatColumns.from_arrays(*zip(*rows))
+
+
+def variant_units(unit):
+    """Copies of `unit` for all 21 IV spreads, in iv_spreads() order."""
+    variants = []
+    for boon, bane in iv_spreads():
+        variant = copy.copy(unit)
+        for stat, value in iv_stats(unit, boon, bane).items():
+            setattr(variant, stat, value)
+        variants.append(variant)
+    return variants
+
+
+@dataclass
+class VariantTable:
+    """
+    Outcomes of every IV variant against every foe.
+
+    Attributes:
+        variants (list[str]): Variant labels (rows).
+        foes (list[str]): Foe names (columns).
+        unit_hp, foe_hp (np.ndarray): Final HP, shape (variants, foes).
+        outcome (np.ndarray): 1 win, -1 loss, 0 neither, from the unit's side.
+    """
+    variants: List[str]
+    foes: List[str]
+    unit_hp: np.ndarray
+    foe_hp: np.ndarray
+    outcome: np.ndarray
+
+    def summary(self):
+        """One row per variant with win/loss/draw counts."""
+        return [
+            {
+                "variant": label,
+                "wins": int((row == 1).sum()),
+                "losses": int((row == -1).sum()),
+                "draws": int((row == 0).sum()),
+            }
+            for label, row in zip(self.variants, self.outcome)
+        ]
+
+    def best(self):
+        """Label of the variant with the most wins (fewest losses on ties)."""
+        wins = (self.outcome == 1).sum(axis=1)
+        losses = (self.outcome == -1).sum(axis=1)
+        return self.variants[int(np.lexsort((losses, -wins))[0])]
+
+
+def simulate_variants(unit, foes, initiating=True, terrain=None) -> VariantTable:
+    """
+    Simulate all 21 IV spreads of `unit` against each foe.
+
+    Args:
+        unit (Unit): The unit whose IVs vary.
+        foes (list[Unit]): One defender or a whole roster.
+        initiating (bool): True if the unit attacks, False if the foes do.
+        terrain (str): Passed to the damage kernel.
+    """
+    labels = [iv_label(boon, bane) for boon, bane in iv_spreads()]
+    unit_hp = np.zeros((len(labels), len(foes)), dtype=np.int64)
+    foe_hp = np.zeros_like(unit_hp)
+    scalar = needs_scalar(unit)
+    vector = [] if scalar else [j for j, foe in enumerate(foes) if not needs_scalar(foe)]
+    if vector:
+        _, variants = expand_variants(unit)
+        foe_columns = StatColumns.from_units([foes[j] for j in vector])
+        if initiating:
+            unit_hp[:, vector], foe_hp[:, vector] = simulate_lean_matrix(variants, foe_columns, terrain=terrain)
+        else:
+            vector_foe_hp, vector_unit_hp = simulate_lean_matrix(foe_columns, variants, terrain=terrain)
+            unit_hp[:, vector], foe_hp[:, vector] = vector_unit_hp.T, vector_foe_hp.T
+    rest = sorted(set(range(len(foes))) - set(vector))
+    if rest:
+        options = {"pure": True, "terrain": terrain}
+        for i, variant in enumerate(variant_units(unit)):
+            for j in rest:
+                if initiating:
+                    result = simulate_battle_lean(variant, foes[j], options)
+                    unit_hp[i, j], foe_hp[i, j] = result.attacker_hp, result.defender_hp
+                else:
+                    result = simulate_battle_lean(foes[j], variant, options)
+                    unit_hp[i, j], foe_hp[i, j] = result.defender_hp, result.attacker_hp
+    return VariantTable(labels, [f.name for f in foes], unit_hp, foe_hp, outcome_codes(unit_hp, foe_hp))
+
+
+__all__ = [
+    'iv_spreads',
+    'iv_label',
+    'iv_stats',
+    'expand_variants',
+    'variant_units',
+    'simulate_variants',
+    'VariantTable',
+]
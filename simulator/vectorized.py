@@ -0,0 +1,349 @@
+"""
+vectorized.py
+-------------
+NumPy batch version of calculations.calculate_damage.
+
+Instead of one attacker/defender pair per call, the stats of a whole roster
+are packed into columnar arrays (one entry per unit) and the damage for
+every pair is computed at once. The kernel follows the same 12-step order
+as calculate_damage and produces the same integers, including the
+truncation that int() applies after each multiplier.
+
+Effect callbacks (Weapon.effects / Skill.effects) are not run here: the
+columns are expected to hold the final in-combat values. needs_scalar()
+picks out units the columns can't describe.
+
+simulate_lean_matrix extends this to whole combat rounds, mirroring
+battle.simulate_battle_lean for every pair at once.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .battle import FOLLOW_UP_SPEED_THRESHOLD
+
+# Color codes used in the `color` column. Anything unknown (including
+# colorless and "no weapon") maps to 0, which never has triangle advantage.
+COLORLESS = 0
+RED = 1
+BLUE = 2
+GREEN = 3
+COLOR_CODES = {'red': RED, 'blue': BLUE, 'green': GREEN, 'colorless': COLORLESS}
+
+# Weapon classes used in the `weapon_class` column.
+PHYSICAL = 0
+MAGICAL = 1  # targets Res (tome, dragon, staff)
+MAGICAL_WEAPON_TYPES = ('tome', 'dragon', 'staff')
+
+# Multiplier table indexed [attacker color, defender color]. Built from the
+# same float expressions as calculate_damage so int() truncates identically.
+_TRIANGLE = {(RED, GREEN): 0.2, (GREEN, BLUE): 0.2, (BLUE, RED): 0.2,
+             (GREEN, RED): -0.2, (BLUE, GREEN): -0.2, (RED, BLUE): -0.2}
+TRIANGLE_MULTIPLIERS = np.array(
+    [[1 + _TRIANGLE.get((a, d), 0) for d in range(4)] for a in range(4)],
+    dtype=np.float64,
+)
+TERRAIN_MULTIPLIER = 1 + 0.3
+MOONBOW_MULTIPLIER = 0.7
+
+
+@dataclass
+class StatColumns:
+    """
+    Columnar stats for a roster, one array entry per unit.
+
+    Attributes:
+        hp, atk, spd, defense, res (np.ndarray[int]): Visible stats.
+        might (np.ndarray[int]): Equipped weapon might (0 if unarmed).
+        color (np.ndarray[int]): Color code of the equipped weapon (see COLOR_CODES).
+        weapon_class (np.ndarray[int]): PHYSICAL or MAGICAL.
+        terrain (np.ndarray[bool]): Unit stands on a defensive tile.
+        moonbow (np.ndarray[bool]): Unit has Moonbow as its special.
+        armed (np.ndarray[bool]): Unit has a weapon (can counter).
+        brave, potent, guaranteed_follow_up, denies_follow_up (np.ndarray[bool]):
+            Combat hooks, resolved once when the columns are built.
+    """
+    hp: np.ndarray
+    atk: np.ndarray
+    spd: np.ndarray
+    defense: np.ndarray
+    res: np.ndarray
+    might: np.ndarray
+    color: np.ndarray
+    weapon_class: np.ndarray
+    terrain: np.ndarray
+    moonbow: np.ndarray
+    armed: np.ndarray
+    brave: np.ndarray
+    potent: np.ndarray
+    guaranteed_follow_up: np.ndarray
+    denies_follow_up: np.ndarray
+
+    def __len__(self):
+        return len(self.atk)
+
+    @classmethod
+    def from_arrays(cls, hp, atk, spd, defense, res, might=None, color=None,
+                    weapon_class=None, terrain=None, moonbow=None, armed=None, brave=None,
+                    potent=None, guaranteed_follow_up=None, denies_follow_up=None):
+        """Build columns from array-likes; optional columns default to zeros."""
+        atk = np.asarray(atk, dtype=np.int64)
+        n = len(atk)
+
+        def col(values, dtype):
+            if values is None:
+                return np.zeros(n, dtype=dtype)
+            return np.asarray(values, dtype=dtype)
+
+        return cls(
+            hp=col(hp, np.int64),
+            atk=atk,
+            spd=col(spd, np.int64),
+            defense=col(defense, np.int64),
+            res=col(res, np.int64),
+            might=col(might, np.int64),
+            color=col(color, np.int64),
+            weapon_class=col(weapon_class, np.int64),
+            terrain=col(terrain, bool),
+            moonbow=col(moonbow, bool),
+            armed=col(armed, bool),
+            brave=col(brave, bool),
+            potent=col(potent, bool),
+            guaranteed_follow_up=col(guaranteed_follow_up, bool),
+            denies_follow_up=col(denies_follow_up, bool),
+        )
+
+    @classmethod
+    def from_units(cls, units):
+        """Pack a list of Unit objects into columns."""
+        rows = [unit_to_row(u) for u in units]
+        if not rows:
+            return cls.from_arrays([], [], [], [], [])
+        return cls.from_arrays(*zip(*rows))
+
+    def take(self, index):
+        """Return the columns for a subset (or reordering) of the units."""
+        return StatColumns(**{name: getattr(self, name)[index] for name in self.__dataclass_fields__})
+
+
+# Hooks simulate_battle calls with the foe (battle.resolve_follow_ups); a
+# callable one can't be folded into a single bool per unit.
+FOE_HOOKS = ('has_guaranteed_follow_up', 'denies_foe_follow_up')
+
+
+def _hook(unit, name):
+    value = getattr(unit, name, False)
+    if not callable(value):
+        return bool(value)
+    if name in FOE_HOOKS:
+        raise ValueError(f"{unit.name}: {name} depends on the foe and has no column value")
+    return bool(value())
+
+
+def _has_effects(unit):
+    weapon = getattr(unit, 'equipped_weapon', None)
+    skills = getattr(unit, 'equipped_skills', None) or {}
+    return any(getattr(item, 'effects', None) for item in (weapon, *skills.values()) if item)
+
+
+def needs_scalar(unit):
+    """
+    True if `unit` has something the columns don't capture: a foe-dependent
+    follow-up hook, adaptive damage, or weapon/skill effects. Such units go
+    through battle.simulate_battle_lean instead.
+    """
+    return (any(callable(getattr(unit, name, False)) for name in FOE_HOOKS)
+            or bool(getattr(unit, 'adaptive_damage', False)) or _has_effects(unit))
+
+
+def unit_to_row(unit):
+    """
+    Flatten one Unit into a StatColumns row, reading the same attributes
+    calculate_damage and simulate_battle_lean read.
+
+    Raises:
+        ValueError: If a FOE_HOOKS hook is callable (see needs_scalar).
+    """
+    weapon = getattr(unit, 'equipped_weapon', None)
+    might = weapon.might if weapon else 0
+    color = COLOR_CODES.get(getattr(weapon, 'color', None), COLORLESS) if weapon else COLORLESS
+    wtype = weapon.weapon_type if weapon else None
+    weapon_class = MAGICAL if wtype and wtype.lower() in MAGICAL_WEAPON_TYPES else PHYSICAL
+    return (
+        unit.hp,
+        unit.atk,
+        unit.spd,
+        unit.defense,
+        unit.res,
+        might,
+        color,
+        weapon_class,
+        bool(getattr(unit, 'on_defensive_tile', False)),
+        getattr(unit, 'special', None) == 'Moonbow',
+        bool(weapon),
+        _hook(unit, 'has_brave_attack'),
+        _hook(unit, 'has_potent_follow_up'),
+        _hook(unit, 'has_guaranteed_follow_up'),
+        _hook(unit, 'denies_foe_follow_up'),
+    )
+
+
+def _attacker_table(attackers):
+    """
+    Steps 1-4, attacker side: effective Atk against each defender color.
+
+    Returns an (n, 4) array; column c is the Atk used against a defender
+    whose color code is c.
+    """
+    # 1. Visible stats + weapon might
+    atk = attackers.atk + attackers.might
+    # 3. Weapon triangle advantage
+    table = (atk[:, None] * TRIANGLE_MULTIPLIERS[attackers.color]).astype(np.int64)
+    # 4. Effectiveness (stub: always 0, int(atk * 1) is a no-op)
+    return table
+
+
+def _attacker_keys(attackers):
+    """Row of the defender table each attacker reads: weapon class x Moonbow."""
+    return attackers.weapon_class * 2 + attackers.moonbow
+
+
+def _defender_table(defenders, terrain=None, adaptive_damage=False):
+    """
+    Steps 2 and 5-7, defender side: the defensive stat as seen by each kind
+    of attacker.
+
+    Returns a (4, m) array; row `weapon_class * 2 + moonbow` holds the stat
+    used against that attacker.
+    """
+    rows = []
+    for weapon_class in (PHYSICAL, MAGICAL):
+        # 2. Defensive stat
+        if adaptive_damage:
+            defense_stat = np.minimum(defenders.defense, defenders.res)
+        elif weapon_class == MAGICAL:
+            defense_stat = defenders.res
+        else:
+            defense_stat = defenders.defense
+        # 5. Terrain
+        on_tile = True if terrain == 'defensive' else defenders.terrain
+        defense_stat = np.where(on_tile, (defense_stat * TERRAIN_MULTIPLIER).astype(np.int64), defense_stat)
+        # 6. Staff modifier (stub: always 1)
+        # 7. Special damage: Moonbow ignores 30% of the defensive stat
+        rows.append(defense_stat)
+        rows.append((defense_stat * MOONBOW_MULTIPLIER).astype(np.int64))
+    return np.stack(rows)
+
+
+def _finish(atk, defense_stat):
+    # 8-10. Fixed damage, percent and fixed reduction (stubs: always 0)
+    # 11. Base damage
+    base_damage = atk - defense_stat
+    # 12. Set negative to zero
+    return np.maximum(base_damage, 0, out=base_damage)
+
+
+def calculate_damage_matrix(attackers, defenders, terrain=None, adaptive_damage=False):
+    """
+    Damage of every attacker against every defender.
+
+    Args:
+        attackers (StatColumns): Attacking units (n rows).
+        defenders (StatColumns): Defending units (m rows).
+        terrain (str): 'defensive' puts every defender on a defensive tile.
+        adaptive_damage (bool): Target the lower of Def/Res.
+
+    Returns:
+        np.ndarray: int64 array of shape (n, m); [i, j] is the damage of
+        attacker i hitting defender j.
+    """
+    atk = _attacker_table(attackers)[:, defenders.color]
+    defense_stat = _defender_table(defenders, terrain, adaptive_damage)[_attacker_keys(attackers)]
+    return _finish(atk, defense_stat)
+
+
+def calculate_damage_pairs(attackers, defenders, terrain=None, adaptive_damage=False):
+    """
+    Damage for aligned pairs: attacker i hits defender i.
+
+    Both StatColumns must have the same length. Returns an int64 array of
+    that length.
+    """
+    if len(attackers) != len(defenders):
+        raise ValueError("attackers and defenders must have the same length")
+    index = np.arange(len(attackers))
+    atk = _attacker_table(attackers)[index, defenders.color]
+    defense_stat = _defender_table(defenders, terrain, adaptive_damage)[_attacker_keys(attackers), index]
+    return _finish(atk, defense_stat)
+
+
+def _strike(hp, damage, brave):
+    """Vectorized battle._strike: one attack, two hits if brave."""
+    hp = np.maximum(hp - damage, 0)
+    return np.where(brave & (hp > 0), np.maximum(hp - damage, 0), hp)
+
+
+def simulate_lean_matrix(attackers, defenders, terrain=None):
+    """
+    Outcome of every attacker initiating combat against every defender.
+
+    Same ordering as battle.simulate_battle_lean (init, counter, follow-up,
+    potent), evaluated with boolean masks over the whole (n, m) grid.
+    Per-unit adaptive damage and weapon/skill effects are not column-encoded
+    and are ignored, so results only match simulate_battle_lean for units
+    where needs_scalar() is False.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Final attacker HP and defender HP,
+        both of shape (n, m).
+    """
+    att_damage = calculate_damage_matrix(attackers, defenders, terrain=terrain)
+    def_damage = calculate_damage_matrix(defenders, attackers, terrain=terrain).T
+    att_hp = np.broadcast_to(attackers.hp[:, None], att_damage.shape)
+    def_hp = np.broadcast_to(defenders.hp[None, :], att_damage.shape)
+    att_brave, att_potent = attackers.brave[:, None], attackers.potent[:, None]
+    def_brave, def_potent = defenders.brave[None, :], defenders.potent[None, :]
+
+    # Follow-ups: guarantee > deny > speed (battle.resolve_follow_ups)
+    spd_diff = attackers.spd[:, None] - defenders.spd[None, :]
+    att_follow_up = attackers.guaranteed_follow_up[:, None] | (
+        ~defenders.denies_follow_up[None, :] & (spd_diff >= FOLLOW_UP_SPEED_THRESHOLD))
+    def_follow_up = defenders.guaranteed_follow_up[None, :] | (
+        ~attackers.denies_follow_up[:, None] & (-spd_diff >= FOLLOW_UP_SPEED_THRESHOLD))
+
+    # Initial attack
+    def_hp = _strike(def_hp, att_damage, att_brave)
+    # Defender counter
+    counter = (def_hp > 0) & defenders.armed[None, :]
+    att_hp = np.where(counter, _strike(att_hp, def_damage, def_brave), att_hp)
+    # Attacker follow-up (+ potent)
+    mask = (att_hp > 0) & (def_hp > 0) & att_follow_up
+    def_hp = np.where(mask, _strike(def_hp, att_damage, att_brave), def_hp)
+    mask &= (def_hp > 0) & att_potent
+    def_hp = np.where(mask, _strike(def_hp, att_damage, att_brave), def_hp)
+    # Defender follow-up (+ potent)
+    mask = (att_hp > 0) & (def_hp > 0) & def_follow_up
+    att_hp = np.where(mask, _strike(att_hp, def_damage, def_brave), att_hp)
+    mask &= (att_hp > 0) & def_potent
+    att_hp = np.where(mask, _strike(att_hp, def_damage, def_brave), att_hp)
+    return att_hp, def_hp
+
+
+def outcome_codes(att_hp, def_hp):
+    """1 where the attacker wins, -1 where the defender wins, 0 otherwise."""
+    return ((def_hp == 0) & (att_hp > 0)).astype(np.int8) - ((att_hp == 0) & (def_hp > 0)).astype(np.int8)
+
+
+__all__ = [
+    'StatColumns',
+    'unit_to_row',
+    'needs_scalar',
+    'calculate_damage_matrix',
+    'calculate_damage_pairs',
+    'simulate_lean_matrix',
+    'outcome_codes',
+    'COLOR_CODES',
+    'PHYSICAL',
+    'MAGICAL',
+]
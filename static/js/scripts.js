@@ -29,25 +29,104 @@ function showUnitInfo(role, unitName) {
   `;
 }
 
+// Fill every <select data-source> from the catalog document, keeping the
+// current choice. Skill selects only list their data-skill-type.
+function populateSelects(form, catalog) {
+  form.querySelectorAll('select[data-source]').forEach(select => {
+    const current = select.value;
+    const skillType = select.dataset.skillType;
+    let items = catalog[select.dataset.source] || [];
+    if (skillType) items = items.filter(item => item.skill_type === skillType);
+    select.options.length = 1;  // keep "None"
+    items.forEach(item => {
+      const option = new Option(item.name, item.name);
+      if (select.dataset.source === 'weapons') {
+        option.title = `Type: ${item.weapon_type}, Mt: ${item.might}, Color: ${item.color}, Rng: ${item.range}`;
+      } else if (item.description) {
+        option.title = item.description;
+      }
+      select.add(option);
+    });
+    select.value = current;
+  });
+}
+
+// The catalog URL is versioned, so after the first visit this is served
+// from the browser cache until the catalog changes.
+function loadCatalog(form) {
+  return fetch(form.dataset.catalogUrl)
+    .then(response => response.json())
+    .then(catalog => {
+      window.units = catalog.units;
+      window.weapons = catalog.weapons;
+      window.skills = catalog.skills;
+      populateSelects(form, catalog);
+      addTooltips();
+      return catalog;
+    });
+}
+
 document.addEventListener('DOMContentLoaded', function() {
   const attackerSelect = document.getElementById('attacker');
   const defenderSelect = document.getElementById('defender');
-  if (attackerSelect) showUnitInfo('attacker', attackerSelect.value);
-  if (defenderSelect) showUnitInfo('defender', defenderSelect.value);
   if (attackerSelect) attackerSelect.addEventListener('change', function() { showUnitInfo('attacker', this.value); });
   if (defenderSelect) defenderSelect.addEventListener('change', function() { showUnitInfo('defender', this.value); });
-
-  // Auto-submit form on any change
   const form = attackerSelect ? attackerSelect.closest('form') : null;
+  if (form && form.dataset.catalogUrl) {
+    loadCatalog(form).then(() => {
+      showUnitInfo('attacker', attackerSelect.value);
+      if (defenderSelect) showUnitInfo('defender', defenderSelect.value);
+    });
+  }
+
+  // Re-simulate on any change and update the result in place
   if (form) {
     form.querySelectorAll('select').forEach(sel => {
       sel.addEventListener('change', function() {
-        form.submit();
+        updateCombatText(form);
       });
     });
   }
 });
 
+// POST one matchup, or an array of them, to /api/simulate. Resolves to the
+// result object, or {results: [...]} for an array (one round trip for any
+// number of candidates). An AbortSignal cancels the request.
+function simulate(matchups, signal) {
+  return fetch('/api/simulate', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify(matchups),
+    signal,
+  }).then(response => response.json());
+}
+
+// Only the latest selection's request may write the result: each change
+// aborts the one before it, so a slow earlier response can't land last.
+let pendingSimulation = null;
+
+function updateCombatText(form) {
+  const combatText = document.getElementById('combat-text');
+  const matchup = Object.fromEntries(new FormData(form));
+  if (pendingSimulation) pendingSimulation.abort();
+  pendingSimulation = null;
+  if (matchup.attacker === 'None' || matchup.defender === 'None') {
+    combatText.value = 'Select options to see combat results.';
+    return;
+  }
+  const controller = new AbortController();
+  pendingSimulation = controller;
+  simulate(matchup, controller.signal)
+    .then(result => {
+      if (!controller.signal.aborted) combatText.value = result.error || result.text;
+    })
+    .catch(() => {
+      if (controller.signal.aborted) return;  // superseded by a newer change
+      form.submit();  // fall back to the server-rendered page
+    })
+    .finally(() => { if (pendingSimulation === controller) pendingSimulation = null; });
+}
+
 function addDropdownTooltip(dropdownId, getDetails) {
   const dropdown = document.getElementById(dropdownId);
   if (!dropdown) return;
@@ -84,8 +163,8 @@ function addDropdownTooltip(dropdownId, getDetails) {
   dropdown.addEventListener('mousemove', moveTooltip);
   dropdown.addEventListener('mouseout', () => { if (tooltip) tooltip.remove(); tooltip = null; });
 }
-// Add tooltips to all dropdowns
-if (window.weapons && window.skills) {
+// Add tooltips to all dropdowns once the catalog is loaded
+function addTooltips() {
   addDropdownTooltip('attacker_weapon', (value) => window.weapons.find(w => w.name === value)?.description);
   addDropdownTooltip('defender_weapon', (value) => window.weapons.find(w => w.name === value)?.description);
   addDropdownTooltip('attacker_special', (value) => window.skills.find(s => s.name === value)?.description);
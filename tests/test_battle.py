@@ -1,7 +1,11 @@
+import random
 import unittest
 from simulator.units import Unit
 from simulator.weapon import Weapon
-from simulator.battle import simulate_battle, BattleResult
+from simulator.battle import simulate_battle, iter_battle, iter_battles, BattleResult
+from simulator.matrix import build_matchup_matrix
+from simulator.skills import Skill
+from simulator import profiling
 
 class TestBattleSimulation(unittest.TestCase):
     def setUp(self):
@@ -53,5 +57,132 @@ class TestBattleSimulation(unittest.TestCase):
         phases = [r.phase for r in result.round_summary]
         self.assertNotIn("follow_up", phases)
 
+    def test_matchup_matrix(self):
+        matrix = build_matchup_matrix([self.attacker, self.defender])
+        self.assertEqual(matrix["units"], ["Eliwood", "Lute"])
+        cell = matrix["results"][0][1]
+        attacker = Unit(name="Eliwood", hp=40, atk=30, spd=40, defense=25, res=20, equipped_weapon=self.sword)
+        defender = Unit(name="Lute", hp=35, atk=32, spd=25, defense=15, res=30, equipped_weapon=self.tome)
+        simulate_battle(attacker, defender)
+        self.assertEqual((cell["attacker_hp"], cell["defender_hp"]), (attacker.hp, defender.hp))
+        # Inputs are left untouched
+        self.assertEqual(self.attacker.hp, 40)
+        self.assertEqual(self.defender.hp, 35)
+
+    def test_pure_mode_leaves_inputs_untouched(self):
+        result = simulate_battle(self.attacker, self.defender, {"pure": True})
+        self.assertEqual((self.attacker.hp, self.defender.hp), (40, 35))
+        mutated = simulate_battle(self.attacker, self.defender)
+        self.assertEqual((result.attacker_hp, result.defender_hp), (self.attacker.hp, self.defender.hp))
+        self.assertEqual((mutated.attacker_hp, mutated.defender_hp), (self.attacker.hp, self.defender.hp))
+        self.assertEqual(result.winner, mutated.winner)
+
+    def test_snapshots(self):
+        self.attacker.has_brave_attack = lambda: True
+        attacker, defender = self.attacker.snapshot(), self.defender.snapshot()
+        self.assertEqual(hash(attacker), hash(self.attacker.snapshot()))
+        with self.assertRaises(Exception):
+            attacker.hp = 1
+        first = simulate_battle(attacker, defender, {"pure": True})
+        second = simulate_battle(attacker, defender, {"pure": True})
+        self.assertEqual(first, second)
+        self.assertEqual(len(first.round_summary[0].hit_damages), 2)
+        self.assertEqual(first, simulate_battle(self.attacker, self.defender))
+
+    def test_lean_matches_full(self):
+        rng = random.Random(7)
+        weapons = [self.sword, self.tome, None]
+        for _ in range(300):
+            units = []
+            for name in ("A", "B"):
+                unit = Unit(name=name, hp=rng.randint(10, 50), atk=rng.randint(20, 60), spd=rng.randint(10, 50),
+                            defense=rng.randint(5, 40), res=rng.randint(5, 40), equipped_weapon=rng.choice(weapons))
+                if rng.random() < 0.3:
+                    unit.has_brave_attack = lambda: True
+                if rng.random() < 0.3:
+                    unit.has_potent_follow_up = lambda: True
+                if rng.random() < 0.2:
+                    unit.denies_foe_follow_up = lambda foe=None: True
+                units.append(unit)
+            full = simulate_battle(*units, {"pure": True})
+            lean = simulate_battle(*units, {"pure": True, "lean": True})
+            self.assertEqual((lean.attacker_hp, lean.defender_hp, lean.winner),
+                             (full.attacker_hp, full.defender_hp, full.winner))
+            self.assertEqual((lean.attacker_ko, lean.defender_ko), (full.attacker_hp == 0, full.defender_hp == 0))
+
+    def test_lean_writes_back_hp_unless_pure(self):
+        lean = simulate_battle(self.attacker, self.defender, {"lean": True})
+        self.assertEqual((self.attacker.hp, self.defender.hp), (lean.attacker_hp, lean.defender_hp))
+
+    def test_profiler_records_phases_and_effects(self):
+        self.sword.effects = [lambda context: None]
+        self.attacker.equipped_skills = {"a": Skill("Death Blow", "a", effects=[lambda context: None])}
+        expected = simulate_battle(self.attacker, self.defender, {"pure": True})
+        profiler = profiling.Profiler()
+        result = simulate_battle(self.attacker, self.defender, {"pure": True, "profiler": profiler})
+        self.assertEqual((result.attacker_hp, result.defender_hp), (expected.attacker_hp, expected.defender_hp))
+        phases = profiler.kinds("phase")
+        self.assertEqual(set(phases), {r.phase.upper() for r in result.round_summary})
+        self.assertEqual(profiler.get("battle", "round").count, 1)
+        damage_calls = sum(len(r.hit_damages) for r in result.round_summary)
+        # Both sides' effects run on every damage calculation.
+        self.assertEqual(profiler.get("weapon", "Iron Sword").count, damage_calls)
+        self.assertEqual(profiler.get("skill", "Death Blow").count, damage_calls)
+        self.assertIn("phase:INIT", profiler.as_dict())
+        self.assertIsNone(profiling.active_profiler())
+
+    def test_global_profiler_switch(self):
+        profiler = profiling.enable()
+        try:
+            simulate_battle(self.attacker, self.defender, {"pure": True, "lean": True})
+            simulate_battle(self.attacker, self.defender, {"pure": True})
+        finally:
+            profiling.disable()
+        simulate_battle(self.attacker, self.defender, {"pure": True})
+        self.assertEqual(profiler.get("battle", "lean").count, 1)
+        self.assertEqual(profiler.get("battle", "round").count, 1)
+        self.assertEqual(profiler.get("weapon", "Fire").count, profiler.get("weapon", "Iron Sword").count)
+
+    def test_iter_battle_streams_detailed_steps(self):
+        self.attacker.has_brave_attack = True
+        expected = simulate_battle(self.attacker, self.defender, {"pure": True, "detailed": True})
+        stream = iter_battle(self.attacker, self.defender, {"pure": True})
+        steps = []
+        while True:
+            try:
+                steps.append(next(stream))
+            except StopIteration as stop:
+                result = stop.value
+                break
+        self.assertEqual(steps, [step for attack in expected.round_summary for step in attack.steps])
+        self.assertEqual((result.attacker_hp, result.defender_hp, result.winner),
+                         (expected.attacker_hp, expected.defender_hp, expected.winner))
+        self.assertTrue(all(attack.steps == [] for attack in result.round_summary))
+
+    def test_iter_battle_stops_early(self):
+        hp = (self.attacker.hp, self.defender.hp)
+        stream = iter_battle(self.attacker, self.defender)
+        first = next(stream)
+        stream.close()
+        self.assertEqual(first.label, "init_Hit1")
+        self.assertEqual((self.attacker.hp, self.defender.hp), hp)
+
+    def test_iter_battle_records_phases(self):
+        profiler = profiling.Profiler()
+        list(iter_battle(self.attacker, self.defender, {"pure": True, "profiler": profiler}))
+        self.assertEqual(profiler.get("phase", "INIT").count, 1)
+        profiler = profiling.enable()
+        try:
+            list(iter_battles([(self.attacker, self.defender)] * 2, {"pure": True}))
+            self.assertEqual(profiler.get("phase", "INIT").count, 2)
+        finally:
+            profiling.disable()
+
+    def test_iter_battles_indexes_steps(self):
+        pairs = [(self.attacker, self.defender), (self.defender, self.attacker)]
+        indexed = list(iter_battles(pairs, {"pure": True}))
+        self.assertEqual([i for i, _ in indexed], sorted(i for i, _ in indexed))
+        self.assertEqual([step for i, step in indexed if i == 1], list(iter_battle(self.defender, self.attacker, {"pure": True})))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,38 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app
+from benchmarks.bench import CASES, compare, run_benchmarks, synthetic_database, synthetic_roster
+
+class TestBenchmarks(unittest.TestCase):
+    def test_roster_is_reproducible(self):
+        first, second = synthetic_roster(20), synthetic_roster(20)
+        self.assertEqual([(u.name, u.hp, u.atk, u.equipped_weapon.might) for u in first],
+                         [(u.name, u.hp, u.atk, u.equipped_weapon.might) for u in second])
+
+    def test_every_case_runs(self):
+        results = run_benchmarks(sizes=[10], repeat=1)
+        self.assertEqual(set(results), {f"{name}[10]" for name in CASES})
+        self.assertTrue(all(seconds > 0 for seconds in results.values()))
+
+    def test_compare_flags_only_slowdowns_past_threshold(self):
+        baseline = {"a[10]": 1.0, "b[10]": 1.0, "c[10]": 1.0}
+        results = {"a[10]": 1.2, "b[10]": 1.3, "c[10]": 0.5, "d[10]": 9.0}
+        self.assertEqual(compare(results, baseline, threshold=0.25), [("b[10]", 1.0, 1.3)])
+
+    def test_index_post_uses_configured_database(self):
+        workdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(workdir, "bench.db")
+            roster = synthetic_roster(5)
+            synthetic_database(path, roster)
+            client = create_app({"DATABASE": path}).test_client()
+            response = client.post("/", data={"attacker": roster[0].name, "defender": roster[1].name})
+            self.assertEqual(response.status_code, 200)
+            self.assertIn(b"Unit 00000 attacks Unit 00001", response.data)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import dataclasses
+import random
+import unittest
+from simulator.units import Unit
+from simulator.weapon import Weapon
+from simulator.battle import simulate_battle, resolve_follow_ups
+from simulator.breakpoints import min_atk_to_orko, min_spd_to_double, min_spd_to_avoid_double, min_stat_to_survive
+
+WEAPONS = [
+    Weapon(name="Iron Sword", might=10, color="red", weapon_type="Sword"),
+    Weapon(name="Fire", might=8, color="blue", range=2, weapon_type="tome"),
+    Weapon(name="Iron Axe", might=10, color="green", weapon_type="Axe"),
+    None,
+]
+
+def brute_force(predicate, limit=300):
+    return next((value for value in range(limit) if predicate(value)), None)
+
+class TestBreakpoints(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(99)
+        self.pairs = []
+        for _ in range(40):
+            pair = []
+            for name in ("A", "B"):
+                unit = Unit(name=name, hp=rng.randint(20, 55), atk=rng.randint(20, 60), spd=rng.randint(15, 45),
+                            defense=rng.randint(10, 45), res=rng.randint(10, 45), equipped_weapon=rng.choice(WEAPONS))
+                if rng.random() < 0.25:
+                    unit.has_brave_attack = True
+                if rng.random() < 0.25:
+                    unit.has_potent_follow_up = True
+                pair.append(unit.snapshot())
+            self.pairs.append(pair)
+
+    def lean(self, attacker, defender):
+        return simulate_battle(attacker, defender, {"pure": True, "lean": True})
+
+    def test_min_atk_to_orko(self):
+        for attacker, defender in self.pairs:
+            expected = brute_force(lambda atk: self.lean(dataclasses.replace(attacker, atk=atk), defender).defender_ko)
+            self.assertEqual(min_atk_to_orko(attacker, defender), expected)
+
+    def test_min_stat_to_survive(self):
+        for unit, foe in self.pairs:
+            stat = "res" if foe.equipped_weapon and foe.equipped_weapon.weapon_type == "tome" else "defense"
+            expected = brute_force(lambda v: not self.lean(foe, dataclasses.replace(unit, **{stat: v})).defender_ko)
+            self.assertEqual(min_stat_to_survive(unit, foe), expected)
+            expected = brute_force(lambda v: not self.lean(dataclasses.replace(unit, **{stat: v}), foe).attacker_ko)
+            self.assertEqual(min_stat_to_survive(unit, foe, unit_attacks=True), expected)
+
+    def test_speed_thresholds(self):
+        for unit, foe in self.pairs:
+            self.assertEqual(min_spd_to_double(unit, foe),
+                             brute_force(lambda spd: resolve_follow_ups(dataclasses.replace(unit, spd=spd), foe)[0]))
+            self.assertEqual(min_spd_to_avoid_double(unit, foe),
+                             brute_force(lambda spd: not resolve_follow_ups(dataclasses.replace(unit, spd=spd), foe)[1]))
+
+    def test_speed_hooks(self):
+        unit, foe = self.pairs[0]
+        self.assertEqual(min_spd_to_double(dataclasses.replace(unit, has_guaranteed_follow_up=True), foe), 0)
+        self.assertIsNone(min_spd_to_double(unit, dataclasses.replace(foe, denies_foe_follow_up=True)))
+        self.assertIsNone(min_spd_to_avoid_double(unit, dataclasses.replace(foe, has_guaranteed_follow_up=True)))
+
+if __name__ == "__main__":
+    unittest.main()
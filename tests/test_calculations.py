@@ -0,0 +1,119 @@
+import random
+import unittest
+from simulator.units import Unit
+from simulator.weapon import Weapon
+from simulator.calculations import calculate_damage, DamageCache, damage_cache_key
+from simulator.battle import simulate_battle
+from simulator.vectorized import StatColumns, calculate_damage_matrix, calculate_damage_pairs, simulate_lean_matrix, outcome_codes
+
+WEAPON_TYPES = ["Sword", "Lance", "Axe", "tome", "staff", "dragon", "RedTome", "bow"]
+COLORS = ["red", "blue", "green", "colorless", None]
+
+
+def random_unit(rng, i):
+    unit = Unit(name=f"Unit{i}", hp=rng.randint(15, 60), atk=rng.randint(10, 70),
+                spd=rng.randint(10, 60), defense=rng.randint(5, 60), res=rng.randint(5, 60))
+    if rng.random() < 0.9:
+        unit.equipped_weapon = Weapon(name=f"W{i}", might=rng.randint(0, 20), color=rng.choice(COLORS),
+                                      weapon_type=rng.choice(WEAPON_TYPES))
+    if rng.random() < 0.3:
+        unit.special = "Moonbow"
+    if rng.random() < 0.3:
+        unit.on_defensive_tile = True
+    return unit
+
+
+class TestVectorizedDamage(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1234)
+        self.units = [random_unit(rng, i) for i in range(60)]
+        self.columns = StatColumns.from_units(self.units)
+
+    def test_matrix_matches_scalar(self):
+        for terrain in (None, "defensive"):
+            for adaptive in (False, True):
+                matrix = calculate_damage_matrix(self.columns, self.columns, terrain=terrain, adaptive_damage=adaptive)
+                for i, attacker in enumerate(self.units):
+                    for j, defender in enumerate(self.units):
+                        expected, _ = calculate_damage(attacker, defender, terrain=terrain, adaptive_damage=adaptive)
+                        self.assertEqual(matrix[i, j], expected, (attacker, defender, terrain, adaptive))
+
+    def test_pairs_match_scalar(self):
+        defenders = self.units[::-1]
+        damage = calculate_damage_pairs(self.columns, StatColumns.from_units(defenders))
+        for attacker, defender, dmg in zip(self.units, defenders, damage):
+            self.assertEqual(dmg, calculate_damage(attacker, defender)[0])
+
+    def test_pairs_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            calculate_damage_pairs(self.columns, self.columns.take(slice(0, 5)))
+
+    def test_from_arrays_defaults(self):
+        columns = StatColumns.from_arrays(hp=[40], atk=[50], spd=[30], defense=[20], res=[10])
+        self.assertEqual(calculate_damage_matrix(columns, columns)[0, 0], 30)
+
+    def test_lean_matrix_matches_scalar(self):
+        rng = random.Random(77)
+        for unit in self.units:
+            unit.has_brave_attack = rng.random() < 0.25
+            unit.has_potent_follow_up = rng.random() < 0.25
+            unit.has_guaranteed_follow_up = rng.random() < 0.1
+            unit.denies_foe_follow_up = rng.random() < 0.1
+        columns = StatColumns.from_units(self.units)
+        for terrain in (None, "defensive"):
+            att_hp, def_hp = simulate_lean_matrix(columns, columns, terrain=terrain)
+            codes = outcome_codes(att_hp, def_hp)
+            for i, attacker in enumerate(self.units):
+                for j, defender in enumerate(self.units):
+                    lean = simulate_battle(attacker, defender, {"lean": True, "pure": True, "terrain": terrain})
+                    self.assertEqual((att_hp[i, j], def_hp[i, j]), (lean.attacker_hp, lean.defender_hp))
+                    expected = 1 if lean.defender_ko and not lean.attacker_ko else (-1 if lean.attacker_ko and not lean.defender_ko else 0)
+                    self.assertEqual(codes[i, j], expected)
+
+class TestDamageCache(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(5)
+        self.units = [random_unit(rng, i) for i in range(10)]
+
+    def test_matches_calculate_damage_and_counts(self):
+        cache = DamageCache()
+        for _ in range(2):
+            for attacker in self.units:
+                for defender in self.units:
+                    self.assertEqual(cache.calculate(attacker, defender), calculate_damage(attacker, defender))
+        self.assertEqual(cache.info()["misses"], len(cache))
+        self.assertGreaterEqual(cache.info()["hits"], 100)
+
+    def test_lru_eviction_and_clear(self):
+        cache = DamageCache(maxsize=2)
+        a, b, c, d = self.units[:4]
+        cache.calculate(a, b)
+        cache.calculate(a, c)
+        cache.calculate(a, b)  # refresh (a, b)
+        cache.calculate(a, d)  # evicts (a, c)
+        self.assertEqual(len(cache), 2)
+        cache.calculate(a, b)
+        self.assertEqual(cache.hits, 2)
+        cache.calculate(a, c)
+        self.assertEqual(cache.misses, 4)
+        cache.clear()
+        self.assertEqual(cache.info(), {"hits": 0, "misses": 0, "size": 0, "maxsize": 2})
+
+    def test_effects_are_part_of_key(self):
+        attacker, defender = self.units[0], self.units[1]
+        key = damage_cache_key(attacker, defender)
+        attacker.equipped_weapon = Weapon(name="Fx", might=attacker.equipped_weapon.might, color=attacker.equipped_weapon.color,
+                                          weapon_type=attacker.equipped_weapon.weapon_type, effects=[lambda context: None])
+        self.assertNotEqual(damage_cache_key(attacker, defender), key)
+
+    def test_simulate_battle_with_cache(self):
+        cache = DamageCache()
+        for attacker in self.units:
+            for defender in self.units:
+                for lean in (False, True):
+                    expected = simulate_battle(attacker, defender, {"pure": True, "lean": lean})
+                    self.assertEqual(simulate_battle(attacker, defender, {"pure": True, "lean": lean, "damage_cache": cache}), expected)
+        self.assertGreater(cache.hits, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import shutil
+import tempfile
+import unittest
+from simulator.catalog import Catalog
+from simulator.data_loader import FEHDatabase
+
+class TestCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db = FEHDatabase(os.path.join(self.tmpdir, "feh.db"))
+        unit_id = self.db.add_unit({"name": "Ike", "hp": 42, "atk": 35, "spd": 25, "defense": 32, "res": 18,
+                                    "unit_type": "infantry"})
+        self.db.add_unit({"name": "Lyn", "hp": 35, "atk": 33, "spd": 36, "defense": 18, "res": 28,
+                          "unit_type": "infantry"})
+        weapon_id = self.db.add_weapon({"name": "Ragnell", "might": 16, "color": "red", "range": 1, "weapon_type": "Sword"})
+        self.db.add_skill({"name": "Aether", "skill_type": "Special"})
+        self.db.add_skill({"name": "Moonbow", "skill_type": "Special"})
+        self.db.add_skill({"name": "Death Blow 3", "skill_type": "A"})
+        self.db.conn.execute("INSERT INTO unit_weapons (unit_id, weapon_id) VALUES (?, ?)", (unit_id, weapon_id))
+        self.db.conn.commit()
+        self.catalog = Catalog.load(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_name_lookup_ignores_case(self):
+        self.assertEqual(self.catalog.weapon("ragnell")["might"], 16)
+        self.assertEqual(self.catalog.unit("LYN")["name"], "Lyn")
+        self.assertIsNone(self.catalog.skill("Galeforce"))
+        self.assertIsNone(self.catalog.skill(None))
+
+    def test_type_indexes(self):
+        self.assertEqual([s["name"] for s in self.catalog.skills_by_type["Special"]], ["Aether", "Moonbow"])
+        self.assertEqual([w["name"] for w in self.catalog.weapons_by_type["Sword"]], ["Ragnell"])
+        self.assertEqual(len(self.catalog.units_by_unit_type["infantry"]), 2)
+
+    def test_build_unit_is_fresh_and_equipped(self):
+        ike = self.catalog.build_unit("Ike")
+        self.assertEqual(ike.equipped_weapon.name, "Ragnell")
+        ike.hp = 1
+        self.assertEqual(self.catalog.build_unit("Ike").hp, 42)
+        self.assertIsNone(self.catalog.build_unit("Lyn").equipped_weapon)
+        self.assertEqual([u.name for u in self.catalog.build_units()], ["Ike", "Lyn"])
+
+    def test_linked_weapons_and_skills_reload(self):
+        ike = self.catalog.unit("Ike")["id"]
+        urvan = self.db.add_weapon({"name": "Urvan", "might": 16, "color": "green", "weapon_type": "Axe"})
+        self.db.conn.execute("INSERT INTO unit_weapons (unit_id, weapon_id) VALUES (?, ?)", (ike, urvan))
+        self.db.conn.execute("INSERT INTO unit_skills (unit_id, skill_id) VALUES (?, ?)",
+                             (ike, self.catalog.skill("Aether")["id"]))
+        self.db.conn.commit()
+        catalog = self.catalog.reload(self.db)
+        ike_unit = catalog.build_unit("Ike")
+        self.assertEqual([w.name for w in ike_unit.weapons], ["Ragnell", "Urvan"])
+        self.assertEqual(ike_unit.equipped_weapon.name, "Ragnell")
+        self.assertEqual([s.name for s in ike_unit.learned_skills], ["Aether"])
+        self.assertEqual(self.catalog.build_unit("Ike").learned_skills, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
 import unittest
 import os
-from simulator.data_loader import FEHDatabase, DB_PATH
+import shutil
+import sqlite3
+import tempfile
+import threading
+from simulator.migrations import SCHEMA_VERSION, fts5_available, migrate, schema_version
+from simulator.data_loader import FEHDatabase, DB_PATH, ConnectionPool, shared_database, close_shared_databases, get_weapon_by_name
 
 class TestFEHDatabase(unittest.TestCase):
     def setUp(self):
@@ -55,5 +60,198 @@ class TestFEHDatabase(unittest.TestCase):
         skills = self.db.get_skills()
         self.assertTrue(any(s["id"] == skill_id and s["name"] == "TestSkill" for s in skills))
 
+    def test_load_units_with_linked_weapons_and_skills(self):
+        ike = self.db.add_unit({"name": "Ike", "hp": 42, "atk": 35, "spd": 25, "defense": 32, "res": 18})
+        self.db.add_unit({"name": "Lyn", "hp": 35, "atk": 33, "spd": 36, "defense": 18, "res": 28})
+        ragnell = self.db.add_weapon({"name": "Ragnell", "might": 16, "color": "red"})
+        urvan = self.db.add_weapon({"name": "Urvan", "might": 16, "color": "green"})
+        aether = self.db.add_skill({"name": "Aether", "skill_type": "Special"})
+        self.db.conn.executemany("INSERT INTO unit_weapons (unit_id, weapon_id) VALUES (?, ?)",
+                                 [(ike, urvan), (ike, ragnell)])
+        self.db.conn.execute("INSERT INTO unit_skills (unit_id, skill_id) VALUES (?, ?)", (ike, aether))
+        self.db.conn.commit()
+        self.assertEqual([w["name"] for w in self.db.get_unit_weapons()[ike]], ["Urvan", "Ragnell"])
+        ike_unit, lyn_unit = self.db.load_units()
+        self.assertEqual([w.name for w in ike_unit.weapons], ["Urvan", "Ragnell"])
+        self.assertEqual(ike_unit.equipped_weapon.name, "Urvan")
+        self.assertEqual([(s.name, s.skill_type) for s in ike_unit.learned_skills], [("Aether", "Special")])
+        self.assertEqual((lyn_unit.weapons, lyn_unit.learned_skills, lyn_unit.equipped_weapon), ([], [], None))
+
+class TestConnectionReuse(unittest.TestCase):
+    def setUp(self):
+        self.test_db_path = str(DB_PATH).replace('feh.db', 'test_feh.db')
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def tearDown(self):
+        close_shared_databases()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def test_pool_reuses_connections(self):
+        pool = ConnectionPool(self.test_db_path, size=1)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertIsNot(first.conn, second.conn)
+        first.close()
+        second.close()  # pool is full, so this one really closes
+        self.assertIs(pool.acquire(), first)
+        pool.close()
+
+    def test_pool_rolls_back_on_release(self):
+        pool = ConnectionPool(self.test_db_path)
+        db = pool.acquire()
+        db.conn.execute("INSERT INTO skills (name) VALUES ('Uncommitted')")
+        db.close()
+        self.assertEqual(pool.acquire().get_skills(), [])
+        pool.close()
+
+    def test_pooled_connection_moves_between_threads(self):
+        pool = ConnectionPool(self.test_db_path)
+        db = pool.acquire()
+        db.close()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(pool.acquire().get_units()))
+        thread.start()
+        thread.join()
+        self.assertEqual(results, [[]])
+        pool.close()
+
+    def test_shared_database_is_per_thread(self):
+        db = shared_database(self.test_db_path)
+        self.assertIs(shared_database(self.test_db_path), db)
+        other = []
+        thread = threading.Thread(target=lambda: other.append(shared_database(self.test_db_path)))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], db)
+        db.add_weapon({"name": "Shared", "might": 5})
+        self.assertEqual(get_weapon_by_name("Shared", db=db)["might"], 5)
+        self.assertIsNone(get_weapon_by_name("Missing", db=db))
+
+class TestPagination(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "feh.db")
+        self.db = FEHDatabase(self.path)
+        for i in range(7):
+            self.db.add_unit({"name": f"Unit {i}", "hp": 40, "atk": 30, "spd": 30, "defense": 20, "res": 20,
+                              "unit_type": "flier" if i % 2 else "armor"})
+        self.db.add_skill({"name": "Moonbow", "skill_type": "Special", "description": "Reduces foe's Def/Res by 30%."})
+        self.db.add_skill({"name": "Luna", "skill_type": "Special", "description": "Halves foe's Def/Res."})
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def names(self, page):
+        return [row["name"] for row in page.rows]
+
+    def test_keyset_pages_forward_and_back(self):
+        first = self.db.page("units", limit=3)
+        self.assertEqual((self.names(first), first.before), (["Unit 0", "Unit 1", "Unit 2"], None))
+        second = self.db.page("units", after=first.after, limit=3)
+        self.assertEqual(self.names(second), ["Unit 3", "Unit 4", "Unit 5"])
+        last = self.db.page("units", after=second.after, limit=3)
+        self.assertEqual((self.names(last), last.after), (["Unit 6"], None))
+        back = self.db.page("units", before=last.before, limit=3)
+        self.assertEqual(back, second)
+        self.assertEqual(self.db.page("units", before=back.before, limit=3), first)
+
+    def test_filters_and_search_run_in_sql(self):
+        self.assertEqual(self.names(self.db.page("units", limit=50, unit_type="flier")), ["Unit 1", "Unit 3", "Unit 5"])
+        self.assertEqual(self.names(self.db.page("units", search="arm", limit=2)), ["Unit 0", "Unit 2"])
+        self.assertEqual(self.names(self.db.page("skills", limit=50, search="def/res halve")), ["Luna"])
+        with self.assertRaises(ValueError):
+            self.db.page("units", limit=50, color="red")
+
+    def test_search_index_follows_writes(self):
+        self.db.conn.execute("UPDATE skills SET description = 'Pierces armor.' WHERE name = 'Luna'")
+        self.db.delete_skill("Moonbow")
+        self.db.conn.commit()
+        self.assertEqual(self.names(self.db.page("skills", limit=50, search="foe")), [])
+        self.assertEqual(self.names(self.db.page("skills", limit=50, search="pierce")), ["Luna"])
+
+    def test_name_search_without_fts(self):
+        for event in ("insert", "update", "delete"):
+            self.db.conn.execute(f"DROP TRIGGER trg_units_fts_{event}")
+        self.db.conn.execute("DROP TABLE units_fts")
+        self.db.conn.commit()
+        db = FEHDatabase(self.path)
+        self.assertEqual(self.names(db.page("units", limit=50, search="it 4")), ["Unit 4"])
+        self.assertEqual(self.names(db.page("units", limit=50, search="4%")), [])
+        db.close()
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "feh.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_new_database_is_current_and_not_migrated_again(self):
+        db = FEHDatabase(self.path)
+        self.assertEqual(schema_version(db.conn), SCHEMA_VERSION)
+        self.assertEqual(migrate(db.conn), 0)
+        db.close()
+
+    def test_upgrades_shipped_database(self):
+        shutil.copyfile(DB_PATH, self.path)
+        conn = sqlite3.connect(self.path)
+        before = conn.execute("SELECT name FROM units ORDER BY id").fetchall()
+        self.assertEqual(migrate(conn), SCHEMA_VERSION - schema_version(sqlite3.connect(DB_PATH)))
+        self.assertEqual(conn.execute("SELECT name FROM units ORDER BY id").fetchall(), before)
+        if fts5_available(conn):
+            indexed = conn.execute("SELECT rowid FROM units_fts ORDER BY rowid").fetchall()
+            self.assertEqual(indexed, conn.execute("SELECT id FROM units ORDER BY id").fetchall())
+        conn.close()
+
+    def test_adds_weapon_type_to_old_units_table(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE units (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, hp INTEGER NOT NULL, "
+                     "atk INTEGER NOT NULL, spd INTEGER NOT NULL, defense INTEGER NOT NULL, res INTEGER NOT NULL, "
+                     "unit_type TEXT, image_url TEXT)")
+        conn.commit()
+        migrate(conn)
+        self.assertIn("weapon_type", [row[1] for row in conn.execute("PRAGMA table_info(units)")])
+        conn.close()
+
+    def test_duplicate_names_block_index_migration(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute("CREATE TABLE skills (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, "
+                     "description TEXT, skill_type TEXT, effect_json TEXT)")
+        conn.execute("INSERT INTO skills (name) VALUES ('Moonbow'), ('moonbow')")
+        conn.commit()
+        with self.assertRaises(sqlite3.IntegrityError):
+            migrate(conn)
+        self.assertEqual(schema_version(conn), 0)
+        conn.close()
+
+    def test_catalog_versions_track_each_table(self):
+        db = FEHDatabase(self.path)
+        before = db.catalog_versions()
+        db.add_skill({"name": "Vantage", "skill_type": "B"})
+        db.conn.execute("UPDATE skills SET description = 'x'")  # writes outside FEHDatabase count too
+        db.conn.commit()
+        after = db.catalog_versions()
+        self.assertEqual(after["skills"], before["skills"] + 2)
+        self.assertEqual({t: v for t, v in after.items() if t != "skills"},
+                         {t: v for t, v in before.items() if t != "skills"})
+        db.close()
+
+    def test_name_lookups_use_index(self):
+        db = FEHDatabase(self.path)
+        db.add_weapon({"name": "Ragnell", "might": 16})
+        with self.assertRaises(sqlite3.IntegrityError):
+            db.add_weapon({"name": "RAGNELL", "might": 16})
+        self.assertEqual(db.get_weapon_by_name("ragnell")["name"], "Ragnell")
+        for sql in ("SELECT * FROM weapons WHERE name = ? COLLATE NOCASE",
+                    "DELETE FROM units WHERE name = ? COLLATE NOCASE",
+                    "SELECT * FROM unit_weapons WHERE unit_id = ?"):
+            plan = " ".join(row[-1] for row in db.conn.execute("EXPLAIN QUERY PLAN " + sql, ("x",)))
+            self.assertIn("USING", plan, sql)
+        db.close()
+
 if __name__ == "__main__":
     unittest.main()
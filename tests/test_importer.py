@@ -0,0 +1,82 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from simulator.data_loader import FEHDatabase
+from simulator.importer import _iter_json_array, import_files, import_records, main, read_records
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "feh.db")
+        self.db = FEHDatabase(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+    def links(self, table, column):
+        return sorted(self.db.conn.execute(
+            f"SELECT u.name, x.name FROM {table} l JOIN units u ON u.id = l.unit_id "
+            f"JOIN {column} x ON x.id = l.{column[:-1]}_id").fetchall(), key=tuple)
+
+    def test_imports_all_formats_and_links(self):
+        weapons = self.write("weapons.csv", "name,might,color,range,weapon_type\nRagnell,16,red,1,Sword\nMystletainn,16,red,1,Sword\n")
+        skills = self.write("catalog.jsonl", "\n".join(json.dumps(r) for r in [
+            {"kind": "skills", "name": "Aether", "skill_type": "Special", "effect_json": {"heal": 0.5}},
+            {"kind": "skills", "name": "Death Blow 3", "skill_type": "A"},
+        ]))
+        units = self.write("units.json", json.dumps([
+            {"name": "Ike", "hp": 42, "atk": 35, "spd": 25, "defense": 32, "res": 18,
+             "weapons": ["ragnell"], "skills": ["Aether", "Death Blow 3", "Missing"]},
+            {"name": "Eldigan", "hp": 43, "atk": 35, "spd": 26, "defense": 30, "res": 17, "weapon": "Mystletainn"},
+        ], indent=1))
+        report = import_files(self.db, [units, skills, weapons])
+        self.assertEqual((report.units, report.weapons, report.skills), (2, 2, 2))
+        self.assertEqual((report.unit_weapons, report.unit_skills), (2, 2))
+        self.assertEqual(report.unresolved, [("Ike", "Missing")])
+        self.assertEqual([tuple(r) for r in self.links("unit_weapons", "weapons")],
+                         [("Eldigan", "Mystletainn"), ("Ike", "Ragnell")])
+        effect_json = self.db.conn.execute("SELECT effect_json FROM skills WHERE name = 'Aether'").fetchone()[0]
+        self.assertEqual(json.loads(effect_json), {"heal": 0.5})
+
+    def test_reimport_upserts_and_replaces_links(self):
+        import_records(self.db, {
+            "weapons": [{"name": "Iron Sword", "might": 6}, {"name": "Silver Sword", "might": 11}],
+            "units": [{"name": "Alfonse", "hp": 40, "atk": 30, "spd": 30, "defense": 25, "res": 20, "weapons": ["Iron Sword"]}],
+        })
+        report = import_records(self.db, {
+            "units": [{"name": "ALFONSE", "hp": 43, "atk": 35, "spd": 25, "defense": 32, "res": 22,
+                       "weapons": ["Silver Sword", "silver sword"]}],
+        }, chunk_size=1)
+        units = self.db.get_units()
+        self.assertEqual([(u["name"], u["hp"]) for u in units], [("ALFONSE", 43)])
+        self.assertEqual(report.unit_weapons, 1)
+        self.assertEqual([tuple(r) for r in self.links("unit_weapons", "weapons")], [("ALFONSE", "Silver Sword")])
+
+    def test_streams_json_array_in_small_chunks(self):
+        path = self.write("skills.json", json.dumps([{"name": f"Skill {i}", "description": "a, [b] {c}"} for i in range(50)]))
+        with open(path, encoding="utf-8") as f:
+            records = list(_iter_json_array(f, chunk_size=7))
+        self.assertEqual([r["name"] for r in records], [f"Skill {i}" for i in range(50)])
+        self.assertEqual([k for k, _ in read_records(path)], ["skills"] * 50)
+
+    def test_bad_record_reports_error(self):
+        path = self.write("units.csv", "name,hp\nBroken,40\n")
+        self.assertEqual(main(["--db", self.db_path, path]), 1)
+        self.assertEqual(self.db.get_units(), [])
+
+    def test_cli(self):
+        path = self.write("extra.csv", "name,might\nBrave Sword+,8\n")
+        self.assertEqual(main(["--db", self.db_path, "--kind", "weapons", path]), 0)
+        self.assertEqual(self.db.get_weapon_by_name("brave sword+")["might"], 8)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+from simulator.units import Unit
+from simulator.weapon import Weapon
+from simulator.skills import Skill
+from simulator.loadout import Build, equip_build, optimize_loadout, slot_options
+
+class TestLoadout(unittest.TestCase):
+    def setUp(self):
+        self.weak = Weapon(name="Iron Sword", might=6, color="red", weapon_type="Sword")
+        self.strong = Weapon(name="Silver Sword", might=15, color="red", weapon_type="Sword")
+        self.lance = Weapon(name="Silver Lance", might=15, color="blue", weapon_type="Lance")
+        self.moonbow = Skill(name="Moonbow", skill_type="Special")
+        self.bowed = Skill(name="Bow Only", skill_type="A", weapon_restrictions=["Bow"])
+        self.unit = Unit(name="Eliwood", hp=40, atk=30, spd=30, defense=25, res=20,
+                         weapon_type="Sword", equipped_weapon=self.weak)
+        tome = Weapon(name="Fire", might=8, color="blue", range=2, weapon_type="tome")
+        self.roster = [
+            Unit(name=f"Foe{i}", hp=30 + 4 * i, atk=30, spd=25, defense=20 + 3 * i, res=20, equipped_weapon=tome)
+            for i in range(6)
+        ]
+
+    def test_slot_options(self):
+        options = slot_options(self.unit, [self.weak, self.strong, self.lance], [self.moonbow, self.bowed])
+        self.assertEqual(options["weapon"], [self.weak, self.strong])
+        self.assertEqual(options["special"], [self.moonbow])
+        self.assertNotIn("a", options)
+
+    def test_equip_build(self):
+        build = Build().with_slot("weapon", self.strong).with_slot("special", self.moonbow)
+        snapshot = equip_build(self.unit, build)
+        self.assertIs(snapshot.equipped_weapon, self.strong)
+        self.assertEqual(snapshot.special, "Moonbow")
+        self.assertIs(equip_build(self.unit, Build()).equipped_weapon, self.weak)
+
+    def test_optimize_picks_strongest_build(self):
+        result = optimize_loadout(self.unit, self.roster, weapons=[self.weak, self.strong, self.lance],
+                                  skills=[self.moonbow], beam_width=3)
+        self.assertEqual(result.best.build.describe(), {"weapon": "Silver Sword", "special": "Moonbow"})
+        baseline = optimize_loadout(self.unit, self.roster)
+        self.assertGreater(result.best.wins, baseline.best.wins)
+        with mock.patch("simulator.loadout.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+            parallel = optimize_loadout(self.unit, self.roster, weapons=[self.weak, self.strong, self.lance],
+                                        skills=[self.moonbow], beam_width=3, processes=2)
+        self.assertEqual(pool.call_count, 1)
+        self.assertEqual(parallel.best.score(), result.best.score())
+
+    def test_empty_roster(self):
+        self.assertIsNone(optimize_loadout(self.unit, []))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,314 @@
+import unittest
+import gzip
+import html
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+from app import create_app
+from simulator.data_loader import FEHDatabase, DB_PATH
+from web.utils import CatalogCache, PrecompressedPayload, ResponseCache, get_db
+
+class CatalogAppTestCase(unittest.TestCase):
+    """Runs the app on a temporary copy of data/feh.db so tests never write the real one."""
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, "feh.db")
+        shutil.copyfile(DB_PATH, self.db_path)
+        self.app = create_app({"DATABASE": self.db_path})
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.app.extensions["feh_db_pool"].close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+class TestMatrixRoutes(CatalogAppTestCase):
+
+    def test_matrix_page(self):
+        response = self.client.get("/matrix")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Matchup Matrix", response.data)
+
+    def test_matrix_json(self):
+        data = self.client.get("/api/matrix").get_json()
+        self.assertEqual(len(data["results"]), len(data["units"]))
+        for row in data["results"]:
+            self.assertEqual(len(row), len(data["units"]))
+
+class TestRequestConnections(CatalogAppTestCase):
+    def test_one_connection_per_request_returned_on_teardown(self):
+        pool = self.app.extensions["feh_db_pool"]
+        with self.app.test_request_context("/"):
+            db = get_db()
+            self.assertIs(get_db(), db)
+        self.assertEqual(pool._idle, [db])
+        with self.app.test_request_context("/"):
+            self.assertIs(get_db(), db)
+
+    def test_pages_reuse_pooled_connection(self):
+        for path in ("/", "/units", "/weapons"):
+            self.assertEqual(self.client.get(path).status_code, 200)
+        self.assertEqual(len(self.app.extensions["feh_db_pool_readonly"]._idle), 1)
+        self.assertEqual(self.app.extensions["feh_db_pool"]._idle, [])
+
+class TestCatalogRoutes(CatalogAppTestCase):
+    def test_index_only_checks_catalog_version_once_cached(self):
+        self.assertEqual(self.client.get("/").status_code, 200)
+        pool = self.app.extensions["feh_db_pool_readonly"]
+        statements = []
+        for db in pool._idle:
+            db.conn.set_trace_callback(statements.append)
+        idle = list(pool._idle)
+        self.assertEqual(self.client.get("/").status_code, 200)
+        self.assertEqual(self.client.post("/", data={"attacker": "x", "defender": "y"}).status_code, 200)
+        self.assertEqual(statements, ["SELECT table_name, version FROM catalog_version"] * 2)
+        self.assertEqual(pool._idle, idle)
+
+    def test_write_from_another_process_reloads_changed_table(self):
+        self.client.get("/")
+        catalog = self.app.extensions["feh_catalog"]._catalog
+        other = FEHDatabase(self.db_path)  # stands in for another worker: no in-process signal
+        other.conn.execute("INSERT INTO skills (name, skill_type) VALUES ('Written Elsewhere', 'B')")
+        other.conn.commit()
+        other.close()
+        self.assertIn(b"Written Elsewhere", self.client.get("/api/catalog").data)
+        reloaded = self.app.extensions["feh_catalog"]._catalog
+        self.assertIsNot(reloaded.skills, catalog.skills)
+        self.assertIs(reloaded.units, catalog.units)
+        self.assertIs(reloaded.weapons, catalog.weapons)
+
+    def test_simulate_with_skills(self):
+        response = self.client.post("/", data={"attacker": "x", "defender": "y", "attacker_special": "Moonbow"})
+        self.assertEqual(response.status_code, 200)
+        with self.app.app_context():
+            names = [u["name"] for u in get_db().get_units()[:2]]
+            get_db().add_skill({"name": "Death Blow 3", "skill_type": "A"})
+        matchup = {"attacker": names[0], "defender": names[1], "attacker_a": "Death Blow 3", "defender_a": "death blow 3"}
+        page = self.client.post("/", data=matchup).data.decode()
+        text = self.client.post("/api/simulate", json=matchup).get_json()["text"]
+        self.assertIn(f"{names[0]} attacks {names[1]}", text)
+        self.assertIn(html.escape(text, quote=False), page)
+
+    def test_admin_write_refreshes_catalog(self):
+        self.client.get("/")
+        self.client.post("/admin?type=skill", data={"name": "Catalog Test Skill", "skill_type": "A"})
+        self.assertIn(b"Catalog Test Skill", self.client.get("/api/catalog").data)
+
+class TestListRoutes(CatalogAppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.app.config["PAGE_SIZE"] = 2
+        db = FEHDatabase(self.db_path)
+        for i in range(3):
+            db.add_unit({"name": f"Zz Flier {i}", "hp": 40, "atk": 30, "spd": 30, "defense": 20, "res": 20,
+                         "unit_type": "flier"})
+        db.add_skill({"name": "Galeforce", "skill_type": "Special", "description": "Grants another action."})
+        db.close()
+
+    def test_filtered_units_paginate(self):
+        first = self.client.get("/units?unit_type=flier")
+        self.assertIn(b"Zz Flier 1", first.data)
+        self.assertNotIn(b"Zz Flier 2", first.data)
+        self.assertIn(b"/units?unit_type=flier&amp;after=Zz+Flier+1", first.data)
+        second = self.client.get("/units?unit_type=flier&after=Zz+Flier+1")
+        self.assertIn(b"Zz Flier 2", second.data)
+        self.assertIn(b"before=Zz+Flier+2", second.data)
+        self.assertNotIn(b"after=", second.data)
+
+    def test_search_lists(self):
+        self.assertIn(b"Zz Flier 0", self.client.get("/admin/units?search=flier").data)
+        self.assertIn(b"Galeforce", self.client.get("/skills?search=another+action").data)
+        self.assertNotIn(b"Galeforce", self.client.get("/skills?search=nothing").data)
+        self.assertEqual(self.client.get("/weapons?color=red").status_code, 200)
+
+class TestCatalogResource(CatalogAppTestCase):
+    def test_page_links_versioned_catalog_instead_of_embedding_it(self):
+        page = self.client.get("/").data.decode()
+        with self.app.app_context():
+            names = [u["name"] for u in get_db().get_units()]
+        for name in names:
+            self.assertNotIn(name, page)
+        url = re.search(r'data-catalog-url="([^"]+)"', page).group(1).replace("&amp;", "&")
+        response = self.client.get(url)
+        self.assertEqual([u["name"] for u in response.get_json()["units"]], names)
+        self.assertEqual(response.headers["Cache-Control"], "public, max-age=31536000, immutable")
+
+    def test_etag_and_gzip(self):
+        plain = self.client.get("/api/catalog")
+        self.assertEqual(plain.headers["Cache-Control"], "no-cache")
+        etag = plain.headers["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertEqual(self.client.get("/api/catalog", headers={"If-None-Match": etag}).status_code, 304)
+        packed = self.client.get("/api/catalog", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(packed.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", packed.headers["Vary"])
+        self.assertEqual(gzip.decompress(packed.data), plain.data)
+        self.assertNotEqual(packed.headers["ETag"], etag)
+
+    def test_new_version_after_catalog_write(self):
+        etag = self.client.get("/api/catalog").headers["ETag"]
+        self.client.post("/admin?type=skill", data={"name": "Versioned Skill", "skill_type": "A"})
+        response = self.client.get("/api/catalog", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Versioned Skill", response.data)
+
+class TestResponseCache(CatalogAppTestCase):
+    def cache(self):
+        return self.app.extensions["feh_response_cache"]
+
+    def test_conditional_get(self):
+        for path in ("/units", "/weapons", "/about", "/matrix", "/"):
+            first = self.client.get(path)
+            self.assertEqual(first.status_code, 200, path)
+            self.assertEqual(first.headers["Cache-Control"], "no-cache")
+            etag, modified = first.headers["ETag"], first.headers["Last-Modified"]
+            self.assertEqual(self.client.get(path, headers={"If-None-Match": etag}).status_code, 304, path)
+            self.assertEqual(self.client.get(path, headers={"If-Modified-Since": modified}).status_code, 304, path)
+            stale = self.client.get(path, headers={"If-None-Match": '"other"', "If-Modified-Since": modified})
+            self.assertEqual(stale.status_code, 200, path)
+
+    def test_hits_skip_rendering_and_key_on_query(self):
+        body = self.client.get("/units?q=a").data
+        misses = self.cache().misses
+        self.assertEqual(self.client.get("/units?q=a").data, body)
+        self.assertEqual(self.cache().misses, misses)
+        self.client.get("/units?q=b")
+        self.assertEqual(self.cache().misses, misses + 1)
+
+    def test_catalog_write_invalidates(self):
+        etag = self.client.get("/skills").headers["ETag"]
+        self.client.post("/admin?type=skill", data={"name": "Cached Skill", "skill_type": "A"})
+        response = self.client.get("/skills", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Cached Skill", response.data)
+
+    def test_post_bypasses_cache(self):
+        with self.app.app_context():
+            names = [u["name"] for u in get_db().get_units()[:2]]
+        self.client.get("/")
+        entries = len(self.cache())
+        response = self.client.post("/", data={"attacker": names[0], "defender": names[1]})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response.headers)
+        self.assertEqual(len(self.cache()), entries)
+
+    def test_bounds(self):
+        cache = ResponseCache(max_entries=2, max_bytes=10_000)
+        for key in "abc":
+            cache.put(key, PrecompressedPayload(key.encode() * 100, "text/plain"), None)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        cache.put("big", PrecompressedPayload(os.urandom(20_000), "text/plain"), None)
+        self.assertIsNone(cache.get("big"))
+        self.assertEqual(len(cache), 2)
+
+class TestSimulateApi(CatalogAppTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.app.app_context():
+            self.names = [u["name"] for u in get_db().get_units()[:2]]
+            self.weapon = get_db().get_weapons()[0]["name"]
+
+    def test_single_matchup(self):
+        response = self.client.post("/api/simulate", json={
+            "attacker": self.names[0], "defender": self.names[1], "attacker_weapon": self.weapon,
+        })
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertEqual(result["round_summary"][0]["attacker"], self.names[0])
+        self.assertIn("attacker_hp", result)
+        self.assertIn(f"{self.names[0]} attacks {self.names[1]}", result["text"])
+
+    def test_batch_keeps_order_and_reports_errors(self):
+        a, d = self.names
+        response = self.client.post("/api/simulate", json=[
+            {"attacker": a, "defender": d},
+            {"attacker": "Nobody", "defender": d},
+            {"attacker": d, "defender": a, "terrain": "defensive", "detailed": True},
+        ])
+        results = response.get_json()["results"]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]["round_summary"][0]["attacker"], a)
+        self.assertIn("error", results[1])
+        self.assertEqual(results[2]["round_summary"][0]["attacker"], d)
+        self.assertTrue(results[2]["round_summary"][0]["steps"])
+
+    def test_wrongly_typed_fields_are_reported_per_matchup(self):
+        a, d = self.names
+        response = self.client.post("/api/simulate", json=[
+            {"attacker": 5, "defender": d},
+            {"attacker": a, "defender": d, "attacker_weapon": 3},
+            {"attacker": a, "defender": d, "terrain": ["x"]},
+            {"attacker": a, "defender": d},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.get_json()["results"]
+        for result in results[:3]:
+            self.assertIn("error", result)
+        self.assertEqual(results[3]["round_summary"][0]["attacker"], a)
+        single = self.client.post("/api/simulate", json={"attacker": a, "defender": [d]})
+        self.assertEqual(single.status_code, 400)
+        self.assertIn("error", single.get_json())
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.post("/api/simulate", data="not json").status_code, 400)
+        self.assertEqual(self.client.post("/api/simulate", json={"attacker": "Nobody"}).status_code, 400)
+        self.app.config["SIMULATE_BATCH_LIMIT"] = 1
+        self.assertEqual(self.client.post("/api/simulate", json=[{}, {}]).status_code, 400)
+
+class TestDatabaseSettings(CatalogAppTestCase):
+    def test_pragmas_from_config(self):
+        with self.app.app_context():
+            db = get_db()
+            self.assertEqual(db.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(db.conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            self.assertEqual(db.conn.execute("PRAGMA busy_timeout").fetchone()[0], self.app.config["DATABASE_BUSY_TIMEOUT"])
+
+    def test_public_connections_are_read_only(self):
+        with self.app.app_context():
+            with self.assertRaises(sqlite3.OperationalError):
+                get_db(readonly=True).conn.execute("DELETE FROM units")
+
+    def test_reads_continue_during_admin_write(self):
+        writer = FEHDatabase(self.db_path)
+        writer.conn.execute("INSERT INTO skills (name, skill_type) VALUES ('Pending', 'C')")  # holds the write lock
+        try:
+            response = self.client.get("/units")
+            self.assertEqual(response.status_code, 200)
+        finally:
+            writer.conn.rollback()
+            writer.close()
+
+    def test_readonly_public_can_be_turned_off(self):
+        app = create_app({"DATABASE": self.db_path, "DATABASE_READONLY_PUBLIC": False})
+        with app.app_context():
+            self.assertIs(get_db(readonly=True), get_db())
+
+class TestCatalogCache(unittest.TestCase):
+    def setUp(self):
+        self.test_db_path = str(DB_PATH).replace('feh.db', 'test_feh.db')
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+        self.db = FEHDatabase(db_path=self.test_db_path)
+        self.builds = 0
+
+    def tearDown(self):
+        self.db.close()
+        if os.path.exists(self.test_db_path):
+            os.remove(self.test_db_path)
+
+    def build(self):
+        self.builds += 1
+        return self.builds
+
+    def test_rebuilds_only_after_catalog_write(self):
+        cache = CatalogCache(self.build, version=self.db.catalog_versions)
+        self.assertEqual(cache.get(), 1)
+        self.assertEqual(cache.get(), 1)
+        self.db.add_skill({"name": "TestSkill", "skill_type": "A"})
+        self.assertEqual(cache.get(), 2)
+        self.assertEqual(self.builds, 2)
+
+if __name__ == "__main__":
+    unittest.main()
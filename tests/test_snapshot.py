@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+import unittest
+from dataclasses import replace
+import numpy as np
+from simulator.catalog import Catalog, weapon_from_row
+from simulator.data_loader import FEHDatabase
+from simulator.snapshot import export_snapshot, open_snapshot, write_snapshot
+from simulator.sweep import SweepCatalog, product_matchups, run_sweep
+from simulator.vectorized import StatColumns
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "catalog.snap")
+        self.db = FEHDatabase(os.path.join(self.tmpdir, "feh.db"))
+        ike = self.db.add_unit({"name": "Ike", "hp": 42, "atk": 35, "spd": 25, "defense": 32, "res": 18,
+                                "unit_type": "infantry"})
+        lilina = self.db.add_unit({"name": "Lilina", "hp": 35, "atk": 37, "spd": 25, "defense": 19, "res": 30,
+                                   "unit_type": "infantry"})
+        self.db.add_unit({"name": "Lyn", "hp": 35, "atk": 33, "spd": 36, "defense": 18, "res": 28})
+        ragnell = self.db.add_weapon({"name": "Ragnell", "might": 16, "color": "red", "range": 1, "weapon_type": "Sword"})
+        forblaze = self.db.add_weapon({"name": "Forblaze", "might": 14, "color": "red", "weapon_type": "tome"})
+        urvan = self.db.add_weapon({"name": "Urvan", "might": 16, "color": "green", "range": 1, "weapon_type": "Axe"})
+        aether = self.db.add_skill({"name": "Aether", "skill_type": "Special", "description": "Heals — and pierces"})
+        self.db.conn.executemany("INSERT INTO unit_weapons (unit_id, weapon_id) VALUES (?, ?)",
+                                 [(ike, ragnell), (ike, urvan), (lilina, forblaze)])
+        self.db.conn.execute("INSERT INTO unit_skills (unit_id, skill_id) VALUES (?, ?)", (ike, aether))
+        self.db.conn.commit()
+        self.catalog = Catalog.load(self.db)
+        export_snapshot(self.db, self.path)
+        self.snapshot = open_snapshot(self.path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def test_rows_round_trip(self):
+        self.assertEqual(self.snapshot.units.rows(), self.catalog.units)
+        self.assertEqual(self.snapshot.weapons.rows(), self.catalog.weapons)
+        self.assertEqual(self.snapshot.skills.rows(), self.catalog.skills)
+        self.assertIsNone(self.snapshot.weapon("forblaze")["range"])
+        self.assertIsNone(self.snapshot.unit("Nobody"))
+
+    def test_columns_are_read_only_views(self):
+        hp = self.snapshot.units["hp"]
+        self.assertFalse(hp.flags.writeable)
+        with self.assertRaises(ValueError):
+            hp[0] = 1
+
+    def test_build_unit_matches_catalog(self):
+        for name in ("Ike", "lilina", "Lyn"):
+            unit, expected_unit = self.snapshot.build_unit(name), self.catalog.build_unit(name)
+            built, expected = unit.snapshot(), expected_unit.snapshot()
+            self.assertEqual(replace(built, equipped_weapon=None), replace(expected, equipped_weapon=None))
+            for attr in ("name", "might", "color", "range", "weapon_type"):
+                self.assertEqual(getattr(built.equipped_weapon, attr, None), getattr(expected.equipped_weapon, attr, None))
+            self.assertEqual([w.name for w in unit.weapons], [w.name for w in expected_unit.weapons])
+            self.assertEqual([s.name for s in unit.learned_skills], [s.name for s in expected_unit.learned_skills])
+        ike = self.snapshot.build_unit("Ike")
+        self.assertEqual(([w.name for w in ike.weapons], [s.name for s in ike.learned_skills]), (["Ragnell", "Urvan"], ["Aether"]))
+
+    def test_stat_columns_match_units(self):
+        columns = self.snapshot.stat_columns()
+        expected = StatColumns.from_units(self.catalog.build_units())
+        for field in StatColumns.__dataclass_fields__:
+            np.testing.assert_array_equal(getattr(columns, field), getattr(expected, field), err_msg=field)
+
+    def test_is_current_until_catalog_changes(self):
+        self.assertTrue(self.snapshot.is_current(self.db))
+        self.db.add_skill({"name": "Moonbow", "skill_type": "Special"})
+        self.assertFalse(self.snapshot.is_current(self.db))
+
+    def test_reexport_leaves_open_snapshot_readable(self):
+        self.db.add_unit({"name": "Roy", "hp": 40, "atk": 35, "spd": 30, "defense": 20, "res": 20})
+        export_snapshot(self.db, self.path)
+        self.assertEqual(len(self.snapshot.units), 3)
+        self.assertEqual(len(open_snapshot(self.path).units), 4)
+
+    def test_empty_catalog(self):
+        write_snapshot(Catalog([], [], []), self.path)
+        snapshot = open_snapshot(self.path)
+        self.assertEqual(len(snapshot.units), 0)
+        self.assertEqual(len(snapshot.stat_columns()), 0)
+
+    def test_rejects_other_files(self):
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+        with self.assertRaises(ValueError):
+            open_snapshot(self.path)
+        with open(self.path, "wb") as f:
+            f.write(b"SQLite format 3\x00" + bytes(100))
+        with self.assertRaises(ValueError):
+            open_snapshot(self.path)
+
+    def test_sweep_from_snapshot_path(self):
+        matchups = product_matchups(range(3), range(3), attacker_weapons=(None, 0))
+        catalog = SweepCatalog(self.catalog.build_units(), [weapon_from_row(w) for w in self.catalog.weapons])
+        expected = run_sweep(catalog, matchups, processes=1)
+        self.assertEqual(run_sweep(self.path, matchups, processes=1), expected)
+        self.assertEqual(run_sweep(self.path, matchups, processes=2), expected)
+
+    def test_sweep_catalog_builds_rows_once(self):
+        catalog = self.snapshot.sweep_catalog()
+        self.assertIs(catalog.units[0], catalog.units[0])
+        self.assertEqual(catalog.units[-1].name, "Lyn")
+        self.assertEqual([w.name for w in catalog.weapons], ["Forblaze", "Ragnell", "Urvan"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import random
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from simulator.units import Unit
+from simulator.weapon import Weapon
+from simulator.battle import simulate_battle
+from simulator.sweep import Matchup, SweepCatalog, product_matchups, run_sweep
+
+class TestSweep(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(42)
+        self.weapons = [
+            Weapon(name="Iron Sword", might=10, color="red", weapon_type="Sword"),
+            Weapon(name="Fire", might=8, color="blue", range=2, weapon_type="tome"),
+        ]
+        self.units = [
+            Unit(name=f"Unit{i}", hp=rng.randint(20, 50), atk=rng.randint(20, 50), spd=rng.randint(10, 50),
+                 defense=rng.randint(10, 40), res=rng.randint(10, 40), equipped_weapon=rng.choice(self.weapons))
+            for i in range(6)
+        ]
+        self.catalog = SweepCatalog(self.units, self.weapons)
+
+    def test_product_matchups(self):
+        matchups = product_matchups(range(2), range(3), attacker_weapons=(None, 0), terrains=(None, "defensive"))
+        self.assertEqual(len(matchups), 2 * 2 * 3 * 2)
+        self.assertEqual(matchups[0], Matchup(0, 0))
+        self.assertEqual(matchups[:3], [Matchup(0, 0), Matchup(0, 0, terrain="defensive"), Matchup(0, 1)])
+        self.assertEqual(matchups[6], Matchup(0, 0, attacker_weapon=0))
+
+    def test_serial_matches_simulate_battle(self):
+        matchups = [Matchup(0, 1), Matchup(2, 3, attacker_weapon=1, terrain="defensive")]
+        results = run_sweep(self.catalog, matchups, processes=1)
+        self.units[2].equipped_weapon = self.weapons[1]
+        expected = [
+            simulate_battle(self.units[0], self.units[1], {"lean": True, "pure": True}),
+            simulate_battle(self.units[2], self.units[3], {"lean": True, "pure": True, "terrain": "defensive"}),
+        ]
+        self.assertEqual(results, expected)
+
+    def test_pool_preserves_order(self):
+        matchups = product_matchups(range(6), range(6), attacker_weapons=(None, 0, 1), terrains=(None, "defensive"))
+        serial = run_sweep(self.catalog, matchups, processes=1)
+        parallel = run_sweep(self.catalog, matchups, processes=2, chunksize=7)
+        self.assertEqual(serial, parallel)
+
+    def test_shared_executor_runs_several_catalogs(self):
+        matchups = product_matchups(range(3), range(3))
+        other = SweepCatalog(self.units[3:], self.weapons)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            first = run_sweep(self.catalog, matchups, processes=2, executor=executor)
+            second = run_sweep(other, matchups, processes=2, executor=executor)
+        self.assertEqual(first, run_sweep(self.catalog, matchups, processes=1))
+        self.assertEqual(second, run_sweep(other, matchups, processes=1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import itertools
+import random
+import unittest
+from simulator.units import Unit
+from simulator.weapon import Weapon
+from simulator.battle import simulate_battle
+from simulator.team import search_attack_order
+
+WEAPONS = [
+    Weapon(name="Iron Sword", might=10, color="red", weapon_type="Sword"),
+    Weapon(name="Iron Lance", might=10, color="blue", weapon_type="Lance"),
+    Weapon(name="Fire", might=8, color="blue", range=2, weapon_type="tome"),
+]
+
+def random_team(rng, prefix, size):
+    return [
+        Unit(name=f"{prefix}{i}", hp=rng.randint(25, 50), atk=rng.randint(30, 55), spd=rng.randint(15, 45),
+             defense=rng.randint(10, 35), res=rng.randint(10, 35), equipped_weapon=rng.choice(WEAPONS)).snapshot()
+        for i in range(size)
+    ]
+
+def brute_force(team, enemies):
+    """Best (KOs, -losses) over every sequence of distinct attackers and any targets."""
+    best = (-1, 0)
+    for length in range(len(team) + 1):
+        for attackers in itertools.permutations(range(len(team)), length):
+            for targets in itertools.product(range(len(enemies)), repeat=length):
+                player_hp = [u.hp for u in team]
+                enemy_hp = [e.hp for e in enemies]
+                valid = True
+                for i, j in zip(attackers, targets):
+                    if player_hp[i] == 0 or enemy_hp[j] == 0:
+                        valid = False
+                        break
+                    a = Unit(name="a", hp=player_hp[i], atk=team[i].atk, spd=team[i].spd, defense=team[i].defense,
+                             res=team[i].res, equipped_weapon=team[i].equipped_weapon)
+                    e = Unit(name="e", hp=enemy_hp[j], atk=enemies[j].atk, spd=enemies[j].spd, defense=enemies[j].defense,
+                             res=enemies[j].res, equipped_weapon=enemies[j].equipped_weapon)
+                    simulate_battle(a, e, {"lean": True})
+                    player_hp[i], enemy_hp[j] = a.hp, e.hp
+                if valid:
+                    best = max(best, (enemy_hp.count(0), -player_hp.count(0)))
+    return best
+
+class TestTeamSearch(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        for _ in range(8):
+            team, enemies = random_team(rng, "P", 3), random_team(rng, "E", 3)
+            result = search_attack_order(team, enemies)
+            self.assertTrue(result.complete)
+            self.assertEqual((result.enemies_ko, -result.units_lost), brute_force(team, enemies))
+            self.assertEqual(len(result.order), len({attacker for attacker, _ in result.order}))
+
+    def test_budget(self):
+        rng = random.Random(4)
+        team, enemies = random_team(rng, "P", 4), random_team(rng, "E", 4)
+        result = search_attack_order(team, enemies, max_nodes=3)
+        self.assertFalse(result.complete)
+        self.assertLessEqual(result.nodes, 3)
+        result = search_attack_order(team, enemies, max_nodes=0)
+        self.assertEqual(result.order, [])
+
+    def test_team_size_limit(self):
+        rng = random.Random(5)
+        with self.assertRaises(ValueError):
+            search_attack_order(random_team(rng, "P", 5), random_team(rng, "E", 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from simulator.units import Unit
+from simulator.weapon import Weapon
+from simulator.battle import simulate_battle
+from simulator.variants import iv_spreads, iv_stats, simulate_variants, variant_units
+from simulator.vectorized import StatColumns
+
+class TestVariants(unittest.TestCase):
+    def setUp(self):
+        self.sword = Weapon(name="Iron Sword", might=10, color="red", weapon_type="Sword")
+        self.tome = Weapon(name="Fire", might=8, color="blue", range=2, weapon_type="tome")
+        self.unit = Unit(name="Eliwood", hp=40, atk=34, spd=30, defense=25, res=20,
+                         superboons=["Atk"], superbanes=["def"], equipped_weapon=self.sword)
+        self.foes = [
+            Unit(name="Lute", hp=35, atk=36, spd=29, defense=15, res=30, equipped_weapon=self.tome),
+            Unit(name="Gunter", hp=45, atk=38, spd=22, defense=32, res=15, equipped_weapon=self.sword),
+        ]
+
+    def test_spreads(self):
+        spreads = iv_spreads()
+        self.assertEqual(len(spreads), 21)
+        self.assertEqual(len(set(spreads)), 21)
+        self.assertEqual(spreads[0], (None, None))
+
+    def test_superboons(self):
+        stats = iv_stats(self.unit, "atk", "defense")
+        self.assertEqual((stats["atk"], stats["defense"]), (38, 21))
+        stats = iv_stats(self.unit, "spd", "res")
+        self.assertEqual((stats["spd"], stats["res"]), (33, 17))
+
+    def test_matches_scalar_engine(self):
+        for initiating in (True, False):
+            table = simulate_variants(self.unit, self.foes, initiating=initiating)
+            self.assertEqual(table.unit_hp.shape, (21, 2))
+            for row, (boon, bane) in enumerate(iv_spreads()):
+                variant = Unit(name="Variant", equipped_weapon=self.sword, **iv_stats(self.unit, boon, bane))
+                for col, foe in enumerate(self.foes):
+                    if initiating:
+                        result = simulate_battle(variant, foe, {"lean": True, "pure": True})
+                        expected = (result.attacker_hp, result.defender_hp)
+                    else:
+                        result = simulate_battle(foe, variant, {"lean": True, "pure": True})
+                        expected = (result.defender_hp, result.attacker_hp)
+                    self.assertEqual((table.unit_hp[row, col], table.foe_hp[row, col]), expected)
+            summary = table.summary()
+            self.assertEqual(len(summary), 21)
+            self.assertTrue(all(r["wins"] + r["losses"] + r["draws"] == 2 for r in summary))
+            self.assertIn(table.best(), table.variants)
+
+    def test_foe_dependent_hooks_fall_back_to_scalar_engine(self):
+        self.foes[1].has_guaranteed_follow_up = lambda foe: foe.spd < 30
+        with self.assertRaises(ValueError):
+            StatColumns.from_units(self.foes)
+        self.assert_matches_scalar_engine()  # Lute vectorized, Gunter scalar
+        self.unit.denies_foe_follow_up = lambda foe: foe.atk > 37
+        self.assert_matches_scalar_engine()
+
+    def assert_matches_scalar_engine(self):
+        for initiating in (True, False):
+            table = simulate_variants(self.unit, self.foes, initiating=initiating)
+            for row, variant in enumerate(variant_units(self.unit)):
+                for col, foe in enumerate(self.foes):
+                    if initiating:
+                        result = simulate_battle(variant, foe, {"lean": True, "pure": True})
+                        expected = (result.attacker_hp, result.defender_hp)
+                    else:
+                        result = simulate_battle(foe, variant, {"lean": True, "pure": True})
+                        expected = (result.defender_hp, result.attacker_hp)
+                    self.assertEqual((table.unit_hp[row, col], table.foe_hp[row, col]), expected)
+
+if __name__ == "__main__":
+    unittest.main()
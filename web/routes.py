@@ -5,99 +5,121 @@ Defines all URL routes for the FEH simulator web app.
 Handles rendering templates, form data, and simulation logic.
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for
-from simulator.calculations import calculate_damage
-from simulator.units import Unit
-from simulator.data_loader import FEHDatabase, get_all_weapons, get_weapon_by_name, update_weapon, get_weapon_types, delete_weapon
+import json
+from dataclasses import asdict
+
+from flask import Blueprint, current_app, render_template, request, redirect, url_for, jsonify
+from simulator.battle import simulate_battle
+from simulator.calculations import DamageCache
+from simulator.matrix import build_matchup_matrix
+from simulator.catalog import skill_from_row, weapon_from_row
+from simulator.data_loader import get_weapon_by_name, update_weapon, get_weapon_types, delete_weapon
+from simulator.migrations import FILTER_COLUMNS
+from web.utils import CatalogCache, PrecompressedPayload, ResponseCache, cached_page, get_catalog, get_db
 
 main = Blueprint("main", __name__)
 
 # --- Public Routes ---
 @main.route("/", methods=["GET", "POST"])
+@cached_page
 def index():
     """Homepage: Select attacker/defender, run simulation, show results."""
     result = None
-    units = get_units_from_db()
-    units_for_template = [unit_to_dict(u) for u in units]
-    db = FEHDatabase()
-    weapons = db.get_weapons()
-    skills = db.get_skills()
-    db.close()
+    catalog = get_catalog()
 
     if request.method == "POST":
-        attacker_name = request.form.get("attacker")
-        defender_name = request.form.get("defender")
-        attacker_weapon_name = request.form.get("attacker_weapon")
-        defender_weapon_name = request.form.get("defender_weapon")
-        attacker = next((u for u in units if u.name == attacker_name), None)
-        defender = next((u for u in units if u.name == defender_name), None)
-        attacker_weapon = next((w for w in weapons if w['name'] == attacker_weapon_name), None)
-        defender_weapon = next((w for w in weapons if w['name'] == defender_weapon_name), None)
-        skill_slots = ['assist', 'special', 'a', 'b', 'c', 'seal', 'x']
-        for slot in skill_slots:
-            attacker_skill_name = request.form.get(f'attacker_{slot}')
-            defender_skill_name = request.form.get(f'defender_{slot}')
-            attacker_skill = next((s for s in skills if s['name'] == attacker_skill_name), None)
-            defender_skill = next((s for s in skills if s['name'] == defender_skill_name), None)
-            if attacker and attacker_skill:
-                if not hasattr(attacker, 'skills'):
-                    attacker.skills = {}
-                attacker.skills[slot] = attacker_skill
-            if defender and defender_skill:
-                if not hasattr(defender, 'skills'):
-                    defender.skills = {}
-                defender.skills[slot] = defender_skill
-        from simulator.weapon import Weapon
-        if attacker and attacker_weapon and attacker_weapon != 'None':
-            attacker.weapons = [attacker_weapon]
-            attacker.equipped_weapon = Weapon(
-                name=attacker_weapon['name'],
-                might=attacker_weapon['might'],
-                color=attacker_weapon.get('color'),
-                range=attacker_weapon.get('range', 1),
-                weapon_type=attacker_weapon.get('weapon_type')
-            )
-        if defender and defender_weapon and defender_weapon != 'None':
-            defender.weapons = [defender_weapon]
-            defender.equipped_weapon = Weapon(
-                name=defender_weapon['name'],
-                might=defender_weapon['might'],
-                color=defender_weapon.get('color'),
-                range=defender_weapon.get('range', 1),
-                weapon_type=defender_weapon.get('weapon_type')
-            )
-        if attacker and defender:
-            attacker_short = attacker.name.split(',')[0].strip()
-            defender_short = defender.name.split(',')[0].strip()
-            dmg, log = calculate_damage(attacker, defender)
-            result = f"{attacker_short} deals {dmg} damage to {defender_short}!"
-
-    return render_template("index.html", units=units_for_template, weapons=weapons, skills=skills, result=result)
+        # Same result as /api/simulate, which scripts.js shows without a reload.
+        matchup = request.form.to_dict()
+        if matchup.get('attacker', 'None') != 'None' and matchup.get('defender', 'None') != 'None':
+            outcome = simulate_matchup(catalog, matchup)
+            result = outcome.get('error') or outcome['text']
+
+    # The page carries no catalog data; scripts.js fills the dropdowns from
+    # catalog_url, which changes only when the catalog does.
+    catalog_url = url_for("main.catalog_json", v=catalog_payload_cache().get().version)
+    return render_template("index.html", catalog_url=catalog_url, result=result)
+
+@main.route("/api/catalog")
+def catalog_json():
+    """
+    Units, weapons and skills as one precompressed JSON document. URLs that
+    carry the current ?v= version never change content and are cached for a
+    year; any other URL is revalidated with its ETag.
+    """
+    payload = catalog_payload_cache().get()
+    if request.args.get("v") == payload.version:
+        return payload.response("public, max-age=31536000, immutable")
+    return payload.response("no-cache")
+
+@main.route("/matrix")
+@cached_page
+def matrix():
+    """Everyone-vs-everyone matchup grid."""
+    return render_template("matrix.html", matrix=matchup_matrix_cache().get())
+
+@main.route("/api/matrix")
+@cached_page
+def matrix_json():
+    """Matchup grid as JSON."""
+    return jsonify(matchup_matrix_cache().get())
+
+@main.route("/api/simulate", methods=["POST"])
+def simulate_json():
+    """
+    Simulate one matchup (a JSON object) or a batch (a JSON array of them).
+
+    A matchup names "attacker" and "defender" and may set "attacker_weapon",
+    skills per slot ("attacker_a", ... or "attacker_skills": {"a": ...}),
+    "terrain" and "detailed". One matchup returns its result object (400
+    with {"error"} if it is invalid); a batch returns {"results": [...]} in
+    request order, with an {"error"} entry for each invalid matchup.
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        matchups = [data]
+    elif isinstance(data, list):
+        matchups = data
+    else:
+        return jsonify(error="Expected a matchup object or an array of matchups."), 400
+    limit = current_app.config['SIMULATE_BATCH_LIMIT']
+    if len(matchups) > limit:
+        return jsonify(error=f"At most {limit} matchups per request."), 400
+    catalog = get_catalog()
+    damage_cache = DamageCache()  # batches often repeat an attacker/defender pairing
+    results = [simulate_matchup(catalog, matchup, damage_cache) for matchup in matchups]
+    if isinstance(data, dict):
+        return jsonify(results[0]), 400 if 'error' in results[0] else 200
+    return jsonify(results=results)
 
 @main.route("/about")
+@cached_page
 def about():
     """About page."""
     return render_template("about.html")
 
 @main.route("/units")
+@cached_page
 def units_list():
     """Public unit list."""
-    db = FEHDatabase()
-    units = db.get_units()
-    db.close()
-    return render_template("unit_list.html", units=units, search=None)
+    return render_list("unit_list.html", get_db(readonly=True), "units")
 
 @main.route("/weapons")
+@cached_page
 def weapons_list():
     """Public weapon list."""
-    weapons = get_all_weapons()
-    return render_template("weapon_list.html", weapons=weapons)
+    return render_list("weapon_list.html", get_db(readonly=True), "weapons")
+
+@main.route("/skills")
+@cached_page
+def skills_list():
+    """Public skill list."""
+    return render_list("skill_list.html", get_db(readonly=True), "skills")
 
 # --- Admin Routes ---
 @main.route("/admin", methods=["GET", "POST"])
 def admin_panel():
     """Admin dashboard for managing units, weapons, skills."""
-    db = FEHDatabase()
+    db = get_db()
     units = db.get_units()
     weapons = db.get_weapons()
     skills = db.get_skills()
@@ -166,37 +188,28 @@ def admin_panel():
             elif delete_type == "skill":
                 db.delete_skill(delete_name)
                 message = f"Skill '{delete_name}' deleted."
-    db.close()
     return render_template("admin.html", units=units, weapons=weapons, skills=skills, message=message)
 
 @main.route("/admin/units", methods=["GET"])
 def admin_units():
     """Admin unit list."""
-    db = FEHDatabase()
-    units = db.get_units()
-    db.close()
-    search = request.args.get('search', '').strip().lower()
-    if search:
-        units = [u for u in units if search in u['name'].lower()]
-    return render_template("unit_list.html", units=units, search=search)
+    return render_list("unit_list.html", get_db(), "units")
 
 @main.route("/admin/delete/unit/<unit_name>", methods=["POST"])
 def admin_delete_unit(unit_name):
     """Delete unit (admin)."""
-    db = FEHDatabase()
+    db = get_db()
     db.delete_unit(unit_name)
-    db.close()
     return redirect(url_for('main.admin_units'))
 
 @main.route("/admin/edit/unit/<unit_name>", methods=["GET", "POST"])
 def admin_edit_unit(unit_name):
     """Edit unit (admin)."""
-    db = FEHDatabase()
+    db = get_db()
     units = db.get_units()
     unit = next((u for u in units if u['name'] == unit_name), None)
     message = None
     if not unit:
-        db.close()
         return render_template("edit_unit.html", unit=None, message="Unit not found.")
     if request.method == "POST":
         unit["name"] = request.form.get("name")
@@ -214,20 +227,18 @@ def admin_edit_unit(unit_name):
         db.update_unit(unit_name, unit)
         message = f"Unit '{unit['name']}' updated."
         unit_name = unit["name"]
-    db.close()
     return render_template("edit_unit.html", unit=unit, message=message)
 
 @main.route('/admin/weapons')
 def admin_weapons():
     """Admin weapon list."""
-    weapons = get_all_weapons()
-    return render_template('weapon_list.html', weapons=weapons)
+    return render_list('weapon_list.html', get_db(), 'weapons')
 
 @main.route('/admin/edit/weapon/<name>', methods=['GET', 'POST'])
 def admin_edit_weapon(name):
     """Edit weapon (admin)."""
-    weapon = get_weapon_by_name(name)
-    weapon_types = get_weapon_types()
+    weapon = get_weapon_by_name(name, db=get_db())
+    weapon_types = get_weapon_types(db=get_db())
     if request.method == 'POST':
         new_name = request.form['name']
         might = int(request.form['might'])
@@ -235,17 +246,94 @@ def admin_edit_weapon(name):
         range_ = int(request.form['range'])
         weapon_type = request.form['weapon_type']
         effective_against = request.form['effective_against']
-        update_weapon(name, new_name, might, color, range_, weapon_type, effective_against)
+        update_weapon(name, new_name, might, color, range_, weapon_type, effective_against, db=get_db())
         return redirect(url_for('main.admin_weapons'))
     return render_template('edit_weapon.html', weapon=weapon, weapon_types=weapon_types)
 
 @main.route('/admin/delete/weapon/<name>', methods=['POST'])
 def admin_delete_weapon(name):
     """Delete weapon (admin)."""
-    delete_weapon(name)
+    delete_weapon(name, db=get_db())
     return redirect(url_for('main.admin_weapons'))
 
 # --- Helper Functions ---
+def render_list(template, db, table):
+    """
+    Render one page of a catalog list. Reads search, after/before and the
+    table's filter columns from the query string; the template gets the
+    rows as `items`, the filter values and their `options`, and prev/next
+    page URLs.
+    """
+    args = request.args
+    filters = {column: args.get(column, '') for column in FILTER_COLUMNS[table]}
+    search = args.get('search', '').strip()
+    page = db.page(table, search=search, after=args.get('after'), before=args.get('before'),
+                   limit=current_app.config['PAGE_SIZE'], **filters)
+    query = {key: value for key, value in args.items() if value and key not in ('after', 'before')}
+    prev_url = url_for(request.endpoint, **query, before=page.before) if page.before is not None else None
+    next_url = url_for(request.endpoint, **query, after=page.after) if page.after is not None else None
+    return render_template(template, items=page.rows, search=search, filters=filters,
+                           options={c: get_catalog().values(table, c) for c in filters}, prev_url=prev_url, next_url=next_url)
+
+SKILL_SLOTS = ['assist', 'special', 'a', 'b', 'c', 'seal', 'x']
+# Matchup fields that name a catalog entry or terrain; each is a string or absent.
+MATCHUP_NAMES = ['attacker', 'defender', 'attacker_weapon', 'defender_weapon', 'terrain']
+
+def build_combatant(catalog, values, side):
+    """
+    Fresh Unit for one side ('attacker' or 'defender') of a matchup, or None
+    if values[side] isn't a unit. <side>_weapon and the skill slots
+    (<side>_<slot>, or a <side>_skills {slot: name} dict) override its
+    loadout; unknown names are ignored, like the form's "None".
+    """
+    unit = catalog.build_unit(values.get(side))
+    if unit is None:
+        return None
+    weapon = catalog.weapon(values.get(f'{side}_weapon'))
+    if weapon:
+        unit.equipped_weapon = weapon_from_row(weapon)
+        unit.weapons = [unit.equipped_weapon]
+    skills = values.get(f'{side}_skills')
+    for slot in SKILL_SLOTS:
+        name = skills.get(slot) if isinstance(skills, dict) else values.get(f'{side}_{slot}')
+        skill = catalog.skill(name) if isinstance(name, str) else None
+        if skill:
+            if not hasattr(unit, 'equipped_skills'):
+                unit.equipped_skills = {}
+            unit.equipped_skills[slot] = skill_from_row(skill)
+    return unit
+
+def simulate_matchup(catalog, matchup, damage_cache=None):
+    """simulate_battle result for one /api/simulate matchup as a JSON-ready dict."""
+    if not isinstance(matchup, dict):
+        return {'error': "Each matchup must be an object."}
+    for key in MATCHUP_NAMES:
+        if not isinstance(matchup.get(key), (str, type(None))):
+            return {'error': f"{key!r} must be a string."}
+    units = {}
+    for side in ('attacker', 'defender'):
+        units[side] = build_combatant(catalog, matchup, side)
+        if units[side] is None:
+            return {'error': f"Unknown {side} {matchup.get(side)!r}."}
+    options = {'pure': True, 'terrain': matchup.get('terrain'), 'detailed': bool(matchup.get('detailed')),
+               'damage_cache': damage_cache}
+    return battle_to_dict(simulate_battle(units['attacker'], units['defender'], options))
+
+def battle_to_dict(result):
+    data = asdict(result)
+    data['text'] = battle_text(result)
+    return data
+
+def battle_text(result):
+    """Readable summary of a BattleResult, one line per attack."""
+    lines = [
+        f"{attack.attacker} attacks {attack.defender} for {attack.damage} damage "
+        f"({attack.hp_before} -> {attack.hp_after} HP){' KO!' if attack.ko else ''}"
+        for attack in result.round_summary
+    ]
+    lines.append(f"Winner: {result.winner}" if result.winner else "No KO.")
+    return "\n".join(lines)
+
 def unit_to_dict(u):
     return {
         'name': u.name,
@@ -262,30 +350,32 @@ def unit_to_dict(u):
         'weapon_type': u.weapon_type
     }
 
-def get_units_from_db():
-    db = FEHDatabase()
-    units = db.get_units()
-    weapons = db.get_weapons()
-    db.close()
-    unit_objs = []
-    for u in units:
-        uw = [w for w in weapons if w['id'] in [u.get('weapon_id')] if u.get('weapon_id')]
-        weapon = uw[0] if uw else None
-        unit_obj = Unit(
-            name=u['name'],
-            hp=u['hp'],
-            atk=u['atk'],
-            spd=u['spd'],
-            defense=u['defense'],
-            res=u['res'],
-            superboons=u.get('superboons', []),
-            superbanes=u.get('superbanes', []),
-            exclusive_skills=u.get('exclusive_skills', []),
-            image_url=u.get('image_url', ''),
-            unit_type=u.get('unit_type', ''),
-            weapon_type=u.get('weapon_type', '')
-        )
-        if weapon:
-            unit_obj.equipped_weapon = weapon
-        unit_objs.append(unit_obj)
-    return unit_objs
\ No newline at end of file
+def build_catalog_payload():
+    catalog = get_catalog()
+    data = {
+        'units': [unit_to_dict(u) for u in catalog.build_units()],
+        'weapons': catalog.weapons,
+        'skills': catalog.skills,
+    }
+    body = json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    return PrecompressedPayload(body, 'application/json')
+
+def catalog_versions():
+    return get_catalog().versions
+
+# Per-app values derived from the catalog, rebuilt only when it changes.
+@main.record_once
+def _init_catalog_caches(state):
+    state.app.extensions["feh_catalog_payload"] = CatalogCache(build_catalog_payload, version=catalog_versions)
+    # Rendered public pages (see cached_page).
+    state.app.extensions["feh_response_cache"] = ResponseCache(
+        state.app.config["RESPONSE_CACHE_ENTRIES"], state.app.config["RESPONSE_CACHE_BYTES"])
+    # Shared by /matrix and /api/matrix.
+    state.app.extensions["feh_matchup_matrix"] = CatalogCache(
+        lambda: build_matchup_matrix(get_catalog().build_units()), version=catalog_versions)
+
+def catalog_payload_cache():
+    return current_app.extensions["feh_catalog_payload"]
+
+def matchup_matrix_cache():
+    return current_app.extensions["feh_matchup_matrix"]
@@ -0,0 +1,280 @@
+"""
+utils.py
+--------
+Helpers shared by the web routes.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, current_app, g, make_response, request
+
+try:
+    import brotli
+except ImportError:  # optional: br is offered only when the package is installed
+    brotli = None
+
+from simulator.catalog import Catalog
+from simulator.data_loader import ConnectionPool, FEHDatabase
+
+DEFAULT_POOL_SIZE = 4
+
+
+def database_pragmas(config):
+    """SQLite pragmas from the DATABASE_* settings (see config.py)."""
+    return {
+        "busy_timeout": config.get("DATABASE_BUSY_TIMEOUT"),  # first: WAL switch may wait on a lock
+        "journal_mode": config.get("DATABASE_JOURNAL_MODE"),
+        "synchronous": config.get("DATABASE_SYNCHRONOUS"),
+        "mmap_size": config.get("DATABASE_MMAP_SIZE"),
+        "cache_size": config.get("DATABASE_CACHE_SIZE"),
+    }
+
+
+def init_db(app):
+    """
+    Migrate app.config["DATABASE"], set up its connection pools (read-write,
+    plus read-only for public pages when DATABASE_READONLY_PUBLIC is set)
+    and return each request's connections to them when the app context
+    tears down.
+    """
+    path = app.config["DATABASE"]
+    pragmas = database_pragmas(app.config)
+    size = app.config.get("DATABASE_POOL_SIZE", DEFAULT_POOL_SIZE)
+    # One read-write connection up front applies migrations and the
+    # persistent journal mode before any read-only connection opens.
+    FEHDatabase(path, pragmas=pragmas).close()
+    app.extensions["feh_db_pool"] = ConnectionPool(path, size=size, pragmas=pragmas)
+    if app.config.get("DATABASE_READONLY_PUBLIC"):
+        app.extensions["feh_db_pool_readonly"] = ConnectionPool(path, size=size, pragmas=pragmas, readonly=True)
+    app.teardown_appcontext(close_db)
+    app.extensions["feh_catalog"] = SharedCatalog()
+
+
+def get_db(readonly=False):
+    """
+    The FEHDatabase for the current request, taken from the app's pool on
+    first use. readonly=True gives a read-only connection when the app has
+    a read-only pool, else the read-write one.
+    """
+    if readonly and "feh_db_pool_readonly" in current_app.extensions:
+        if "db_readonly" not in g:
+            g.db_readonly = current_app.extensions["feh_db_pool_readonly"].acquire()
+        return g.db_readonly
+    if "db" not in g:
+        g.db = current_app.extensions["feh_db_pool"].acquire()
+    return g.db
+
+
+def get_catalog():
+    """
+    The app's in-memory Catalog, checked against the database once per
+    request (see SharedCatalog).
+    """
+    if "catalog" not in g:
+        g.catalog = current_app.extensions["feh_catalog"].get(get_db(readonly=True))
+    return g.catalog
+
+
+def close_db(exception=None):
+    for key in ("db", "db_readonly"):
+        db = g.pop(key, None)
+        if db is not None:
+            db.close()
+
+
+class SharedCatalog:
+    """
+    One app's Catalog, kept in step with the database's catalog_version
+    table. Writes from any worker process move those counters, so every
+    worker notices them on its next check (a single read of a five-row
+    table) and reloads only the tables that changed.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._catalog = None
+
+    def get(self, db):
+        versions = db.catalog_versions()
+        with self._lock:
+            if self._catalog is None:
+                self._catalog = Catalog.load(db, versions)
+            else:
+                self._catalog = self._catalog.reload(db, versions)
+            return self._catalog
+
+    def clear(self):
+        with self._lock:
+            self._catalog = None
+
+
+class CatalogCache:
+    """
+    Holds one value derived from the catalog (units, weapons, skills).
+
+    The value is built on first use and rebuilt only after the catalog has
+    changed, so every viewer in between is served the same cached object.
+    """
+    def __init__(self, builder, version):
+        """
+        Args:
+            builder (callable): Zero-argument function that builds the value.
+            version (callable): Returns the catalog version the value depends
+                on, e.g. the database's catalog_version counters.
+        """
+        self.builder = builder
+        self.version = version
+        self._lock = threading.Lock()
+        self._generation = None
+        self._value = None
+
+    def get(self):
+        with self._lock:
+            generation = self.version()
+            if self._generation != generation:
+                # Read the generation before building: a write that lands
+                # mid-build leaves the cache stale, so the next call rebuilds.
+                self._value = self.builder()
+                self._generation = generation
+            return self._value
+
+    def clear(self):
+        with self._lock:
+            self._generation = None
+            self._value = None
+
+
+class PrecompressedPayload:
+    """
+    A response body stored ready to send: its strong ETag plus gzip (and br,
+    with the optional brotli package) encodings compressed once up front.
+
+    Attributes:
+        version (str): Hash of the body; changes whenever the body does.
+        encodings (dict[str, bytes]): Content-Encoding -> encoded body.
+    """
+    def __init__(self, body, mimetype):
+        self.mimetype = mimetype
+        self.version = hashlib.sha256(body).hexdigest()[:20]
+        self.encodings = {"identity": body, "gzip": gzip.compress(body, 9, mtime=0)}
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(body)
+
+    def etag(self, encoding):
+        # Each encoding is its own representation, so each gets its own strong ETag.
+        return self.version if encoding == "identity" else f"{self.version}-{encoding}"
+
+    @property
+    def size(self):
+        return sum(len(body) for body in self.encodings.values())
+
+    def response(self, cache_control, last_modified=None):
+        """
+        Response for the current request: 304 when If-None-Match holds one
+        of this payload's ETags (or, without If-None-Match, when
+        If-Modified-Since is no older than `last_modified`), else the best
+        encoding the client accepts.
+        """
+        offered = [e for e in ("br", "gzip") if e in self.encodings]
+        encoding = request.accept_encodings.best_match(offered) or "identity"
+        if request.if_none_match:
+            matched = [e for e in self.encodings if request.if_none_match.contains(self.etag(e))]
+            not_modified = bool(matched)
+            if matched and encoding not in matched:
+                encoding = matched[0]
+        else:
+            since = request.if_modified_since
+            not_modified = last_modified is not None and since is not None and last_modified <= since
+        if not_modified:
+            response = Response(status=304)
+        else:
+            response = Response(self.encodings[encoding], mimetype=self.mimetype)
+            if encoding != "identity":
+                response.headers["Content-Encoding"] = encoding
+        response.set_etag(self.etag(encoding))
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.headers["Cache-Control"] = cache_control
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+class ResponseCache:
+    """
+    Bounded LRU of rendered pages, keyed on (path, query, catalog versions).
+
+    Entries are (PrecompressedPayload, Last-Modified) pairs. The least
+    recently used ones are dropped once there are more than `max_entries`
+    or their encoded bodies add up to more than `max_bytes`. A catalog write
+    changes the versions, so stale pages are never served; they just age out.
+    """
+    def __init__(self, max_entries=256, max_bytes=16 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, payload, last_modified):
+        if payload.size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0].size
+            self._entries[key] = (payload, last_modified)
+            self._bytes += payload.size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+def cached_page(view):
+    """
+    Serve GET responses of `view` from the app's ResponseCache, with ETag,
+    Last-Modified and 304 handling. The key is the path, the query string
+    and the catalog versions, so a view may only depend on those. Other
+    methods and non-200 responses pass straight through.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != "GET":
+            return view(*args, **kwargs)
+        cache = current_app.extensions["feh_response_cache"]
+        key = (request.path, tuple(sorted(request.args.items(multi=True))),
+               tuple(sorted(get_catalog().versions.items())))
+        entry = cache.get(key)
+        if entry is None:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough:
+                return response
+            entry = (PrecompressedPayload(response.get_data(), response.mimetype),
+                     datetime.now(timezone.utc).replace(microsecond=0))
+            cache.put(key, *entry)
+        payload, last_modified = entry
+        return payload.response("no-cache", last_modified)
+    return wrapper